@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import re
+import mmap
+import base64
+import hashlib
+import logging
+import xml.etree.ElementTree as ET
+
+
+logger = logging.getLogger(__name__)
+
+
+XMP_NAMESPACES = {
+    "x": "adobe:ns:meta/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "xmp": "http://ns.adobe.com/xap/1.0/",
+    "xmpGImg": "http://ns.adobe.com/xap/1.0/g/img/",
+    "xmpTPg": "http://ns.adobe.com/xap/1.0/t/pg/",
+    "stDim": "http://ns.adobe.com/xap/1.0/sType/Dimensions#",
+    "stFnt": "http://ns.adobe.com/xap/1.0/sType/Font#",
+    "xmpMM": "http://ns.adobe.com/xap/1.0/mm/",
+    "stRef": "http://ns.adobe.com/xap/1.0/sType/ResourceRef#",
+    "stMfs": "http://ns.adobe.com/xap/1.0/sType/ManifestItem#",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "illustrator": "http://ns.adobe.com/illustrator/1.0/",
+}
+
+# the XMP packet is written close to the start of the file, so it is searched
+# in this range first before scanning the whole file
+XMP_SEARCH_RANGE = 4 * 1024 ** 2
+BOX_NAMES = ["MediaBox", "CropBox", "TrimBox", "BleedBox", "ArtBox"]
+# values which change with every save, even if the artwork didn't change
+VOLATILE_REGEX = re.compile(rb"/(?:ModDate|CreationDate)\s*\([^)]*\)|/ID\s*\[[^\]]*\]")
+
+
+class AiFile(object):
+    """
+    Reads metadata of an .ai file without Illustrator. The file is memory
+    mapped, so only the parts which are needed are read from disk.
+
+        with AiFile(path) as aiFile:
+            info = aiFile.getInfo()
+            jpeg = aiFile.getThumbnail()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.data = None
+        self.xmp = None
+        self.xmpRoot = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def open(self):
+        self.file = open(self.path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def isPdfCompatible(self):
+        return self.data[:5] == b"%PDF-"
+
+    def getXmp(self):
+        """
+        Returns the XMP packet as a string or None if the file has none.
+        """
+        if self.xmp is not None:
+            return self.xmp or None
+
+        self.xmp = ""
+        start = self.data.find(b"<?xpacket begin", 0, XMP_SEARCH_RANGE)
+        if start == -1:
+            start = self.data.find(b"<?xpacket begin")
+
+        if start == -1:
+            return
+
+        end = self.data.find(b"<?xpacket end", start)
+        if end == -1:
+            return
+
+        end = self.data.find(b"?>", end)
+        self.xmp = self.data[start:end + 2].decode("utf-8", "replace")
+        return self.xmp
+
+    def getXmpRoot(self):
+        if self.xmpRoot is not None:
+            return self.xmpRoot
+
+        xmp = self.getXmp()
+        if not xmp:
+            return
+
+        try:
+            self.xmpRoot = ET.fromstring(xmp[xmp.index("<x:xmpmeta"):xmp.rindex("</x:xmpmeta>") + 12])
+        except (ValueError, ET.ParseError) as e:
+            logger.debug("invalid XMP in %s: %s" % (self.path, e))
+            return
+
+        return self.xmpRoot
+
+    def getXmpValue(self, path):
+        root = self.getXmpRoot()
+        if root is None:
+            return
+
+        # simple properties are stored as attributes or as elements
+        prefix, name = path.split(":")
+        attr = "{%s}%s" % (XMP_NAMESPACES[prefix], name)
+        for desc in root.iter("{%s}Description" % XMP_NAMESPACES["rdf"]):
+            if attr in desc.attrib:
+                return desc.attrib[attr]
+
+        elem = root.find(".//" + path, XMP_NAMESPACES)
+        if elem is not None and elem.text and elem.text.strip():
+            return elem.text.strip()
+
+    def getXmpItems(self, path, fields):
+        """
+        Returns the items of an XMP array of structs as a list of dicts.
+        """
+        root = self.getXmpRoot()
+        if root is None:
+            return []
+
+        container = root.find(".//" + path, XMP_NAMESPACES)
+        if container is None:
+            return []
+
+        items = []
+        for li in container.iter("{%s}li" % XMP_NAMESPACES["rdf"]):
+            item = {}
+            for field in fields:
+                prefix, name = field.split(":")
+                key = "{%s}%s" % (XMP_NAMESPACES[prefix], name)
+                value = li.attrib.get(key)
+                if value is None:
+                    elem = li.find(".//" + field, XMP_NAMESPACES)
+                    value = elem.text if elem is not None else None
+
+                if value is not None:
+                    item[name] = value
+
+            if item:
+                items.append(item)
+
+        return items
+
+    def getThumbnail(self):
+        """
+        Returns the embedded JPEG thumbnail as bytes or None.
+        """
+        xmp = self.getXmp()
+        if not xmp or "xmpGImg:image" not in xmp:
+            return
+
+        thumbnails = self.getXmpItems(
+            "xmp:Thumbnails",
+            ["xmpGImg:width", "xmpGImg:height", "xmpGImg:format", "xmpGImg:image"],
+        )
+        thumbnails = [t for t in thumbnails if t.get("image")]
+        if not thumbnails:
+            return
+
+        thumbnail = max(thumbnails, key=lambda x: int(x.get("width", 0) or 0))
+        try:
+            return base64.b64decode(re.sub(r"\s", "", thumbnail["image"]))
+        except Exception as e:
+            logger.debug("invalid thumbnail in %s: %s" % (self.path, e))
+
+    def getLinkedFiles(self):
+        """
+        Returns the paths of the files which are placed as links in the
+        document, read from the XMP manifest and ingredients.
+        """
+        xmp = self.getXmp()
+        if not xmp or "stRef:filePath" not in xmp:
+            return []
+
+        links = []
+        parser = ET.XMLPullParser(events=["end"])
+        filePathTag = "{%s}filePath" % XMP_NAMESPACES["stRef"]
+        try:
+            parser.feed(xmp[xmp.index("<x:xmpmeta"):xmp.rindex("</x:xmpmeta>") + 12])
+            for event, elem in parser.read_events():
+                value = elem.text if elem.tag == filePathTag else elem.attrib.get(filePathTag)
+                if value and value.strip() and value.strip() not in links:
+                    links.append(value.strip())
+
+                elem.clear()
+        except (ValueError, ET.ParseError) as e:
+            logger.debug("invalid XMP in %s: %s" % (self.path, e))
+            return []
+
+        return links
+
+    def getFonts(self):
+        """
+        Returns the fonts used in the document as a list of dicts with the
+        keys fontName, fontFamily, fontFace, fontType and fontFileName.
+        """
+        return self.getXmpItems(
+            "xmpTPg:Fonts",
+            [
+                "stFnt:fontName",
+                "stFnt:fontFamily",
+                "stFnt:fontFace",
+                "stFnt:fontType",
+                "stFnt:fontFileName",
+            ],
+        )
+
+    def getArtboards(self):
+        """
+        Returns a dict of boxes ([x1, y1, x2, y2] in points) for each page of
+        a PDF compatible file. Illustrator saves one page per artboard.
+        """
+        if not self.isPdfCompatible():
+            match = re.search(rb"%%HiResBoundingBox:\s*([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)", self.data)
+            if not match:
+                return []
+
+            return [{"ArtBox": [float(x) for x in match.groups()]}]
+
+        offsets = self.getObjectOffsets()
+        pages = []
+        if offsets:
+            for offset in offsets:
+                obj = self.readObject(offset)
+                if obj and re.search(rb"/Type\s*/Page(?![a-zA-Z])", obj):
+                    pages.append(obj)
+        else:
+            # no usable xref table, e.g. compressed xref streams
+            for match in re.finditer(rb"/Type\s*/Page(?![a-zA-Z])", self.data):
+                start = max(self.data.rfind(b" obj", 0, match.start()), 0)
+                end = self.data.find(b"endobj", match.end())
+                pages.append(self.data[start:end if end != -1 else match.end()])
+
+        artboards = []
+        for page in pages:
+            boxes = {}
+            for boxName in BOX_NAMES:
+                match = re.search(
+                    rb"/" + boxName.encode() + rb"\s*\[\s*([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s*\]",
+                    page,
+                )
+                if match:
+                    boxes[boxName] = [float(x) for x in match.groups()]
+
+            if boxes:
+                artboards.append(boxes)
+
+        return artboards
+
+    def readObject(self, offset, maxSize=64 * 1024):
+        end = self.data.find(b"endobj", offset, offset + maxSize)
+        if end == -1:
+            return
+
+        # skip the content of streams, only the dictionary is of interest
+        stream = self.data.find(b"stream", offset, end)
+        return self.data[offset:stream if stream != -1 else end]
+
+    def getObjectOffsets(self):
+        """
+        Returns the sorted offsets of all objects from the classic xref
+        tables, following incremental updates. Newer object versions take
+        precedence.
+        """
+        tail = self.data[-2048:]
+        match = re.search(rb"startxref\s+(\d+)", tail)
+        if not match:
+            return []
+
+        offsets = {}
+        xrefOffset = int(match.group(1))
+        visited = set()
+        while xrefOffset and xrefOffset not in visited and xrefOffset < len(self.data):
+            visited.add(xrefOffset)
+            if self.data[xrefOffset:xrefOffset + 4] != b"xref":
+                return []
+
+            pos = xrefOffset + 4
+            trailerPos = self.data.find(b"trailer", pos)
+            if trailerPos == -1:
+                return []
+
+            section = self.data[pos:trailerPos]
+            lines = section.split()
+            idx = 0
+            while idx + 1 < len(lines):
+                first, count = int(lines[idx]), int(lines[idx + 1])
+                idx += 2
+                for num in range(first, first + count):
+                    entryOffset, gen, kind = lines[idx:idx + 3]
+                    idx += 3
+                    if kind == b"n" and num not in offsets:
+                        offsets[num] = int(entryOffset)
+
+            trailer = self.data[trailerPos:trailerPos + 2048]
+            prev = re.search(rb"/Prev\s+(\d+)", trailer)
+            xrefOffset = int(prev.group(1)) if prev else None
+
+        return sorted(offsets.values())
+
+    def getContentFingerprint(self):
+        """
+        Returns a hash of the file content without the parts which change
+        with every save, like the XMP packet with its thumbnail and the
+        dates and IDs of the PDF trailer. Saves without changes to the
+        artwork get the same fingerprint.
+        """
+        excludes = []
+        start = self.data.find(b"<?xpacket begin")
+        while start != -1:
+            end = self.data.find(b"<?xpacket end", start)
+            if end == -1:
+                break
+
+            end = self.data.find(b"?>", end) + 2
+            excludes.append((start, end))
+            start = self.data.find(b"<?xpacket begin", end)
+
+        for match in VOLATILE_REGEX.finditer(self.data):
+            excludes.append(match.span())
+
+        fileHash = hashlib.sha1()
+        pos = 0
+        for start, end in sorted(excludes):
+            if start > pos:
+                fileHash.update(self.data[pos:start])
+
+            pos = max(pos, end)
+
+        fileHash.update(self.data[pos:])
+        return fileHash.hexdigest()
+
+    def getCreatorVersion(self):
+        """
+        Returns the major version of the Illustrator which saved the file,
+        like "28", or None if it's unknown.
+        """
+        match = re.search(r"Illustrator\s+(?:CC\s+)?(\d+)", self.getXmpValue("xmp:CreatorTool") or "")
+        return match.group(1) if match else None
+
+    def getInfo(self):
+        """
+        Returns the metadata of the file as a dict.
+        """
+        info = {
+            "path": self.path,
+            "size": os.path.getsize(self.path),
+            "pdfCompatible": self.isPdfCompatible(),
+            "creatorTool": self.getXmpValue("xmp:CreatorTool"),
+            "createDate": self.getXmpValue("xmp:CreateDate"),
+            "modifyDate": self.getXmpValue("xmp:ModifyDate"),
+            "title": None,
+            "pageCount": None,
+            "maxPageSize": None,
+            "hasThumbnail": bool(self.getXmp() and "xmpGImg:image" in self.getXmp()),
+        }
+        root = self.getXmpRoot()
+        if root is not None:
+            title = root.find(".//dc:title//rdf:li", XMP_NAMESPACES)
+            if title is not None:
+                info["title"] = title.text
+
+        pages = self.getXmpValue("xmpTPg:NPages")
+        if pages and pages.isdigit():
+            info["pageCount"] = int(pages)
+
+        sizes = self.getXmpItems("xmpTPg:MaxPageSize", ["stDim:w", "stDim:h", "stDim:unit"])
+        if not sizes and root is not None:
+            sizeElem = root.find(".//xmpTPg:MaxPageSize", XMP_NAMESPACES)
+            if sizeElem is not None:
+                size = {}
+                for key in ["w", "h", "unit"]:
+                    value = sizeElem.attrib.get("{%s}%s" % (XMP_NAMESPACES["stDim"], key))
+                    if value is None:
+                        elem = sizeElem.find(".//stDim:%s" % key, XMP_NAMESPACES)
+                        value = elem.text if elem is not None else None
+
+                    if value is not None:
+                        size[key] = value
+
+                sizes = [size] if size else []
+
+        if sizes:
+            info["maxPageSize"] = sizes[0]
+
+        info["artboards"] = self.getArtboards()
+        if info["pageCount"] is None:
+            info["pageCount"] = len(info["artboards"])
+
+        return info
+
+
+def getAiFileInfo(path):
+    with AiFile(path) as aiFile:
+        return aiFile.getInfo()
+
+
+def getAiFileThumbnail(path):
+    with AiFile(path) as aiFile:
+        return aiFile.getThumbnail()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Automatic export of designated scenes when a new version is saved.
+
+The rules are read from a JSON file:
+
+    {
+        "rules": [
+            {
+                "scenes": ["*/Assets/Characters/*/Scenefiles/2d/design/*"],
+                "targets": [{"identifier": "design", "extension": ".png"}],
+                "delay": 10
+            }
+        ]
+    }
+
+Saves of the same scene within the delay are coalesced into one export of the
+latest version. Versions whose artwork didn't change since the last export of
+the scene are skipped, unless that export failed.
+
+The exports are debounced in the job queue instead of with timers, because
+versions saved from Illustrator are saved by a short-lived menu tool process.
+"""
+
+
+import os
+import json
+import fnmatch
+import logging
+
+from Prism_Illustrator_AiFile import AiFile
+
+
+logger = logging.getLogger(__name__)
+
+
+def normScenePath(path):
+    return os.path.normcase(os.path.normpath(path)).replace("\\", "/")
+
+
+def getSceneFingerprint(path):
+    if os.path.splitext(path)[1].lower() == ".ai":
+        try:
+            with AiFile(path) as aiFile:
+                return aiFile.getContentFingerprint()
+        except (OSError, ValueError) as e:
+            logger.debug("failed to fingerprint %s: %s" % (path, e))
+
+    stat = os.stat(path)
+    return "%s_%s" % (stat.st_size, stat.st_mtime)
+
+
+class AutoExporter(object):
+    """
+    Calls submit(scenePath, target, delay, coalesceKey, fingerprint) for each
+    target of saved scenes which match a rule and whose content changed. The
+    submitted exports are expected to wait for delay seconds and to replace
+    the waiting exports with the same coalesceKey. getFingerprint(coalesceKey)
+    returns the fingerprint of the last export which succeeded or is still
+    waiting, so exports which failed are submitted again on the next save.
+    """
+
+    def __init__(self, configPath, submit, getFingerprint, delay=5.0):
+        self.configPath = configPath
+        self.submit = submit
+        self.getFingerprint = getFingerprint
+        self.delay = delay
+        self.rules = []
+        self.configMtime = None
+
+    def loadRules(self):
+        if not self.configPath or not os.path.exists(self.configPath):
+            self.rules = []
+            return self.rules
+
+        mtime = os.path.getmtime(self.configPath)
+        if mtime == self.configMtime:
+            return self.rules
+
+        try:
+            with open(self.configPath, "r") as f:
+                self.rules = json.load(f).get("rules", [])
+        except Exception as e:
+            logger.warning("failed to read the auto export config %s: %s" % (self.configPath, e))
+            self.rules = []
+
+        self.configMtime = mtime
+        return self.rules
+
+    def getRule(self, scenePath):
+        path = normScenePath(scenePath)
+        for rule in self.loadRules():
+            for pattern in rule.get("scenes", []):
+                if fnmatch.fnmatch(path, normScenePath(pattern)) or fnmatch.fnmatch(os.path.basename(path), pattern):
+                    return rule
+
+    def sceneSaved(self, scenePath):
+        """
+        Submits the exports of a saved scene. Versions of a scene are saved
+        into the same folder, so saves are coalesced per folder and target.
+        Returns True if an export was submitted.
+        """
+        rule = self.getRule(scenePath)
+        if not rule or not rule.get("targets"):
+            return False
+
+        key = normScenePath(os.path.dirname(scenePath))
+        try:
+            fingerprint = getSceneFingerprint(scenePath)
+        except OSError as e:
+            logger.warning("auto export of %s failed: %s" % (scenePath, e))
+            return False
+
+        submitted = False
+        for target in rule["targets"]:
+            coalesceKey = "%s|%s" % (key, json.dumps(target, sort_keys=True))
+            try:
+                if self.getFingerprint(coalesceKey) == fingerprint:
+                    logger.debug("skipping auto export of %s, the artwork didn't change" % scenePath)
+                    continue
+
+                self.submit(scenePath, target, rule.get("delay", self.delay), coalesceKey, fingerprint)
+            except Exception as e:
+                logger.warning("auto export of %s failed: %s" % (scenePath, e))
+                continue
+
+            submitted = True
+
+        return submitted
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Non-interactive export of many scenes through one Illustrator connection.
+
+A manifest is a JSON file like:
+
+    {
+        "scenes": ["P:/project/03_Production/Assets/**/*.ai"],
+        "targets": [
+            {"identifier": "design", "extension": ".png", "scales": "1x 2x"},
+            {"identifier": "review", "extension": ".pdf", "pdfProfile": "Review"}
+        ]
+    }
+
+Scenes can be paths or glob patterns. The results are written to a JSON log
+after each scene. When the batch runs again with the same log, scenes which
+were exported successfully and didn't change since then are skipped.
+"""
+
+
+import os
+import glob
+import json
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def parseTarget(text):
+    """
+    Returns a target dict of a string "<identifier>:<extension>[:product]",
+    for example "design:.png" or "review:.pdf:product".
+    """
+    parts = text.split(":")
+    if len(parts) < 2 or not parts[0]:
+        raise ValueError("Invalid target \"%s\", use <identifier>:<extension>[:product]" % text)
+
+    extension = parts[1] if parts[1].startswith(".") else "." + parts[1]
+    target = {"identifier": parts[0], "extension": extension.lower()}
+    if "product" in parts[2:]:
+        target["product"] = True
+
+    return target
+
+
+def findScenes(patterns, sceneFormats=None):
+    sceneFormats = sceneFormats or [".ai"]
+    scenes = []
+    for pattern in patterns:
+        if os.path.isfile(pattern):
+            paths = [pattern]
+        else:
+            paths = sorted(glob.glob(pattern, recursive=True))
+
+        for path in paths:
+            path = os.path.normpath(os.path.abspath(path))
+            if os.path.splitext(path)[1].lower() in sceneFormats and path not in scenes:
+                scenes.append(path)
+
+    return scenes
+
+
+def loadManifest(path):
+    with open(path, "r") as f:
+        manifest = json.load(f)
+
+    baseDir = os.path.dirname(os.path.abspath(path))
+    patterns = [
+        p if os.path.isabs(p) else os.path.join(baseDir, p)
+        for p in manifest.get("scenes", [])
+    ]
+    return patterns, manifest.get("targets", [])
+
+
+class BatchExport(object):
+    def __init__(self, plugin, logPath):
+        self.plugin = plugin
+        self.logPath = logPath
+        self.log = {"scenes": {}}
+        if os.path.exists(logPath):
+            try:
+                with open(logPath, "r") as f:
+                    self.log = json.load(f)
+            except Exception as e:
+                logger.warning("failed to read the batch log %s: %s" % (logPath, e))
+
+    def saveLog(self):
+        folder = os.path.dirname(self.logPath)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        tmpPath = self.logPath + ".tmp"
+        with open(tmpPath, "w") as f:
+            json.dump(self.log, f, indent=4)
+
+        os.replace(tmpPath, self.logPath)
+
+    def isDone(self, scene, targets):
+        entry = self.log["scenes"].get(scene)
+        if not entry or entry.get("status") != "done":
+            return False
+
+        return entry.get("mtime") == os.path.getmtime(scene) and entry.get("targets") == targets
+
+    def run(self, scenes, targets, restart=False):
+        """
+        Exports all targets of all scenes and returns the log. Scenes are
+        processed one after another in the same Illustrator session.
+        """
+        if restart:
+            self.log["scenes"] = {}
+
+        self.log["started"] = time.time()
+        self.log["targets"] = targets
+        for idx, scene in enumerate(scenes):
+            if self.isDone(scene, targets):
+                logger.info("[%s/%s] skipping %s, already exported" % (idx + 1, len(scenes), scene))
+                continue
+
+            logger.info("[%s/%s] exporting %s" % (idx + 1, len(scenes), scene))
+            self.log["scenes"][scene] = {"status": "running", "targets": targets}
+            self.saveLog()
+            self.log["scenes"][scene] = self.exportScene(scene, targets)
+            self.saveLog()
+
+        entries = [self.log["scenes"].get(scene, {}) for scene in scenes]
+        self.log["summary"] = {
+            "scenes": len(scenes),
+            "done": len([e for e in entries if e.get("status") == "done"]),
+            "failed": len([e for e in entries if e.get("status") == "failed"]),
+        }
+        self.log["finished"] = time.time()
+        self.saveLog()
+        return self.log
+
+    def exportScene(self, scene, targets):
+        startTime = time.time()
+        entry = {"status": "failed", "targets": targets, "mtime": os.path.getmtime(scene), "outputs": []}
+        opened = None
+        try:
+            # scenes the artist has open are exported from a copy in a separate document
+            opened, error = self.plugin.openSceneForExport(scene)
+            if error:
+                entry["error"] = error
+                return entry
+
+            for target in targets:
+                result = self.plugin.exportTarget(target, scenePath=scene)
+                entry["outputs"].append(result or {"target": target, "error": "Export failed"})
+        except Exception as e:
+            entry["error"] = str(e)
+        finally:
+            if opened:
+                try:
+                    self.plugin.closeSceneForExport(opened)
+                except Exception as e:
+                    logger.debug("failed to close %s: %s" % (scene, e))
+
+        if "error" not in entry and not [o for o in entry["outputs"] if "error" in o]:
+            entry["status"] = "done"
+
+        entry["duration"] = time.time() - startTime
+        return entry
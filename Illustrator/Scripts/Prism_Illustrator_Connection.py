@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Connection handling for the Illustrator COM server.
+"""
+
+
+import os
+import time
+import queue
+import logging
+import threading
+
+from Prism_Illustrator_HostScript import buildScript, parseScriptResult, FIND_DOCUMENT_SCRIPT
+from Prism_Illustrator_HostDispatcher import HostBusyError, HostTimeoutError
+
+
+logger = logging.getLogger(__name__)
+
+
+def probeDispatchName(name, running=True):
+    """
+    Connects to a ProgID in the calling thread and checks that the
+    application responds. Raises an exception if it doesn't. With
+    running=True it only connects to an instance which is already running,
+    because Dispatch launches the COM server of the ProgID.
+    """
+    import pythoncom
+    import win32com.client
+
+    pythoncom.CoInitialize()
+    app = None
+    try:
+        if running:
+            app = win32com.client.GetActiveObject(name)
+        else:
+            app = win32com.client.Dispatch(name)
+
+        try:
+            app.Application.ActiveDocument
+        except AttributeError:
+            # the COM server exists, but it isn't a working Illustrator
+            raise
+        except Exception:
+            # no open document
+            pass
+
+        return app.Version
+    finally:
+        app = None
+        pythoncom.CoUninitialize()
+
+
+def launchDispatchName(name):
+    return probeDispatchName(name, running=False)
+
+
+def sortDispatchNames(names):
+    """
+    Returns the ProgIDs from the newest to the oldest version. The version
+    independent ProgID comes last, because it can belong to any version.
+    """
+    def getVersion(name):
+        try:
+            return float(name.replace("Illustrator.Application.", ""))
+        except ValueError:
+            return -1.0
+
+    return sorted(names, key=getVersion, reverse=True)
+
+
+def probeConnections(names, timeout=10.0, probe=probeDispatchName):
+    """
+    Probes all ProgIDs concurrently and returns (name, duration) of the
+    first ProgID in names which responds within timeout or (None, duration).
+    The default probe only connects to running instances. Each probe runs in
+    its own daemon thread, so a hung Illustrator doesn't block the caller
+    beyond the timeout.
+    """
+    startTime = time.time()
+    if not names:
+        return None, 0
+
+    results = queue.Queue()
+
+    def run(name):
+        probeStart = time.time()
+        try:
+            version = probe(name)
+        except Exception as e:
+            results.put((name, False, time.time() - probeStart, str(e)))
+        else:
+            results.put((name, True, time.time() - probeStart, version))
+
+    for name in names:
+        thread = threading.Thread(target=run, args=(name,), name="IllustratorProbe_%s" % name)
+        thread.daemon = True
+        thread.start()
+
+    # the result is deterministic: a ProgID only wins once all ProgIDs before it failed
+    healthy = {}
+    failed = set()
+    while True:
+        for name in names:
+            if name in healthy:
+                return name, time.time() - startTime
+
+            if name not in failed:
+                break
+        else:
+            return None, time.time() - startTime
+
+        remaining = timeout - (time.time() - startTime)
+        if remaining <= 0:
+            break
+
+        try:
+            name, isHealthy, duration, info = results.get(timeout=remaining)
+        except queue.Empty:
+            break
+
+        if isHealthy:
+            logger.debug("%s responded in %.2fs (version %s)" % (name, duration, info))
+            healthy[name] = info
+        else:
+            logger.debug("%s failed after %.2fs: %s" % (name, duration, info))
+            failed.add(name)
+
+    pending = len(names) - len(healthy) - len(failed)
+    if pending:
+        logger.warning("%s Illustrator connections didn't respond within %ss" % (pending, timeout))
+
+    # prefer a responding instance over waiting for a hung newer one
+    for name in names:
+        if name in healthy:
+            return name, time.time() - startTime
+
+    return None, time.time() - startTime
+
+
+# HRESULTs of calls on proxies whose COM server went away or restarted
+STALE_HRESULTS = [
+    -2147417848,  # RPC_E_DISCONNECTED, the object invoked has disconnected from its clients
+    -2147023174,  # RPC_S_SERVER_UNAVAILABLE
+    -2147023170,  # RPC_S_CALL_FAILED
+    -2147220995,  # CO_E_OBJNOTCONNECTED
+    -2147417851,  # RPC_E_SERVERFAULT
+]
+
+
+def isStaleError(error):
+    hresult = getattr(error, "hresult", None)
+    if hresult is None and getattr(error, "args", None) and isinstance(error.args[0], int):
+        hresult = error.args[0]
+
+    return hresult in STALE_HRESULTS
+
+
+class ConnectionManager(object):
+    """
+    Caches the Application proxy and the proxies of opened documents.
+    The connection is checked with a cheap heartbeat at most every
+    heartbeatInterval seconds and is created again with connect() when it
+    went stale. Documents are bound again by their path.
+    """
+
+    def __init__(self, connect, heartbeatInterval=5.0, retries=1, useHostScripts=True):
+        self.connect = connect
+        self.heartbeatInterval = heartbeatInterval
+        self.retries = retries
+        self.useHostScripts = useHostScripts
+        self.app = None
+        self.documents = {}
+        self.lastHeartbeat = 0
+        self.reconnects = 0
+
+    def normPath(self, path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def start(self):
+        self.app = self.connect()
+        self.lastHeartbeat = time.time()
+        return self.app
+
+    def reconnect(self):
+        startTime = time.time()
+        self.app = None
+        self.documents = {}
+        self.start()
+        self.reconnects += 1
+        logger.info("reconnected to Illustrator in %.2fs" % (time.time() - startTime))
+        return self.app
+
+    def heartbeat(self):
+        try:
+            self.app.Version
+        except Exception as e:
+            if not isStaleError(e):
+                raise
+
+            return False
+
+        self.lastHeartbeat = time.time()
+        return True
+
+    def getApp(self):
+        if self.app is None:
+            return self.reconnect()
+
+        if time.time() - self.lastHeartbeat > self.heartbeatInterval and not self.heartbeat():
+            logger.debug("the Illustrator connection went stale")
+            return self.reconnect()
+
+        return self.app
+
+    def run(self, func):
+        """
+        Calls func(app) and retries it with a new connection if the proxies
+        went stale.
+        """
+        for attempt in range(self.retries + 1):
+            app = self.getApp()
+            try:
+                return func(app)
+            except Exception as e:
+                if not isStaleError(e) or attempt == self.retries:
+                    raise
+
+                logger.debug("retrying stale host call: %s" % e)
+                self.reconnect()
+
+    def cacheDocument(self, path, doc):
+        if path and doc is not None:
+            self.documents[self.normPath(path)] = doc
+
+    def forgetDocument(self, path):
+        self.documents.pop(self.normPath(path), None)
+
+    def getCachedDocument(self, path):
+        """
+        Returns the cached proxy of an open document if it is still valid.
+        """
+        doc = self.documents.get(self.normPath(path))
+        if doc is None:
+            return
+
+        try:
+            doc.Activate()
+        except (HostBusyError, HostTimeoutError):
+            raise
+        except Exception as e:
+            # the document was closed in Illustrator or the proxy went stale
+            logger.debug("dropping the cached document %s: %s" % (path, e))
+            self.forgetDocument(path)
+            return
+
+        return doc
+
+    def getDocument(self, path):
+        """
+        Returns the proxy of the document at path. If it isn't cached, it is
+        bound with a single Open call, which activates the document if it's
+        already open and opens it otherwise.
+        """
+        doc = self.getCachedDocument(path)
+        if doc is None:
+            doc = self.run(lambda app: app.Open(path))
+            self.cacheDocument(path, doc)
+
+        return doc
+
+    def findDocument(self, paths):
+        """
+        Activates and returns the open document of one of the normalized
+        paths. Cached proxies are checked before listing the open documents.
+        """
+        for path in paths:
+            doc = self.getCachedDocument(path)
+            if doc is not None:
+                return doc
+
+        def findWithScript(app):
+            # compares the paths inside Illustrator, so only the matching
+            # document is transferred
+            args = {"paths": [path.replace("\\", "/").lower() for path in paths], "activate": True}
+            script = buildScript(FIND_DOCUMENT_SCRIPT, args, name="findDocument")
+            if parseScriptResult(app.DoJavaScript(script), name="findDocument"):
+                return app.ActiveDocument
+
+        def find(app):
+            docs = app.Documents
+            for idx in range(docs.Count):
+                doc = docs.Item(idx + 1)
+                if self.normPath(doc.FullName) in paths:
+                    doc.Activate()
+                    return doc
+
+        doc = self.run(findWithScript if self.useHostScripts else find)
+        if doc is not None:
+            self.cacheDocument(doc.FullName, doc)
+
+        return doc
+
+    def hasDocument(self, paths):
+        """
+        Returns True if one of the normalized paths is open. Unlike
+        findDocument, the active document of the artist isn't changed.
+        """
+
+        def hasWithScript(app):
+            args = {"paths": [path.replace("\\", "/").lower() for path in paths], "activate": False}
+            script = buildScript(FIND_DOCUMENT_SCRIPT, args, name="findDocument")
+            return bool(parseScriptResult(app.DoJavaScript(script), name="findDocument"))
+
+        def has(app):
+            docs = app.Documents
+            for idx in range(docs.Count):
+                if self.normPath(docs.Item(idx + 1).FullName) in paths:
+                    return True
+
+            return False
+
+        return self.run(hasWithScript if self.useHostScripts else has)
+
+
+class ConnectionPool(object):
+    """
+    Connections to Illustrator instances running side by side, keyed by
+    their major version. ProgIDs of the same instance, like
+    "Illustrator.Application" and "Illustrator.Application.28", share one
+    connection. Host calls go to the current instance, which is switched to
+    the instance owning a document when the document is activated.
+    """
+
+    def __init__(self, createConnection):
+        self.createConnection = createConnection
+        self.connections = {}
+        self.progIds = {}
+        self.current = None
+
+    def add(self, progId, manager=None):
+        manager = manager or self.createConnection(progId)
+        version = str(manager.run(lambda app: app.Version)).split(".")[0]
+        if version not in self.connections:
+            self.connections[version] = manager
+            self.progIds[version] = progId
+            logger.debug("added Illustrator %s (%s) to the connection pool" % (version, progId))
+
+        if self.current is None:
+            self.current = version
+
+        return version
+
+    def discover(self, progIds):
+        """
+        Adds the running instances of progIds. createConnection is expected
+        to raise for ProgIDs without a running instance.
+        """
+        for progId in progIds:
+            if progId in self.progIds.values():
+                continue
+
+            try:
+                self.add(progId)
+            except Exception as e:
+                logger.debug("%s isn't running: %s" % (progId, e))
+
+        return self.getVersions()
+
+    def getVersions(self):
+        """
+        Returns the versions with the current one first.
+        """
+        return sorted(self.connections, key=lambda version: version != self.current)
+
+    def getProgId(self, version=None):
+        return self.progIds.get(version or self.current)
+
+    def selectVersion(self, creatorVersion=None):
+        """
+        Returns the oldest running version which can open files saved with
+        creatorVersion without converting them, or the newest version.
+        """
+        versions = sorted(self.connections, key=lambda version: int(version))
+        if creatorVersion:
+            for version in versions:
+                if int(version) >= int(creatorVersion):
+                    return version
+
+        return versions[-1] if versions else None
+
+    def getCurrent(self):
+        return self.connections[self.current]
+
+    def setCurrent(self, version):
+        if version != self.current:
+            logger.debug("switching to Illustrator %s" % version)
+
+        self.current = version
+
+    def run(self, func):
+        return self.getCurrent().run(func)
+
+    def findDocument(self, paths):
+        """
+        Returns the version of the instance which has one of the normalized
+        paths open, the document is activated in it.
+        """
+        for version in self.getVersions():
+            try:
+                doc = self.connections[version].findDocument(paths)
+            except Exception as e:
+                logger.debug("failed to check the documents of Illustrator %s: %s" % (version, e))
+                continue
+
+            if doc is not None:
+                return version
+
+    def findDocumentVersion(self, paths):
+        """
+        Returns the version of the instance which has one of the normalized
+        paths open, without activating the document or switching the
+        current instance.
+        """
+        for version in self.getVersions():
+            try:
+                if self.connections[version].hasDocument(paths):
+                    return version
+            except Exception as e:
+                logger.debug("failed to check the documents of Illustrator %s: %s" % (version, e))
+
+
+class ManagedApplication(object):
+    """
+    Stand-in for the Application proxy, which resolves the application
+    through a connection manager or pool, so stale proxies are replaced
+    transparently.
+    """
+
+    def __init__(self, manager):
+        object.__setattr__(self, "_manager", manager)
+
+    def __getattr__(self, name):
+        manager = self._manager
+        value = manager.run(lambda app: getattr(app, name))
+        if callable(value) and not hasattr(value, "_hostObject") and not hasattr(value, "_oleobj_"):
+            return ManagedMethod(manager, name)
+
+        return value
+
+    def __setattr__(self, name, value):
+        self._manager.run(lambda app: setattr(app, name, value))
+
+    def __bool__(self):
+        return True
+
+
+class ManagedMethod(object):
+    def __init__(self, manager, name):
+        self.manager = manager
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        return self.manager.run(lambda app: getattr(app, self.name)(*args, **kwargs))
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+import platform
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from Prism_Illustrator_AiFile import AiFile
+
+
+logger = logging.getLogger(__name__)
+
+# formats which don't get smaller when they are deflated
+STORED_FORMATS = [".jpg", ".jpeg", ".png", ".gif", ".zip", ".psd", ".tif", ".tiff", ".pdf"]
+
+
+def getFontFolders():
+    if platform.system() == "Windows":
+        folders = [os.path.join(os.getenv("WINDIR", "C:\\Windows"), "Fonts")]
+        if os.getenv("LOCALAPPDATA"):
+            folders.append(os.path.join(os.getenv("LOCALAPPDATA"), "Microsoft", "Windows", "Fonts"))
+    elif platform.system() == "Darwin":
+        folders = [
+            "/Library/Fonts",
+            "/System/Library/Fonts",
+            os.path.expanduser("~/Library/Fonts"),
+        ]
+    else:
+        folders = ["/usr/share/fonts", os.path.expanduser("~/.fonts")]
+
+    return [f for f in folders if os.path.exists(f)]
+
+
+def findFontFile(font, fontFiles):
+    """
+    Returns the path of the font file of a font entry of AiFile.getFonts.
+    fontFiles is a dict of {lowercase filename without extension: path}.
+    """
+    candidates = []
+    if font.get("fontFileName"):
+        candidates.append(os.path.splitext(font["fontFileName"])[0])
+
+    if font.get("fontName"):
+        candidates.append(font["fontName"])
+        candidates.append(font["fontName"].replace(" ", ""))
+
+    for candidate in candidates:
+        path = fontFiles.get(candidate.lower())
+        if path:
+            return path
+
+
+def getFontFiles():
+    fontFiles = {}
+    for folder in getFontFolders():
+        for root, folders, files in os.walk(folder):
+            for filename in files:
+                name, ext = os.path.splitext(filename)
+                if ext.lower() in [".ttf", ".otf", ".ttc", ".pfb", ".pfm", ".dfont"]:
+                    fontFiles.setdefault(name.lower(), os.path.join(root, filename))
+
+    return fontFiles
+
+
+def getFileHash(path, chunkSize=1024 * 1024):
+    fileHash = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunkSize)
+            if not chunk:
+                break
+
+            fileHash.update(chunk)
+
+    return fileHash.hexdigest()
+
+
+def resolveDependencies(scenePath, includeFonts=True):
+    """
+    Returns the files a scene depends on as a list of (kind, source path).
+    """
+    deps = [("scene", scenePath)]
+    with AiFile(scenePath) as aiFile:
+        links = aiFile.getLinkedFiles()
+        fonts = aiFile.getFonts() if includeFonts else []
+
+    deps += [("link", link) for link in links]
+    if fonts:
+        fontFiles = getFontFiles()
+        for font in fonts:
+            fontPath = findFontFile(font, fontFiles)
+            deps.append(("font", fontPath or font.get("fontName", "")))
+
+    return deps
+
+
+def isUnchanged(source, target):
+    try:
+        sourceStat = os.stat(source)
+        targetStat = os.stat(target)
+    except OSError:
+        return False
+
+    return sourceStat.st_size == targetStat.st_size and int(sourceStat.st_mtime) == int(targetStat.st_mtime)
+
+
+def collectForDelivery(scenePath, outputFolder, includeFonts=True, zipPath=None, threads=8):
+    """
+    Copies a scene with its linked files and fonts into outputFolder and
+    optionally packs the folder into zipPath. Files with identical content are
+    only copied once and files which are unchanged since the last run are
+    skipped. Returns a report dict, which is also written to delivery.json
+    in outputFolder. Fonts without a font file on disk are listed as warnings
+    and don't fail the delivery.
+    """
+    startTime = time.time()
+    folders = {"scene": "", "link": "Links", "font": "Fonts"}
+    report = {
+        "scene": scenePath,
+        "outputFolder": outputFolder,
+        "files": [],
+        "missing": [],
+        "warnings": [],
+        "copied": 0,
+        "skipped": 0,
+        "deduplicated": 0,
+        "bytesCopied": 0,
+    }
+
+    if not os.path.exists(outputFolder):
+        os.makedirs(outputFolder)
+
+    deps = resolveDependencies(scenePath, includeFonts=includeFonts)
+    existing = []
+    for kind, path in deps:
+        if path and os.path.isfile(path):
+            existing.append((kind, path))
+        elif kind == "font":
+            # fonts like activated Adobe Fonts have no file which could be copied
+            report["warnings"].append({"kind": kind, "source": path, "reason": "font file not found"})
+        else:
+            report["missing"].append({"kind": kind, "source": path})
+
+    # only files with the same size can be identical, so only those are hashed
+    bySize = {}
+    for kind, path in existing:
+        bySize.setdefault(os.path.getsize(path), []).append((kind, path))
+
+    unique = []
+    aliases = {}
+    for size, items in bySize.items():
+        if len(items) == 1:
+            unique.append(items[0])
+            continue
+
+        hashes = {}
+        for kind, path in items:
+            fileHash = getFileHash(path)
+            if fileHash in hashes:
+                aliases[path] = hashes[fileHash]
+            else:
+                hashes[fileHash] = path
+                unique.append((kind, path))
+
+    jobs = []
+    usedNames = set()
+    targets = {}
+    for kind, path in unique:
+        name = os.path.basename(path)
+        relPath = os.path.join(folders[kind], name)
+        idx = 1
+        while relPath.lower() in usedNames:
+            base, ext = os.path.splitext(name)
+            relPath = os.path.join(folders[kind], "%s_%s%s" % (base, idx, ext))
+            idx += 1
+
+        usedNames.add(relPath.lower())
+        targets[path] = relPath
+        jobs.append((kind, path, os.path.join(outputFolder, relPath)))
+
+    def copyFile(job):
+        kind, source, target = job
+        if isUnchanged(source, target):
+            return "skipped", 0
+
+        if not os.path.exists(os.path.dirname(target)):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        shutil.copy2(source, target)
+        return "copied", os.path.getsize(target)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for job, result in zip(jobs, executor.map(copyFile, jobs)):
+            action, size = result
+            report[action] += 1
+            report["bytesCopied"] += size
+            report["files"].append({
+                "kind": job[0],
+                "source": job[1],
+                "target": targets[job[1]],
+                "action": action,
+            })
+
+    for path, original in aliases.items():
+        report["deduplicated"] += 1
+        report["files"].append({
+            "kind": [kind for kind, p in existing if p == path][0],
+            "source": path,
+            "target": targets[original],
+            "action": "deduplicated",
+        })
+
+    report["copyDuration"] = time.time() - startTime
+    if zipPath:
+        zipStart = time.time()
+        writeZip(outputFolder, [x["target"] for x in report["files"] if x["action"] != "deduplicated"], zipPath)
+        report["zip"] = zipPath
+        report["zipDuration"] = time.time() - zipStart
+
+    report["duration"] = time.time() - startTime
+    report["throughput"] = report["bytesCopied"] / max(report["copyDuration"], 0.000001)
+    report["result"] = not report["missing"]
+
+    with open(os.path.join(outputFolder, "delivery.json"), "w") as f:
+        json.dump(report, f, indent=4)
+
+    logger.debug(
+        "delivery of %s: %s copied, %s skipped, %.1f MB/s"
+        % (scenePath, report["copied"], report["skipped"], report["throughput"] / 1024 ** 2)
+    )
+    return report
+
+
+def writeZip(folder, relPaths, zipPath):
+    """
+    Streams the files into zipPath. Each file is read in chunks, so the
+    memory usage doesn't depend on the file sizes.
+    """
+    tmpPath = zipPath + ".tmp"
+    with zipfile.ZipFile(tmpPath, "w", allowZip64=True) as zf:
+        for relPath in relPaths:
+            ext = os.path.splitext(relPath)[1].lower()
+            compression = zipfile.ZIP_STORED if ext in STORED_FORMATS else zipfile.ZIP_DEFLATED
+            zf.write(os.path.join(folder, relPath), relPath.replace("\\", "/"), compress_type=compression)
+
+    os.replace(tmpPath, zipPath)
+    return zipPath
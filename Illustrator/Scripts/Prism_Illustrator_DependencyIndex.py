@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import sys
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from Prism_Illustrator_AiFile import AiFile
+
+
+logger = logging.getLogger(__name__)
+
+
+def normLinkPath(path):
+    return os.path.normcase(os.path.normpath(path.replace("\\", "/")))
+
+
+def readSceneLinks(path):
+    try:
+        with AiFile(path) as aiFile:
+            return aiFile.getLinkedFiles()
+    except (OSError, ValueError) as e:
+        logger.debug("Failed to read links of %s: %s" % (path, e))
+        return []
+
+
+class DependencyIndex(object):
+    """
+    Index of the files which are linked into the scenefiles of a project.
+    Scenes are only read again if their size or mtime changed. The reverse
+    index maps each linked file to the scenes which use it.
+    """
+
+    def __init__(self, indexPath, sceneFormats=None):
+        self.indexPath = indexPath
+        self.sceneFormats = sceneFormats or [".ai"]
+        self.scenes = {}
+        self.users = {}
+        self.userNames = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.indexPath):
+            try:
+                with open(self.indexPath, "r") as f:
+                    self.scenes = json.load(f).get("scenes", {})
+            except Exception as e:
+                logger.warning("Failed to read the dependency index: %s" % e)
+                self.scenes = {}
+
+        self.buildReverseIndex()
+
+    def save(self):
+        folder = os.path.dirname(self.indexPath)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        tmpPath = self.indexPath + ".%s.tmp" % os.getpid()
+        with open(tmpPath, "w") as f:
+            json.dump({"updated": time.time(), "scenes": self.scenes}, f)
+
+        os.replace(tmpPath, self.indexPath)
+
+    def buildReverseIndex(self):
+        self.users = {}
+        self.userNames = {}
+        for scene, data in self.scenes.items():
+            for link in data["links"]:
+                self.users.setdefault(normLinkPath(link), set()).add(scene)
+                self.userNames.setdefault(os.path.basename(normLinkPath(link)), set()).add(scene)
+
+    def findScenes(self, root):
+        scenes = []
+        for folder, folders, files in os.walk(root):
+            for filename in files:
+                if os.path.splitext(filename)[1] in self.sceneFormats:
+                    scenes.append(os.path.join(folder, filename))
+
+        return scenes
+
+    def update(self, root=None, paths=None, threads=8):
+        """
+        Updates the index for all scenes below root or for the given paths.
+        Returns the number of scenes which were read. The index is only
+        written if something changed.
+        """
+        dirty = not os.path.exists(self.indexPath)
+        if paths is None:
+            paths = self.findScenes(root)
+            existing = set(paths)
+            removed = [p for p in self.scenes if p.startswith(root) and p not in existing]
+            for path in removed:
+                del self.scenes[path]
+
+            dirty = bool(removed)
+
+        changed = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                if self.scenes.pop(path, None) is not None:
+                    dirty = True
+
+                continue
+
+            data = self.scenes.get(path)
+            if data and data["mtime"] == stat.st_mtime and data["size"] == stat.st_size:
+                continue
+
+            changed.append((path, stat))
+
+        if not changed and not dirty:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = executor.map(lambda x: readSceneLinks(x[0]), changed)
+            for (path, stat), links in zip(changed, results):
+                self.scenes[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "links": links}
+
+        self.buildReverseIndex()
+        self.save()
+        return len(changed)
+
+    def getScenesUsingFile(self, path, matchName=False):
+        """
+        Returns the scenes which link path. With matchName, scenes which link
+        a file with the same name in another location are included, which
+        helps when the files were linked through another drive mapping.
+        """
+        scenes = set(self.users.get(normLinkPath(path), set()))
+        if matchName:
+            scenes |= self.userNames.get(os.path.basename(normLinkPath(path)), set())
+
+        return sorted(scenes)
+
+    def getSceneDependencies(self, scenePath):
+        data = self.scenes.get(scenePath)
+        if data is None:
+            return readSceneLinks(scenePath)
+
+        return data["links"]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[2] not in ["update", "users", "links"]:
+        print("usage: %s <index.json> update <folder> | users <file> | links <scene>" % sys.argv[0])
+        sys.exit(1)
+
+    index = DependencyIndex(sys.argv[1])
+    if sys.argv[2] == "update":
+        start = time.time()
+        count = index.update(root=sys.argv[3])
+        print("read %s of %s scenes in %.2fs" % (count, len(index.scenes), time.time() - start))
+    elif sys.argv[2] == "users":
+        print("\n".join(index.getScenesUsingFile(sys.argv[3], matchName=True)))
+    else:
+        print("\n".join(index.getSceneDependencies(sys.argv[3])))
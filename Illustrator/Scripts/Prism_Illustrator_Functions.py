@@ -34,6 +34,7 @@
 
 import os
 import sys
+import time
 import platform
 import subprocess
 import logging
@@ -51,6 +52,24 @@ if platform.system() == "Windows":
 
 from PrismUtils.Decorators import err_catcher as err_catcher
 
+from Prism_Illustrator_SceneCache import SceneCache, ModifiedCacheError
+from Prism_Illustrator_AiFile import AiFile
+from Prism_Illustrator_Delivery import collectForDelivery
+from Prism_Illustrator_ImageVariants import parseVariants, createVariants, LOSSLESS_FORMATS, MAX_HOST_SCALE
+from Prism_Illustrator_ImageVariants import parseScales, getScaleName, getScaledPath, SCALE_PRESETS
+from Prism_Illustrator_TiledExport import exportTiled
+from Prism_Illustrator_SvgOptimizer import optimizeSvg
+from Prism_Illustrator_JobQueue import JobQueue, startWorker
+from Prism_Illustrator_AutoExport import AutoExporter
+from Prism_Illustrator_Connection import probeConnections, launchDispatchName, sortDispatchNames, ConnectionManager, ConnectionPool, ManagedApplication
+from Prism_Illustrator_HostDispatcher import HostDispatcher, HostBusyError, HostTimeoutError, hostOperation
+from Prism_Illustrator_Placement import getSourceFiles, getPlacementArgs, PLACEMENT_SCRIPT
+from Prism_Illustrator_HostScript import buildScript, parseScriptResult, HostScriptError
+from Prism_Illustrator_HostScript import CURRENT_FILE_SCRIPT, EXPORT_SCRIPT, EXPORT_FORMATS
+from Prism_Illustrator_Inspection import INSPECTION_SCRIPT, writeSidecar
+from Prism_Illustrator_PdfProfiles import getPdfProfiles, getScriptOptions, PDF_SCRIPT, DEFAULT_PROFILE
+from Prism_Illustrator_Tracing import traced, span, addBytesWritten, countHostCall, wrapHostObject
+
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +79,15 @@ class Prism_Illustrator_Functions(object):
         self.core = core
         self.plugin = plugin
         self.win = platform.system() == "Windows"
+        self.sceneCache = None
+        self.cachedScenePath = None
+        self.autoExporter = None
+        self.exportWorkers = {}
+        self.exportCopies = {}
+        self.hostDispatcher = None
+        self.hostBusyNotified = None
+        self.connectionPool = None
+        self.useHostScripts = os.getenv("PRISM_ILLUSTRATOR_HOST_SCRIPTS", "1") != "0"
         self.core.registerCallback(
             "onSaveExtendedOpen", self.onSaveExtendedOpen, plugin=self.plugin
         )
@@ -69,7 +97,11 @@ class Prism_Illustrator_Functions(object):
         self.core.registerCallback(
             "onProjectBrowserStartup", self.onProjectBrowserStartup, plugin=self.plugin
         )
+        self.core.registerCallback(
+            "postSaveScene", self.onPostSaveScene, plugin=self.plugin
+        )
 
+    @traced()
     def startup(self, origin):
         """
         Initializes the connection to Adobe Illustrator and sets up the environment.
@@ -83,37 +115,51 @@ class Prism_Illustrator_Functions(object):
         )
         qApp.setWindowIcon(appIcon)
 
+        startTime = time.time()
+        timeout = float(os.getenv("PRISM_ILLUSTRATOR_CONNECT_TIMEOUT", "10"))
         if self.win:  # For Windows
-            excludes = []
-            while True:
-                dname = self.getIllustratorDispatchName(excludes=excludes)
-                self.ilApp = None
-                if dname:
-                    try:
-                        self.ilApp = win32com.client.Dispatch(dname)
-                    except:
-                        self.ilApp = None
-                        excludes.append(dname)
-                        continue
-                    else:
-                        try:
-                            self.ilApp.Application.ActiveDocument
-                        except AttributeError:
-                            self.ilApp = None
-                            excludes.append(dname)
-                            continue
-                        except:
-                            pass
-
-                if not self.ilApp:
-                    msg = "Could not connect to Illustrator."
-                    self.core.popup(msg)
-                    return
+            names = self.getIllustratorDispatchNames()
+            # connect to the newest running version and only launch Illustrator
+            # through the first registered ProgID if no version is running
+            dname, probeDuration = probeConnections(sortDispatchNames(names), timeout=timeout)
+            if not dname and names:
+                launchTimeout = float(os.getenv("PRISM_ILLUSTRATOR_LAUNCH_TIMEOUT", "120"))
+                dname, launchDuration = probeConnections(names[:1], timeout=launchTimeout, probe=launchDispatchName)
+                probeDuration += launchDuration
+
+            self.ilApp = None
+            if os.getenv("PRISM_ILLUSTRATOR_HOST_DISPATCHER", "1") != "0":
+                self.hostDispatcher = HostDispatcher()
+
+            if dname:
+                try:
+                    self.connectionPool = ConnectionPool(
+                        lambda progId: self.createConnection(progId, running=True)
+                    )
+                    self.connectionPool.add(dname, self.createConnection(dname))
+                    self.ilApp = ManagedApplication(self.connectionPool)
+                except Exception as e:
+                    logger.warning("Failed to connect to %s: %s" % (dname, e))
+
+            if self.ilApp and os.getenv("PRISM_ILLUSTRATOR_CONNECTION_POOL", "1") != "0":
+                versions = self.connectionPool.discover(names)
+                if len(versions) > 1:
+                    logger.info("Illustrator versions running: %s" % ", ".join(versions))
+
+            if not self.ilApp:
+                msg = "Could not connect to Illustrator."
+                self.core.popup(msg)
+                return
 
-                self.dispatchSuffix = dname.replace("Illustrator.Application", "")
-                logger.debug("Using %s" % dname)
-                break
+            self.dispatchSuffix = dname.replace("Illustrator.Application", "")
+            logger.info(
+                "Connected to %s in %.2fs (%s candidates probed in %.2fs)"
+                % (dname, time.time() - startTime, len(names), probeDuration)
+            )
         else:  # For macOS
+            # AppleScript calls run in subprocesses, the dispatcher only
+            # provides the timeouts, the busy state and the histograms
+            self.hostDispatcher = HostDispatcher(useThread=False)
             self.ilAppName = "Adobe Illustrator 2023"
             for foldercont in os.walk("/Applications"):
                 for folder in reversed(sorted(foldercont[1])):
@@ -130,77 +176,129 @@ class Prism_Illustrator_Functions(object):
                 """
                 % self.ilAppName
             )
-            self.executeAppleScript(scpt)
+            if self.executeAppleScript(scpt, timeout=timeout) is None:
+                logger.warning("%s didn't respond within %ss" % (self.ilAppName, timeout))
+                return
+
+            logger.info("Connected to %s in %.2fs" % (self.ilAppName, time.time() - startTime))
+
+        QTimer.singleShot(0, self.prewarmExportDialog)
+
+
+    def createConnection(self, dname, running=False):
+        """
+        Returns a started connection manager for a ProgID. With running=True
+        it only connects to an instance which is already running and raises
+        otherwise, instead of launching Illustrator.
+        """
+        connection = ConnectionManager(
+            lambda: self.connectApplication(dname, running=running),
+            heartbeatInterval=float(os.getenv("PRISM_ILLUSTRATOR_HEARTBEAT_INTERVAL", "5")),
+            useHostScripts=self.useHostScripts,
+        )
+        connection.start()
+        return connection
+
+    def connectApplication(self, dname, running=False):
+        """
+        Returns a new Application proxy. Used by the connection manager for
+        the first connection and to reconnect after the proxies went stale.
+        """
+        connect = win32com.client.GetActiveObject if running else win32com.client.Dispatch
+        if self.hostDispatcher:
+            with self.hostDispatcher.operation("startup"):
+                return self.hostDispatcher.wrap(self.hostDispatcher.call(connect, dname))
+
+        return wrapHostObject(connect(dname))
+
+    def getConnection(self):
+        """
+        Returns the connection manager of the current Illustrator instance.
+        """
+        return self.connectionPool.getCurrent()
+
+    @err_catcher(name=__name__)
+    def getRunningDispatchNames(self):
+        """
+        Returns one ProgID per running Illustrator instance.
+        """
+        if not self.connectionPool:
+            return []
 
+        self.connectionPool.discover(self.getIllustratorDispatchNames())
+        return [self.connectionPool.getProgId(version) for version in self.connectionPool.getVersions()]
 
     @err_catcher(name=__name__)
     def getIllustratorDispatchName(self, excludes=None):
         """
         Finds an appropriate Illustrator dispatch name for Windows.
         """
+        for name in self.getIllustratorDispatchNames():
+            if not excludes or name not in excludes:
+                return name
+
+    @err_catcher(name=__name__)
+    def getIllustratorDispatchNames(self):
+        """
+        Returns the registered Illustrator ProgIDs. The version independent
+        ProgID comes first, followed by the versions from new to old.
+        """
         envkey = os.getenv("PRISM_ILLUSTRATOR_KEY")
         if envkey:
-            return envkey
+            return [envkey]
 
-        name = "Illustrator.Application"
         classBase = "SOFTWARE\\Classes\\"
-
         try:
-            if excludes and name in excludes:
-                raise Exception()
-
-            _winreg.OpenKey(
-                _winreg.HKEY_LOCAL_MACHINE,
-                classBase + name,
-                0,
-                _winreg.KEY_READ | _winreg.KEY_WOW64_64KEY,
-            )
-        except:
             classKey = _winreg.OpenKey(
                 _winreg.HKEY_LOCAL_MACHINE,
                 classBase,
                 0,
                 _winreg.KEY_READ | _winreg.KEY_WOW64_64KEY,
             )
-            try:
-                i = 0
-                keyName = None
-                while True:
-                    classNameKey = _winreg.EnumKey(classKey, i)
-                    if sys.version[0] == "2":
-                        classNameKey = unicode(classNameKey)
+        except OSError:
+            return ["Illustrator.Application"]
 
-                    if excludes and classNameKey in excludes:
-                        i += 1
-                        continue
+        names = []
+        i = 0
+        while True:
+            try:
+                classNameKey = _winreg.EnumKey(classKey, i)
+            except OSError:
+                break
 
-                    if classNameKey.startswith("Illustrator.Application."):
-                        if keyName:
-                            try:
-                                if float(classNameKey.replace("Illustrator.Application.", "")) > float(keyName.replace("Illustrator.Application.", "")):
-                                    keyName = classNameKey
-                            except:
-                                pass
-                        else:
-                            keyName = classNameKey
-
-                    elif keyName:
-                        return keyName
-
-                    i += 1
-            except WindowsError:
-                pass
+            i += 1
+            if classNameKey.startswith("Illustrator.Application"):
+                names.append(classNameKey)
+            elif names:
+                # the keys are sorted, so there are no more Illustrator keys
+                break
 
-        else:
-            return name
+        def getVersion(name):
+            try:
+                return float(name.replace("Illustrator.Application.", ""))
+            except ValueError:
+                return float("inf")
 
+        return sorted(names, key=getVersion, reverse=True)
 
     @err_catcher(name=__name__)
     def sceneOpen(self, origin):
         pass
 
-    @err_catcher(name=__name__)
-    def executeAppleScript(self, script):
+    def executeAppleScript(self, script, timeout=None):
+        # no err_catcher, timeouts have to reach the hostOperation of the caller
+        countHostCall()
+        operation = None
+        startTime = time.time()
+        if self.hostDispatcher:
+            operation = self.hostDispatcher.getCurrentOperation()
+            if timeout is None:
+                timeout = self.hostDispatcher.getRemainingTime()
+                if timeout <= 0 and operation:
+                    raise HostTimeoutError(
+                        "%s didn't finish within %ss." % (operation, self.hostDispatcher.getTimeout())
+                    )
+
         try:
             p = subprocess.Popen(
                 ["osascript"],
@@ -209,26 +307,52 @@ class Prism_Illustrator_Functions(object):
                 stderr=subprocess.PIPE,
                 text=True  # Ensures proper string handling for Python 3
             )
-            stdout, stderr = p.communicate(script)
+            try:
+                stdout, stderr = p.communicate(script, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.communicate()
+                logger.warning("AppleScript didn't finish within %ss" % timeout)
+                if self.hostDispatcher:
+                    self.hostDispatcher.setBusy(operation or "AppleScript")
+                    if operation:
+                        raise HostTimeoutError(
+                            "Illustrator didn't respond within %ss (%s). It might be showing a dialog."
+                            % (timeout, operation)
+                        )
+
+                return None
+
+            if self.hostDispatcher:
+                self.hostDispatcher.clearBusy()
+                self.hostDispatcher.addLatency("%s/call" % (operation or "hostCall"), time.time() - startTime)
+
             if p.returncode != 0:
                 # Log the error message for debugging
                 self.core.popup(f"AppleScript execution failed:\n{stderr.strip()}")
                 return None
 
             return stdout.strip()  # Clean up the output
+        except (HostBusyError, HostTimeoutError):
+            raise
         except Exception as e:
             self.core.popup(f"An error occurred while executing AppleScript:\n{str(e)}")
             return None
     
     @err_catcher(name=__name__)
+    @traced()
+    @hostOperation(fallback="")
     def getCurrentFileName(self, origin, path=True):
         """
         Get the current file name of the active document in Illustrator.
         If `path` is False, only the file name is returned.
         """
         try:
-            if self.win:  # For Windows
-                doc = self.ilApp.Application.ActiveDocument  # Access Illustrator application
+            if self.win and self.useHostScripts:
+                # one host call instead of three property reads
+                currentFileName = self.runHostScript(CURRENT_FILE_SCRIPT, name="getCurrentFileName")
+            elif self.win:  # For Windows
+                doc = self.ilApp.ActiveDocument  # Access Illustrator application
                 currentFileName = doc.FullName if doc.FullName  else "" #If the FullName property exists, the file has been saved at least once
             else:  # For macOS
                 scpt = (
@@ -251,10 +375,18 @@ class Prism_Illustrator_Functions(object):
                 if currentFileName.endswith("\n"):
                     currentFileName = currentFileName[:-1]
 
+        except (HostBusyError, HostTimeoutError):
+            raise
         except Exception as e:
             currentFileName = ""
             print(f"Error getting current file name: {e}")
 
+        # documents opened from the local scene cache belong to their project path
+        if currentFileName and self.getSceneCache():
+            sourcePath = self.sceneCache.getSourcePath(currentFileName)
+            if sourcePath:
+                currentFileName = sourcePath
+
         if not path and currentFileName != "":
             currentFileName = os.path.basename(currentFileName)
 
@@ -307,15 +439,19 @@ class Prism_Illustrator_Functions(object):
             return None
 
     @err_catcher(name=__name__)
-    def saveScene(self, origin, filepath, details={}):
+    @traced()
+    @hostOperation(fallback=False)
+    def saveScene(self, origin, filepath, details={}, isVersion=True):
         """
         Saves the current Illustrator document to the specified filepath.
         If "fileFormat" is in `details`, appends the file extension to the filepath.
+        The inspection sidecar is only written for scene versions, not for
+        products which are saved with isVersion=False.
         """
         try:
             # Access the active document
             if self.win:  # Windows
-                doc = self.ilApp.Application.ActiveDocument
+                doc = self.ilApp.ActiveDocument
             else:  # macOS
                 scpt = (
                     """
@@ -330,6 +466,8 @@ class Prism_Illustrator_Functions(object):
                 if doc is None or doc == "":
                     raise Exception("No active document found")
 
+        except (HostBusyError, HostTimeoutError):
+            raise
         except Exception as e:
             self.core.popup("There is no active document in Illustrator.")
             print(f"Error: {e}")
@@ -354,12 +492,40 @@ class Prism_Illustrator_Functions(object):
                 if result is None:
                     raise Exception("Failed to save document")
 
+        except (HostBusyError, HostTimeoutError):
+            raise
         except Exception as e:
             self.core.popup(f"Failed to save the document: {e}")
             return False
 
+        addBytesWritten(filepath)
+        # the document now lives at the project path, so its cached copy can be evicted
+        self.releaseCachedScene()
+        if isVersion and os.path.splitext(filepath)[1] in self.sceneFormats:
+            self.writeInspection(filepath)
+
         return True
 
+    @err_catcher(name=__name__)
+    def writeInspection(self, filepath):
+        """
+        Writes the layers, artboards, links, swatches and fonts of the active
+        document next to the saved scenefile. Disabled with
+        PRISM_ILLUSTRATOR_INSPECTION=0.
+        """
+        if not self.useHostScripts or os.getenv("PRISM_ILLUSTRATOR_INSPECTION", "1") == "0":
+            return
+
+        try:
+            data = self.runHostScript(INSPECTION_SCRIPT, name="inspectDocument")
+            if not isinstance(data, dict):
+                raise HostScriptError("inspectDocument returned no data")
+
+            return writeSidecar(filepath, data)
+        except (HostScriptError, HostBusyError, HostTimeoutError, OSError) as e:
+            # the version was saved, a missing inspection only affects the content search
+            logger.warning("Failed to write the inspection of %s: %s" % (filepath, e))
+
     @err_catcher(name=__name__)
     def getImportPaths(self, origin):
         return False
@@ -401,57 +567,358 @@ class Prism_Illustrator_Functions(object):
         ilAction = QAction("Open tools", origin)
         ilAction.triggered.connect(self.openIllustratorTools)
         ilMenu.addAction(ilAction)
+        previewAction = QAction("Generate scene previews", origin)
+        previewAction.triggered.connect(lambda: self.createScenePreviews())
+        ilMenu.addAction(previewAction)
+        findAction = QAction("Find scenes by content...", origin)
+        findAction.triggered.connect(lambda: self.findScenesByContentDialog(origin))
+        ilMenu.addAction(findAction)
         origin.menuTools.addSeparator()
         origin.menuTools.addMenu(ilMenu)
 
     @err_catcher(name=__name__)
+    @traced()
+    @hostOperation(fallback=False)
     def openScene(self, origin, filepath, force=False):
         if not force and os.path.splitext(filepath)[1] not in self.sceneFormats:
             return False
 
+        if self.activateOpenDocument(filepath):
+            self.prefetchExportData(filepath)
+            return True
+
+        openPath = filepath
+        if self.getSceneCache():
+            try:
+                openPath = self.sceneCache.getLocalPath(filepath)
+            except ModifiedCacheError as e:
+                openPath = self.resolveModifiedCache(e)
+                if not openPath:
+                    return False
+
+            if openPath != self.cachedScenePath:
+                self.releaseCachedScene()
+
+            if openPath != filepath:
+                self.cachedScenePath = openPath
+
+        self.openDocument(openPath)
+        self.prefetchExportData(filepath)
+        return True
+
+    @err_catcher(name=__name__)
+    def openDocument(self, filepath):
         if self.win:
-            self.ilApp.Open(filepath)
+            doc = self.ilApp.Open(filepath)
+            self.getConnection().cacheDocument(filepath, doc)
         else:
             scpt = """
                 tell application "%s"
-                    open file "%s"
+                    open POSIX file "%s"
                 end tell
             """ % (
-                self.psAppName,
+                self.ilAppName,
                 filepath,
             )
             self.executeAppleScript(scpt)
 
-        return True
+    @err_catcher(name=__name__)
+    def onPostSaveScene(self, origin, filepath, *args, **kwargs):
+        self.prefetchExportData(filepath)
+        index = self.getDependencyIndex()
+        if index and os.path.exists(index.indexPath):
+            index.update(paths=[filepath])
 
-    # @err_catcher(name=__name__)
-    # def importImages(self, origin):
-    #     self.core.popup("importing IMGS")
-    #     self.illustratorImportSource(origin)
-
-    # @err_catcher(name=__name__)
-    # def illustratorImportSource(self, origin):
-    #     filepath = origin.seq[origin.getCurrentFrame()].replace("\\", "/")
-    #     # self.openScene(origin, filepath, force=True)
-    #     doc = self.ilApp.ActiveDocument
-    #     try:
-    #         # Place the image
-    #         placed_item = doc.PlacedItems.Add()
-    #         placed_item.File = filepath  # Set the image file path
-            
-    #         # Optional: Set the position (x, y) in points (0,0 is bottom-left corner)
-    #         placed_item.Top = 500  # Y-coordinate
-    #         placed_item.Left = 100  # X-coordinate
+        autoExporter = self.getAutoExporter()
+        if autoExporter:
+            autoExporter.sceneSaved(filepath)
 
-    #         # Optional: Scale the placed image
-    #         placed_item.Width = 200  # Set the width in points
-    #         placed_item.Height = 150  # Set the height in points
+    @err_catcher(name=__name__)
+    def getAutoExporter(self):
+        """
+        Returns the auto exporter of the current project. The rules are read
+        from autoExport.json in the pipeline folder of the project or from
+        the file of PRISM_ILLUSTRATOR_AUTO_EXPORT.
+        """
+        configPath = os.getenv("PRISM_ILLUSTRATOR_AUTO_EXPORT")
+        if not configPath:
+            if not getattr(self.core, "projectPath", None):
+                return
 
-    #         self.core.popup(f"Image successfully placed in Illustrator: {filepath}")
+            configPath = os.path.join(
+                self.core.projects.getPipelineFolder(), "Illustrator", "autoExport.json"
+            )
 
-    #     except Exception as e:
-    #         print(f"Error placing the image: {e}")
+        if not os.path.exists(configPath):
+            return
+
+        if not self.autoExporter or self.autoExporter.configPath != configPath:
+            self.autoExporter = AutoExporter(configPath, self.submitAutoExport, self.getAutoExportFingerprint)
 
+        return self.autoExporter
+
+    @err_catcher(name=__name__)
+    def submitAutoExport(self, scenePath, target, delay, coalesceKey, fingerprint):
+        """
+        Adds an auto export to the job queue and starts a worker, which
+        exports it after delay seconds. Newer saves of the scene replace
+        the exports which are still waiting.
+        """
+        queued = self.enqueueExport(
+            target,
+            scene=scenePath,
+            source="autoExport",
+            delay=delay,
+            coalesceKey=coalesceKey,
+            fingerprint=fingerprint,
+        )
+        if queued:
+            self.startExportWorker(queued[1])
+            logger.info("queued the auto export of %s: %s" % (scenePath, target))
+
+    def getAutoExportFingerprint(self, coalesceKey):
+        # no err_catcher, the auto exporter handles the errors
+        queue = JobQueue()
+        try:
+            return queue.getFingerprint(coalesceKey)
+        finally:
+            queue.close()
+
+    @err_catcher(name=__name__)
+    def createHostObject(self, progId):
+        """
+        Creates a COM object like export options. With the host dispatcher
+        it is created in the dispatcher thread, which owns the connection.
+        """
+        if self.hostDispatcher and self.win:
+            return self.hostDispatcher.wrap(self.hostDispatcher.call(win32com.client.Dispatch, progId))
+
+        return wrapHostObject(win32com.client.Dispatch(progId))
+
+    @err_catcher(name=__name__)
+    def onHostBusy(self, operation, error):
+        logger.warning("%s failed: %s" % (operation, error))
+        busy = self.hostDispatcher.getBusyState() if self.hostDispatcher else None
+        since = busy["since"] if busy else None
+        if since and self.hostBusyNotified == since:
+            return
+
+        self.hostBusyNotified = since
+        msg = "Illustrator isn't responding:\n\n%s\n\nPlease close open dialogs in Illustrator and try again." % error
+        self.core.popup(msg, title="Illustrator busy", severity="warning")
+
+    @err_catcher(name=__name__)
+    def getHostLatencyStats(self):
+        """
+        Returns count, mean, p50, p90, p99 and max of the duration of each
+        host operation and of the single host calls in it.
+        """
+        if not self.hostDispatcher:
+            return {}
+
+        return self.hostDispatcher.getLatencyStats()
+
+    @err_catcher(name=__name__)
+    def getSceneCache(self):
+        """
+        Returns the local scene cache if it is enabled through the
+        PRISM_ILLUSTRATOR_SCENE_CACHE environment variable. The value is either
+        "1" to use the default cache folder or the path of the cache folder.
+        PRISM_ILLUSTRATOR_SCENE_CACHE_SIZE sets the size cap in MB.
+        """
+        if self.sceneCache:
+            return self.sceneCache
+
+        cacheEnv = os.getenv("PRISM_ILLUSTRATOR_SCENE_CACHE")
+        if not cacheEnv or cacheEnv == "0":
+            return
+
+        cacheDir = None if cacheEnv == "1" else cacheEnv
+        maxSize = int(os.getenv("PRISM_ILLUSTRATOR_SCENE_CACHE_SIZE", "2048")) * 1024 ** 2
+        self.sceneCache = SceneCache(cacheDir=cacheDir, maxSize=maxSize)
+        return self.sceneCache
+
+    @err_catcher(name=__name__)
+    def resolveModifiedCache(self, error):
+        """
+        Asks which file to open if the local copy of a scene was saved in
+        Illustrator. The local copy is never deleted, it holds work which
+        isn't in the project yet. Returns the path to open or None.
+        """
+        msg = (
+            "The local copy of this scene was saved in Illustrator after it was opened from the project:\n\n%s\n\n"
+            "These changes are not in the project yet. Open the local copy to save them as a new version. "
+            "The local copy is kept in the scene cache until it's removed manually."
+            % error.localPath
+        )
+        result = self.core.popupQuestion(
+            msg,
+            title="Modified scene copy",
+            buttons=["Open local copy", "Open project file", "Cancel"],
+        )
+        if result == "Open local copy":
+            return error.localPath
+        elif result == "Open project file":
+            return error.source
+
+    @err_catcher(name=__name__)
+    def releaseCachedScene(self):
+        """
+        Allows the cache to evict the local copy of the scene which was opened
+        last, once another scene is opened or the scene is saved back.
+        """
+        if self.cachedScenePath and self.sceneCache:
+            self.sceneCache.release(self.cachedScenePath)
+
+        self.cachedScenePath = None
+
+    @err_catcher(name=__name__)
+    def getDocumentPaths(self, filepath):
+        """
+        Returns the normalized paths under which the document of filepath
+        can be open: the project path and its copies in the local scene cache.
+        """
+        targets = [os.path.normcase(os.path.normpath(filepath))]
+        if self.getSceneCache():
+            targets += [
+                os.path.normcase(os.path.normpath(entry["local"]))
+                for entry in self.sceneCache.entries.values()
+                if os.path.normcase(os.path.normpath(entry["source"])) == targets[0]
+            ]
+
+        return targets
+
+    @err_catcher(name=__name__)
+    def getOpenDocumentHost(self, filepath):
+        """
+        Returns the major version of the Illustrator instance which has the
+        document of filepath open. The active document and the current
+        instance stay unchanged.
+        """
+        if not self.win or not self.connectionPool:
+            return
+
+        return self.connectionPool.findDocumentVersion(self.getDocumentPaths(filepath))
+
+    @err_catcher(name=__name__)
+    def activateOpenDocument(self, filepath):
+        """
+        Activates the document of filepath if it is already open in Illustrator,
+        either from the project path or from the local scene cache.
+        """
+        targets = self.getDocumentPaths(filepath)
+        if self.win:
+            try:
+                # the following host calls go to the instance which owns the document
+                version = self.connectionPool.findDocument(targets)
+                if version:
+                    self.connectionPool.setCurrent(version)
+                    return True
+            except Exception as e:
+                logger.debug("Failed to check open documents: %s" % e)
+
+            return False
+        else:
+            for target in targets:
+                scpt = """
+                    tell application "%s"
+                        repeat with doc in documents
+                            try
+                                if POSIX path of (file path of doc as alias) is "%s" then
+                                    set current document to doc
+                                    return "true"
+                                end if
+                            end try
+                        end repeat
+                        return "false"
+                    end tell
+                """ % (
+                    self.ilAppName,
+                    target,
+                )
+                if self.executeAppleScript(scpt) == "true":
+                    return True
+
+            return False
+
+    @err_catcher(name=__name__)
+    def importImages(self, filepath=None, mediaBrowser=None, parent=None):
+        """
+        Places the selected media of the media browser in the active document,
+        either as a grid on the active artboard or with one layer per image.
+        """
+        if mediaBrowser and hasattr(mediaBrowser, "compGetImportSource"):
+            sources = mediaBrowser.compGetImportSource()
+        else:
+            sources = [filepath]
+
+        files = getSourceFiles([s for s in sources if s])
+        if not files:
+            self.core.popup("No images found to import.")
+            return False
+
+        result = self.core.popupQuestion(
+            "Place %s image%s:" % (len(files), "" if len(files) == 1 else "s"),
+            buttons=["As grid", "As layers", "Cancel"],
+            parent=parent,
+        )
+        if result not in ["As grid", "As layers"]:
+            return False
+
+        layout = "grid" if result == "As grid" else "layers"
+        startTime = time.time()
+        results = self.placeImages(files, layout=layout)
+        if results is False:
+            return False
+
+        failed = [r for r in results if "error" in r]
+        msg = "Placed %s images in %.1fs." % (len(results) - len(failed), time.time() - startTime)
+        if failed:
+            msg += "\n\nFailed to place:\n%s" % "\n".join("%s: %s" % (r["path"], r["error"]) for r in failed)
+
+        self.core.popup(msg, title="Import images", severity="warning" if failed else "info")
+        return not failed
+
+    @err_catcher(name=__name__)
+    @traced()
+    @hostOperation(fallback=False)
+    def placeImages(self, files, layout="grid", columns=0, spacing=10):
+        """
+        Places the files in the active document with one host script
+        execution and returns the placement of each file.
+        """
+        args = getPlacementArgs(files, layout=layout, columns=columns, spacing=spacing)
+        try:
+            return self.runHostScript(PLACEMENT_SCRIPT, args, name="placeImages")
+        except HostScriptError as e:
+            self.core.popup("Failed to place the images:\n\n%s" % e)
+            return False
+
+    @traced()
+    def runHostScript(self, body, args=None, name="script"):
+        """
+        Runs an ExtendScript function body with args in Illustrator and
+        returns its result. Multi-step operations cost one host round trip
+        this way. Raises HostScriptError if the script failed. Errors are
+        raised to the caller instead of being shown by err_catcher.
+        """
+        script = buildScript(body, args, name=name)
+        return parseScriptResult(self.doJavaScript(script), name=name)
+
+    def doJavaScript(self, script):
+        """
+        Runs an ExtendScript program in Illustrator and returns the value of
+        its last statement as a string.
+        """
+        if self.win:
+            return self.ilApp.DoJavaScript(script)
+
+        scpt = """
+            tell application "%s"
+                do javascript "%s"
+            end tell
+        """ % (self.ilAppName, script.replace("\\", "\\\\").replace("\"", "\\\""))
+        return self.executeAppleScript(scpt)
 
     @err_catcher(name=__name__)
     def openIllustratorTools(self):
@@ -465,18 +932,21 @@ class Prism_Illustrator_Functions(object):
         b_saveVersion = QPushButton("Save Version")
         b_saveComment = QPushButton("Save Extended")
         b_export = QPushButton("Export")
+        b_delivery = QPushButton("Collect for Delivery")
         b_projectBrowser = QPushButton("Project Browser")
         b_settings = QPushButton("Settings")
 
         b_saveVersion.clicked.connect(self.core.saveScene)
         b_saveComment.clicked.connect(self.core.saveWithComment)
         b_export.clicked.connect(self.exportImage)
+        b_delivery.clicked.connect(self.collectForDeliveryDialog)
         b_projectBrowser.clicked.connect(self.core.projectBrowser)
         b_settings.clicked.connect(self.core.prismSettings)
 
         lo_tools.addWidget(b_saveVersion)
         lo_tools.addWidget(b_saveComment)
         lo_tools.addWidget(b_export)
+        lo_tools.addWidget(b_delivery)
         lo_tools.addWidget(b_projectBrowser)
         lo_tools.addWidget(b_settings)
 
@@ -489,6 +959,56 @@ class Prism_Illustrator_Functions(object):
         return True
 
     @err_catcher(name=__name__)
+    def collectForDeliveryDialog(self):
+        curfile = self.core.getCurrentFileName()
+        if not curfile or not os.path.exists(curfile):
+            self.core.popup("Please save the document before collecting it for delivery.")
+            return False
+
+        outputFolder = QFileDialog.getExistingDirectory(
+            self.dlg_tools, "Select delivery folder", os.path.dirname(curfile)
+        )
+        if not outputFolder:
+            return False
+
+        outputFolder = os.path.join(outputFolder, os.path.splitext(os.path.basename(curfile))[0])
+        msg = "Do you want to create a zip file of the delivery folder?"
+        result = QMessageBox.question(self.core.messageParent, "Collect for Delivery", msg)
+        zipPath = outputFolder + ".zip" if result == QMessageBox.Yes else None
+
+        report = self.collectForDelivery(curfile, outputFolder, zipPath=zipPath)
+        if not report:
+            return False
+
+        msg = "Collected %s files into:\n%s\n\ncopied: %s\nunchanged: %s\nduplicates: %s\n%.1f MB/s" % (
+            len(report["files"]),
+            zipPath or outputFolder,
+            report["copied"],
+            report["skipped"],
+            report["deduplicated"],
+            report["throughput"] / 1024 ** 2,
+        )
+        if report["missing"]:
+            msg += "\n\nMissing files:\n" + "\n".join(x["source"] for x in report["missing"])
+
+        if report["warnings"]:
+            msg += "\n\nFonts which were not collected:\n" + "\n".join(x["source"] for x in report["warnings"])
+
+        self.core.popup(msg, title="Collect for Delivery", severity="info" if report["result"] and not report["warnings"] else "warning")
+        return True
+
+    @err_catcher(name=__name__)
+    def collectForDelivery(self, scenePath, outputFolder, zipPath=None, includeFonts=True):
+        """
+        Copies the scene, its linked files and its fonts into outputFolder.
+        See Prism_Illustrator_Delivery.collectForDelivery for the report.
+        """
+        return collectForDelivery(
+            scenePath, outputFolder, includeFonts=includeFonts, zipPath=zipPath
+        )
+
+    @err_catcher(name=__name__)
+    @traced()
     def exportImage(self):
         if not self.core.projects.ensureProject():
             return False
@@ -496,14 +1016,154 @@ class Prism_Illustrator_Functions(object):
         if not self.core.users.ensureUser():
             return False
 
+        startTime = time.time()
+        data = self.getExportDialogData()
+        if not self.isExportDialogValid():
+            self.createExportDialog()
+
+        self.refreshExportDialog(data)
+        self.core.callback(
+            name="Illustrator_onExportOpen",
+            args=[self],
+        )
+
+        self.dlg_export.show()
+        self.dlg_export.raise_()
+        self.dlg_export.activateWindow()
+        logger.debug("export dialog shown in %.0f ms" % ((time.time() - startTime) * 1000))
+        return True
+
+    @err_catcher(name=__name__)
+    def isExportDialogValid(self):
+        if not getattr(self, "dlg_export", None):
+            return False
+
+        try:
+            self.dlg_export.isVisible()
+        except RuntimeError:
+            # the Qt object was deleted
+            return False
+
+        return True
+
+    @err_catcher(name=__name__)
+    def prewarmExportDialog(self):
+        """
+        Creates the export dialog hidden and prefetches its data, so the
+        first click on Export only has to show it. Disabled with
+        PRISM_ILLUSTRATOR_PREWARM_EXPORT=0.
+        """
+        if os.getenv("PRISM_ILLUSTRATOR_PREWARM_EXPORT", "1") == "0":
+            return
+
+        if not getattr(self.core, "uiAvailable", True):
+            return
+
+        if not self.isExportDialogValid():
+            self.createExportDialog()
+
+        self.prefetchExportData(self.core.getCurrentFileName())
+
+    def computeExportDialogData(self, fileName):
+        # no err_catcher, the errors of a prefetch are only logged
+        return {
+            "file": fileName,
+            "sceneData": self.core.getScenefileData(fileName),
+            "exportPaths": self.getCachedValue("renderProductBasePaths", self.core.paths.getRenderProductBasePaths),
+            "useMaster": self.getCachedValue("useMaster", self.core.mediaProducts.getUseMaster),
+            "taskNames": list(self.getCachedTaskNames()),
+            "time": time.time(),
+        }
+
+    @err_catcher(name=__name__)
+    def prefetchExportData(self, fileName):
+        """
+        Computes the data of the export dialog once the event loop is idle.
+        This is called when a document was opened or saved. Prism core isn't
+        thread-safe, so the data is computed in the GUI thread, but outside
+        of the click on Export.
+        """
+        if not getattr(self.core, "uiAvailable", True):
+            return
+
+        def prefetch():
+            if self.getPrefetchedExportData(fileName):
+                return
+
+            try:
+                self.exportDialogData = self.computeExportDialogData(fileName)
+            except Exception as e:
+                logger.debug("failed to prefetch the export dialog data: %s" % e)
+
+        QTimer.singleShot(0, prefetch)
+
+    @err_catcher(name=__name__)
+    def getPrefetchedExportData(self, fileName):
+        """
+        Returns the prefetched data of the export dialog if it belongs to
+        fileName and isn't older than PRISM_ILLUSTRATOR_PREFETCH_MAX_AGE.
+        """
+        data = getattr(self, "exportDialogData", None)
+        if not data:
+            return
+
+        maxAge = float(os.getenv("PRISM_ILLUSTRATOR_PREFETCH_MAX_AGE", "300"))
+        samePath = os.path.normcase(os.path.normpath(data["file"] or ".")) == os.path.normcase(
+            os.path.normpath(fileName or ".")
+        )
+        if samePath and time.time() - data["time"] <= maxAge:
+            return data
+
+    @err_catcher(name=__name__)
+    def getExportDialogData(self):
+        """
+        Returns the prefetched data of the export dialog if it belongs to
+        the current document, otherwise it's computed now without waiting
+        for a pending prefetch.
+        """
         curfile = self.core.getCurrentFileName()
-        fname = self.core.getScenefileData(curfile)
+        data = self.getPrefetchedExportData(curfile)
+        if not data:
+            data = self.computeExportDialogData(curfile)
+            self.exportDialogData = data
 
-        if "type" in fname:
-            entityType = fname["type"]
-        else:
-            entityType = "context"
+        return data
+
+    @err_catcher(name=__name__)
+    def refreshExportDialog(self, data):
+        """
+        Fills the reused export dialog with the values of the current document.
+        """
+        fname = data["sceneData"]
+        entityType = fname.get("type", "context")
+        self.rb_task.setText(f"Export into current {entityType}")
+        self.rb_task.setChecked(True)
+        self.le_task.setText(fname.get("task", ""))
+        self.le_comment.setText("")
+        self.export_paths = data["exportPaths"]
+        location = self.cb_location.currentText()
+        self.cb_location.clear()
+        self.cb_location.addItems(list(self.export_paths.keys()))
+        if location in self.export_paths:
+            self.cb_location.setCurrentText(location)
+
+        self.w_location.setVisible(len(self.export_paths) > 1)
+        self.w_master.setVisible(bool(data["useMaster"]))
+        self.exportGetTasks(data["taskNames"])
 
+        # the versions and options of the previous document don't apply to this one
+        self.chb_useNextVersion.setChecked(True)
+        self.cb_isProduct.setChecked(False)
+        self.cb_formats.setCurrentIndex(0)
+        self.chb_tiled.setChecked(False)
+        self.exportGetVersions()
+
+    @err_catcher(name=__name__)
+    def createExportDialog(self):
+        """
+        Builds the export dialog. It's created once and reused, the values
+        of the current document are set by refreshExportDialog.
+        """
         self.dlg_export = QDialog()
         self.core.parentWindow(self.dlg_export)
         self.dlg_export.setWindowTitle("Prism - Export image")
@@ -513,7 +1173,7 @@ class Prism_Illustrator_Functions(object):
 
         # Add radio button and "Is Product" checkbox
         rb_task_layout = QHBoxLayout()
-        self.rb_task = QRadioButton(f"Export into current {entityType}")
+        self.rb_task = QRadioButton("Export into current context")
         self.cb_isProduct = QCheckBox("Is Product")
         self.cb_isProduct.setChecked(False)  # Default to unchecked
         rb_task_layout.addWidget(self.rb_task)
@@ -532,7 +1192,6 @@ class Prism_Illustrator_Functions(object):
         l_task = QLabel("Identifier:")
         l_task.setMinimumWidth(110)
         self.le_task = QLineEdit()
-        self.le_task.setText(fname.get("task", ""))
         self.b_task = QPushButton(u"▼")
         self.b_task.setMinimumSize(35, 0)
         self.b_task.setMaximumSize(35, 500)
@@ -548,6 +1207,49 @@ class Prism_Illustrator_Functions(object):
         l_ext.setMinimumWidth(110)
         self.cb_formats = QComboBox()
         self.cb_formats.addItems([".jpg", ".png", ".tif"])
+        self.w_variants = QWidget()
+        lo_variants = QHBoxLayout()
+        lo_variants.setContentsMargins(0, 0, 0, 0)
+        self.w_variants.setLayout(lo_variants)
+        l_variants = QLabel("Variants (optional):")
+        l_variants.setMinimumWidth(110)
+        self.le_variants = QLineEdit()
+        self.le_variants.setPlaceholderText(".jpg .png@0.5 .tif:16bit")
+        self.le_variants.setToolTip(
+            "Formats, scales and color depths which are derived from the exported image.\n"
+            "Illustrator renders the image only once, the variants are created from it.\n"
+            "Syntax: .ext[@scale][:8bit|16bit|gray|indexed]"
+        )
+        lo_variants.addWidget(l_variants)
+        lo_variants.addWidget(self.le_variants)
+        self.w_scales = QWidget()
+        lo_scales = QHBoxLayout()
+        lo_scales.setContentsMargins(0, 0, 0, 0)
+        self.w_scales.setLayout(lo_scales)
+        l_scales = QLabel("Scales:")
+        l_scales.setMinimumWidth(110)
+        self.cb_scales = QComboBox()
+        self.cb_scales.setEditable(True)
+        self.cb_scales.addItems(SCALE_PRESETS)
+        self.cb_scales.setToolTip(
+            "The artboard is rendered once at the highest scale,\n"
+            "the smaller scales are downsampled from it (.png and .jpg only)."
+        )
+        lo_scales.addWidget(l_scales)
+        lo_scales.addWidget(self.cb_scales)
+        self.w_pdfProfile = QWidget()
+        lo_pdfProfile = QHBoxLayout()
+        lo_pdfProfile.setContentsMargins(0, 0, 0, 0)
+        self.w_pdfProfile.setLayout(lo_pdfProfile)
+        l_pdfProfile = QLabel("PDF Profile:")
+        l_pdfProfile.setMinimumWidth(110)
+        self.cb_pdfProfile = QComboBox()
+        self.cb_pdfProfile.addItems(sorted(getPdfProfiles()))
+        self.cb_pdfProfile.setCurrentText(DEFAULT_PROFILE)
+        self.cb_pdfProfile.setToolTip("Image downsampling, compression and font subsetting of the PDF")
+        lo_pdfProfile.addWidget(l_pdfProfile)
+        lo_pdfProfile.addWidget(self.cb_pdfProfile)
+        self.w_pdfProfile.setVisible(False)
         self.w_location = QWidget()
         self.lo_location = QHBoxLayout()
         self.lo_location.setContentsMargins(0, 0, 0, 0)
@@ -555,12 +1257,8 @@ class Prism_Illustrator_Functions(object):
         self.l_location = QLabel("Location:")
         self.l_location.setMinimumWidth(140)
         self.cb_location = QComboBox()
-        self.export_paths = self.core.paths.getRenderProductBasePaths()
-        self.cb_location.addItems(list(self.export_paths.keys()))
         self.lo_location.addWidget(self.l_location)
         self.lo_location.addWidget(self.cb_location)
-        if len(self.export_paths) < 2:
-            self.w_location.setVisible(False)
 
         self.w_master = QWidget()
         self.lo_master = QHBoxLayout()
@@ -569,16 +1267,12 @@ class Prism_Illustrator_Functions(object):
         self.l_master = QLabel("Master Version:")
         self.l_master.setMinimumWidth(140)
         self.cb_master = QComboBox()
-        self.export_paths = self.core.paths.getRenderProductBasePaths()
         self.lo_master.addWidget(self.l_master)
         self.lo_master.addWidget(self.cb_master)
 
         masterItems = ["Set as master", "Add to master", "Don't update master"]
         self.cb_master.addItems(masterItems)
 
-        if not self.core.mediaProducts.getUseMaster():
-            self.w_master.setVisible(False)
-
         lo_task.addWidget(l_task)
         lo_task.addWidget(self.le_task)
         lo_task.addWidget(self.b_task)
@@ -588,12 +1282,43 @@ class Prism_Illustrator_Functions(object):
         lo_version.addWidget(self.cb_versions)
         lo_extension.addWidget(l_ext)
         lo_extension.addWidget(self.cb_formats)
+        self.chb_tiled = QCheckBox("Tiled")
+        self.chb_tiled.setToolTip(
+            "Renders the artboard as a grid of tiles and stitches them into one TIFF.\n"
+            "Use this for large artboards which Illustrator can't rasterize in one piece."
+        )
+        self.chb_tiled.setVisible(False)
+        lo_extension.addWidget(self.chb_tiled)
+        self.chb_optimizeSvg = QCheckBox("Optimize")
+        self.chb_optimizeSvg.setToolTip(
+            "Reduces the coordinate precision, removes unused IDs and empty groups\n"
+            "and drops Illustrator's private data after the export."
+        )
+        self.chb_optimizeSvg.setChecked(os.getenv("PRISM_ILLUSTRATOR_SVG_OPTIMIZE", "1") == "1")
+        self.chb_optimizeSvg.setVisible(False)
+        lo_extension.addWidget(self.chb_optimizeSvg)
+        self.chb_externalImages = QCheckBox("External images")
+        self.chb_externalImages.setToolTip(
+            "Writes embedded raster images to a folder next to the SVG."
+        )
+        self.chb_externalImages.setVisible(False)
+        lo_extension.addWidget(self.chb_externalImages)
         lo_localOut.addWidget(self.w_location)
         lo_prismExport.addLayout(lo_task)
         lo_prismExport.addWidget(self.w_comment)
         lo_prismExport.addLayout(lo_version)
         lo_prismExport.addLayout(lo_extension)
+        lo_prismExport.addWidget(self.w_scales)
+        lo_prismExport.addWidget(self.w_pdfProfile)
+        lo_prismExport.addWidget(self.w_variants)
         lo_prismExport.addWidget(self.w_master)
+        self.chb_queue = QCheckBox("Export in background")
+        self.chb_queue.setToolTip(
+            "Adds the export to the job queue. A worker process exports it from the\n"
+            "saved scenefile, so Prism stays responsive. The worker uses the same\n"
+            "Illustrator instance, which is busy while the export runs."
+        )
+        lo_prismExport.addWidget(self.chb_queue)
         self.w_task.setLayout(lo_prismExport)
         lo_version.setContentsMargins(0, 0, 0, 0)
 
@@ -620,19 +1345,11 @@ class Prism_Illustrator_Functions(object):
 
         # Connect the "Is Product" checkbox
         self.cb_isProduct.toggled.connect(self.updateFormatOptions)
-
-        self.exportGetTasks()
-        self.core.callback(
-            name="Illustrator_onExportOpen",
-            args=[self],
-        )
-
-        self.dlg_export.show()
+        self.cb_formats.currentTextChanged.connect(self.updateExtensionOptions)
 
         self.cb_versions.setMinimumWidth(300)
         self.cb_formats.setMinimumWidth(300)
-
-        return True
+        return self.dlg_export
 
     @err_catcher(name=__name__)
     def updateFormatOptions(self, checkbox):
@@ -641,25 +1358,35 @@ class Prism_Illustrator_Functions(object):
         """
         if self.cb_isProduct.isChecked():
             self.cb_formats.clear()
-            self.cb_formats.addItems([".ai", ".svg", ".psd"])
+            self.cb_formats.addItems([".ai", ".svg", ".psd", ".pdf"])
         else:
             self.cb_formats.clear()
             self.cb_formats.addItems([".jpg", ".png", ".tif"])
 
+        self.w_variants.setHidden(self.cb_isProduct.isChecked())
+        self.w_scales.setHidden(self.cb_isProduct.isChecked())
+
+
+    @err_catcher(name=__name__)
+    def updateExtensionOptions(self, extension):
+        self.chb_tiled.setVisible(extension in [".tif", ".tiff"])
+        self.chb_optimizeSvg.setVisible(extension == ".svg")
+        self.chb_externalImages.setVisible(extension == ".svg")
+        self.w_pdfProfile.setVisible(extension == ".pdf")
 
     @err_catcher(name=__name__)
     def exportToggle(self, checked):
         self.w_task.setEnabled(checked)
 
     @err_catcher(name=__name__)
-    def exportGetTasks(self):
-        self.taskList = self.core.getTaskNames("2d")
+    def exportGetTasks(self, taskNames=None):
+        if taskNames is None:
+            taskNames = self.getCachedTaskNames()
 
-        if len(self.taskList) == 0:
-            self.b_task.setHidden(True)
-        else:
-            if "_ShotCam" in self.taskList:
-                self.taskList.remove("_ShotCam")
+        self.taskList = list(taskNames)
+        self.b_task.setHidden(len(self.taskList) == 0)
+        if "_ShotCam" in self.taskList:
+            self.taskList.remove("_ShotCam")
 
     @err_catcher(name=__name__)
     def exportShowTasks(self):
@@ -698,19 +1425,27 @@ class Prism_Illustrator_Functions(object):
         self.cb_versions.addItems(existingVersions)
 
     @err_catcher(name=__name__)
-    def exportGetOutputName(self, useVersion="next", isproduct=False):
+    @traced()
+    def exportGetOutputName(self, useVersion="next", isproduct=False, task=None, extension=None):
         if self.le_task.text() == "":
             return
 
-        task = self.le_task.text()
-        extension = self.cb_formats.currentText()
-        fileName = self.core.getCurrentFileName()
+        return self.generateExportPath(
+            task=task or self.le_task.text(),
+            extension=extension or self.cb_formats.currentText(),
+            isproduct=isproduct,
+            useVersion=useVersion,
+            location=self.cb_location.currentText(),
+        )
+
+    @err_catcher(name=__name__)
+    def generateExportPath(self, task, extension, isproduct=False, useVersion="next", location="global", fileName=None):
+        fileName = fileName or self.core.getCurrentFileName()
         fnameData = self.core.getScenefileData(fileName)
 
         if "type" not in fnameData:
             return
-        
-        location = self.cb_location.currentText()
+
         outputPathData = ""
         if not isproduct:
             outputPathData = self.core.mediaProducts.generateMediaProductPath(
@@ -775,6 +1510,35 @@ class Prism_Illustrator_Functions(object):
                 )
                 return
 
+            scales = [1.0]
+            if not isproduct:
+                try:
+                    scales = parseScales(self.cb_scales.currentText()) or [1.0]
+                except ValueError as e:
+                    self.core.popup(str(e))
+                    return
+
+                if scales != [1.0] and self.cb_formats.currentText() not in [".png", ".jpg"]:
+                    self.core.popup("Multiple scales can only be exported as .png or .jpg.")
+                    return
+
+            variants = []
+            if not isproduct and self.le_variants.text().strip():
+                try:
+                    variants = parseVariants(self.le_variants.text())
+                except ValueError as e:
+                    self.core.popup(str(e))
+                    return
+
+                if self.cb_formats.currentText() not in LOSSLESS_FORMATS:
+                    msg = "Variants are derived from the exported image, so the format has to be lossless (%s)." % ", ".join(LOSSLESS_FORMATS)
+                    self.core.popup(msg)
+                    return
+
+            if self.chb_queue.isChecked():
+                self.enqueueExportFromDialog(oversion, isproduct, scales, variants)
+                return
+
             outputPath, outputDir, hVersion = self.exportGetOutputName(oversion, isproduct)
 
             outLength = len(outputPath)
@@ -789,52 +1553,115 @@ class Prism_Illustrator_Functions(object):
             if not os.path.exists(outputDir):
                 os.makedirs(outputDir)
 
-            fileName = self.core.getCurrentFileName()
-            context = self.core.getScenefileData(fileName)
-
-            details = context.copy()
-            if "filename" in details:
-                del details["filename"]
-
-            if "extension" in details:
-                del details["extension"]
+            details = self.getExportDetails(hVersion, self.le_task.text())
+            if self.cb_formats.currentText() == ".pdf":
+                details["pdfProfile"] = self.cb_pdfProfile.currentText()
 
-            details["version"] = hVersion
-            details["sourceScene"] = fileName
-            details["identifier"] = self.le_task.text()
+            if scales != [1.0]:
+                details["scales"] = {
+                    getScaleName(scale): os.path.basename(getScaledPath(outputPath, scale))
+                    for scale in scales
+                }
 
-            self.core.saveVersionInfo(
-                filepath=os.path.dirname(outputPath),
-                details=details,
-            )
+            with span("saveVersionInfo"):
+                self.core.saveVersionInfo(
+                    filepath=os.path.dirname(outputPath),
+                    details=details,
+                )
         else:
+            scales = [1.0]
+            variants = []
             startLocation = self.core.projects.getResolvedProjectStructurePath("textures")
             outputPath = QFileDialog.getSaveFileName(
                 self.dlg_export,
                 "Enter output filename",
                 startLocation,
-                "JPEG (*.jpg *.jpeg);;PNG (*.png);;TIFF (*.tif *.tiff);;SVG (*.svg);;PSD (*.psd)",
+                "JPEG (*.jpg *.jpeg);;PNG (*.png);;TIFF (*.tif *.tiff);;SVG (*.svg);;PSD (*.psd);;PDF (*.pdf)",
             )[0]
 
             if outputPath == "":
                 return
 
-        self.exportImageToPath(outputPath)
+        # the tiled option stays checked in the disabled task widgets when
+        # exporting to a custom location, it only applies to TIFF files
+        tiled = self.chb_tiled.isChecked() and os.path.splitext(outputPath)[1].lower() in [".tif", ".tiff"]
+        if tiled:
+            report = self.exportTiledToPath(outputPath)
+            if report and "error" in report:
+                self.core.popup("Tiled export failed:\n\n%s" % report["error"])
+        elif scales == [1.0]:
+            self.exportImageToPath(outputPath, pdfProfile=self.cb_pdfProfile.currentText())
+        else:
+            scaleResults = self.exportScalesToPath(outputPath, scales)
+            failedScales = [r for r in scaleResults if "error" in r]
+            if failedScales:
+                msg = "Failed to create scales:\n\n" + "\n".join(
+                    "%s: %s" % (r["variant"]["name"], r["error"]) for r in failedScales
+                )
+                self.core.popup(msg)
+
+            # the smallest scale is used for the master version and clipboard
+            outputPath = getScaledPath(outputPath, 1.0 if 1.0 in scales else scales[0])
+
+        svgReport = None
+        if (
+            os.path.splitext(outputPath)[1].lower() == ".svg"
+            and self.chb_optimizeSvg.isChecked()
+            and os.path.exists(outputPath)
+        ):
+            svgReport = self.optimizeSvgExport(outputPath, externalizeImages=self.chb_externalImages.isChecked())
+            if svgReport and self.rb_task.isChecked():
+                details["svgOptimization"] = svgReport
+                self.core.saveVersionInfo(
+                    filepath=os.path.dirname(outputPath),
+                    details=details,
+                )
+
         self.handleMasterVersion(outputPath)
+        variantResults = []
+        if variants and os.path.exists(outputPath):
+            variantResults = self.exportVariants(
+                outputPath, variants, hVersion, details, location=self.cb_location.currentText()
+            )
+
         self.dlg_export.accept()
         self.core.copyToClipboard(outputPath, file=True)
         self.core.callback(name="illustrator_onImageExported", args=[self, outputPath])
+        # the export might have created a new task
+        self.invalidateCachedValue("taskNames/2d")
+        self.exportDialogData = None
 
         try:
             self.core.pb.refreshRender()
         except:
             pass
 
+        failedVariants = [r for r in variantResults if "error" in r]
+        if failedVariants:
+            msg = "Failed to create variants:\n\n" + "\n".join(
+                "%s: %s" % (r["variant"]["name"], r["error"]) for r in failedVariants
+            )
+            self.core.popup(msg)
+
         if os.path.exists(outputPath):
+            msg = "Successfully exported the image.\n(Path is in the clipboard)"
+            if svgReport:
+                msg += "\n\nSVG optimized: %.1f MB -> %.1f MB (-%.0f%%) in %.1fs" % (
+                    svgReport["inputSize"] / 1024.0 ** 2,
+                    svgReport["outputSize"] / 1024.0 ** 2,
+                    svgReport["reduction"] * 100,
+                    svgReport["duration"],
+                )
+
+            if variantResults:
+                msg += "\n\n%s of %s variants created." % (
+                    len(variantResults) - len(failedVariants), len(variantResults)
+                )
+
             QMessageBox.information(
                 self.core.messageParent,
                 "Export",
-                "Successfully exported the image.\n(Path is in the clipboard)",
+                msg,
             )
         else:
             QMessageBox.warning(
@@ -845,8 +1672,474 @@ class Prism_Illustrator_Functions(object):
 
 
     @err_catcher(name=__name__)
-    def exportImageToPath(self, outputPath):
+    def getExportDetails(self, version, identifier, fileName=None):
+        fileName = fileName or self.core.getCurrentFileName()
+        context = self.core.getScenefileData(fileName)
+
+        details = context.copy()
+        if "filename" in details:
+            del details["filename"]
+
+        if "extension" in details:
+            del details["extension"]
+
+        details["version"] = version
+        details["sourceScene"] = fileName
+        details["identifier"] = identifier
+        return details
+
+    @err_catcher(name=__name__)
+    @traced()
+    def exportTarget(self, target, scenePath=None):
+        """
+        Exports the active document into a new version without the export
+        dialog. target is a dict with "identifier" and "extension" and the
+        optional keys "product", "version", "location", "scales", "variants",
+        "pdfProfile", "optimizeSvg" and "externalImages". scenePath is the
+        scenefile the outputs belong to, if the active document is a copy of
+        it. Returns a result dict.
+        """
+        startTime = time.time()
+        extension = target["extension"]
+        isproduct = target.get("product", extension in [".ai", ".svg", ".psd", ".pdf"])
+        result = {"target": target}
+        pathData = self.generateExportPath(
+            task=target["identifier"],
+            extension=extension,
+            isproduct=isproduct,
+            useVersion=target.get("version", "next"),
+            location=target.get("location", "global"),
+            fileName=scenePath,
+        )
+        if not pathData:
+            result["error"] = "The scene is not in the pipeline"
+            return result
+
+        outputPath, outputDir, version = pathData
+        if not os.path.exists(outputDir):
+            os.makedirs(outputDir)
+
+        scales = parseScales(target.get("scales", "")) or [1.0]
+        details = self.getExportDetails(version, target["identifier"], fileName=scenePath)
+        if scales != [1.0]:
+            details["scales"] = {
+                getScaleName(scale): os.path.basename(getScaledPath(outputPath, scale))
+                for scale in scales
+            }
+
+        if target.get("pdfProfile"):
+            details["pdfProfile"] = target["pdfProfile"]
+
+        if scales == [1.0]:
+            self.exportImageToPath(outputPath, pdfProfile=target.get("pdfProfile"))
+        else:
+            self.exportScalesToPath(outputPath, scales)
+            outputPath = getScaledPath(outputPath, 1.0 if 1.0 in scales else scales[0])
+
+        if extension == ".svg" and target.get("optimizeSvg") and os.path.exists(outputPath):
+            details["svgOptimization"] = self.optimizeSvgExport(
+                outputPath, externalizeImages=target.get("externalImages", False)
+            )
+
+        if not os.path.exists(outputPath):
+            result["error"] = "The exported file doesn't exist: %s" % outputPath
+            return result
+
+        self.core.saveVersionInfo(filepath=os.path.dirname(outputPath), details=details)
+        if target.get("variants") and not isproduct:
+            variantResults = self.exportVariants(
+                outputPath,
+                parseVariants(target["variants"]),
+                version,
+                details,
+                location=target.get("location", "global"),
+                fileName=scenePath,
+            )
+            result["variants"] = [r["path"] for r in variantResults if "error" not in r]
+
+        self.core.callback(name="illustrator_onImageExported", args=[self, outputPath])
+        # the export might have created a new task
+        self.invalidateCachedValue("taskNames/2d")
+        result["path"] = outputPath
+        result["version"] = version
+        result["duration"] = time.time() - startTime
+        return result
+
+    @err_catcher(name=__name__)
+    def enqueueExport(
+        self, target, scene=None, priority=0, source="", queuePath=None, delay=0, coalesceKey=None, fingerprint=None
+    ):
+        """
+        Adds an export of target to the job queue. The job is processed by
+        a worker of the Illustrator version which should export the scene,
+        see getSceneHost. Returns the job id and the version, which is passed
+        to startExportWorker.
+        """
+        scene = scene or self.core.getCurrentFileName()
+        host = self.getSceneHost(scene)
+        queue = JobQueue(queuePath)
+        try:
+            jobId = queue.enqueue(
+                scene,
+                target,
+                priority=priority,
+                source=source,
+                delay=delay,
+                coalesceKey=coalesceKey,
+                host=host,
+                fingerprint=fingerprint,
+            )
+        finally:
+            queue.close()
+
+        logger.debug("queued job %s: %s %s" % (jobId, scene, target))
+        return jobId, host
+
+    @err_catcher(name=__name__)
+    def enqueueExportFromDialog(self, version, isproduct, scales, variants):
+        if self.isActiveDocumentModified():
+            msg = "The scene has unsaved changes. Background exports use the saved scenefile, please save the scene first."
+            self.core.popup(msg)
+            return
+
+        extension = self.cb_formats.currentText()
+        target = {
+            "identifier": self.le_task.text(),
+            "extension": extension,
+            "product": isproduct,
+            "version": version,
+            "location": self.cb_location.currentText(),
+        }
+        if scales != [1.0]:
+            target["scales"] = " ".join(getScaleName(scale) for scale in scales)
+
+        if variants:
+            target["variants"] = self.le_variants.text()
+
+        if extension == ".pdf":
+            target["pdfProfile"] = self.cb_pdfProfile.currentText()
+
+        if extension == ".svg":
+            target["optimizeSvg"] = self.chb_optimizeSvg.isChecked()
+            target["externalImages"] = self.chb_externalImages.isChecked()
+
+        queued = self.enqueueExport(target, source="dialog")
+        if not queued:
+            return
+
+        jobId, host = queued
+        self.startExportWorker(host)
+        self.dlg_export.accept()
+        queue = JobQueue()
+        stats = queue.getStats()
+        queue.close()
+        msg = "The export was added to the job queue (job %s).\n\n%s jobs are waiting." % (jobId, stats["depth"])
+        self.core.popup(msg, title="Export", severity="info")
+
+    @err_catcher(name=__name__)
+    def getHostVersion(self):
+        """
+        Returns the major version of the current Illustrator instance.
+        """
+        if self.win and self.connectionPool:
+            return self.connectionPool.current
+
+    @err_catcher(name=__name__)
+    def getSceneHost(self, scenePath):
+        """
+        Returns the major version of the running Illustrator which should
+        export a scene: the instance which has the scene open or the oldest
+        one which opens it without converting it.
+        """
+        if not self.win or not self.connectionPool:
+            return
+
+        openHost = self.getOpenDocumentHost(scenePath)
+        if openHost:
+            return openHost
+
+        creatorVersion = None
+        if os.path.splitext(scenePath)[1].lower() == ".ai":
+            try:
+                with AiFile(scenePath) as aiFile:
+                    creatorVersion = aiFile.getCreatorVersion()
+            except (OSError, ValueError) as e:
+                logger.debug("failed to read the version of %s: %s" % (scenePath, e))
+
+        return self.connectionPool.selectVersion(creatorVersion)
+
+    @err_catcher(name=__name__)
+    def startExportWorker(self, host=None, queuePath=None):
+        """
+        Starts a worker process for the queued exports of the Illustrator
+        version host, or of the current instance, unless the worker of this
+        Prism process for that version is still running. The worker exits
+        once the queue has no jobs for its version.
+        """
+        worker = self.exportWorkers.get(host)
+        if worker and worker.poll() is None:
+            return worker
+
+        progId = self.connectionPool.getProgId(host) if self.win and self.connectionPool else None
+        idleTimeout = float(os.getenv("PRISM_ILLUSTRATOR_WORKER_IDLE_EXIT", "30"))
+        self.exportWorkers[host] = startWorker(
+            self.core.prismRoot,
+            self.core.getPythonPath(executable="Prism"),
+            progId,
+            dbPath=queuePath,
+            idleTimeout=idleTimeout,
+        )
+        return self.exportWorkers[host]
+
+    @err_catcher(name=__name__)
+    def openSceneForExport(self, filepath):
+        """
+        Opens a scene for a non-interactive export. Returns (opened, error).
+        opened is the path of the document which was opened for the export,
+        it has to be closed with closeSceneForExport afterwards. Scenes which
+        are open in Illustrator are exported from a copy of the scenefile in
+        a separate document, so the document the artist works in is neither
+        switched nor exported with its unsaved changes.
+        """
+        import shutil
+        import tempfile
+
+        if not self.isDocumentOpen(filepath):
+            if not self.openScene(origin=None, filepath=filepath):
+                return None, "Failed to open %s" % filepath
+
+            return filepath, None
+
+        folder = tempfile.mkdtemp(prefix="PrismIllustratorExport_")
+        copyPath = os.path.join(folder, os.path.basename(filepath))
+        try:
+            shutil.copy2(filepath, copyPath)
+        except OSError as e:
+            shutil.rmtree(folder, ignore_errors=True)
+            return None, "Failed to copy %s: %s" % (filepath, e)
+
+        self.exportCopies[copyPath] = folder
+        self.openDocument(copyPath)
+        return copyPath, None
+
+    @err_catcher(name=__name__)
+    def closeSceneForExport(self, opened):
+        import shutil
+
+        try:
+            if self.activateOpenDocument(opened):
+                self.closeActiveDocument(save=False)
+        finally:
+            folder = self.exportCopies.pop(opened, None)
+            if folder:
+                shutil.rmtree(folder, ignore_errors=True)
+
+    @err_catcher(name=__name__)
+    def isDocumentOpen(self, filepath):
+        """
+        Returns True if the document of filepath is open in Illustrator,
+        without activating it.
+        """
+        if self.win:
+            return self.getOpenDocumentHost(filepath) is not None
+
+        for target in self.getDocumentPaths(filepath):
+            scpt = """
+                tell application "%s"
+                    repeat with doc in documents
+                        try
+                            if POSIX path of (file path of doc as alias) is "%s" then
+                                return "true"
+                            end if
+                        end try
+                    end repeat
+                    return "false"
+                end tell
+            """ % (
+                self.ilAppName,
+                target,
+            )
+            if self.executeAppleScript(scpt) == "true":
+                return True
+
+        return False
+
+    @err_catcher(name=__name__)
+    def isActiveDocumentModified(self):
+        if self.win:
+            return not self.ilApp.ActiveDocument.Saved
+
+        scpt = """
+            tell application "%s"
+                return modified of current document
+            end tell
+        """ % self.ilAppName
+        return (self.executeAppleScript(scpt) or "").strip() == "true"
+
+    @err_catcher(name=__name__)
+    def closeActiveDocument(self, save=False):
+        if self.win:
+            saveOption = "aiSaveChanges" if save else "aiDoNotSaveChanges"
+            doc = self.ilApp.ActiveDocument
+            docPath = doc.FullName
+            doc.Close(getattr(win32com.client.constants, saveOption))
+            if docPath:
+                self.getConnection().forgetDocument(docPath)
+        else:
+            scpt = """
+                tell application "%s"
+                    close current document saving %s
+                end tell
+            """ % (self.ilAppName, "yes" if save else "no")
+            self.executeAppleScript(scpt)
+
+    @err_catcher(name=__name__)
+    @traced()
+    def exportVariants(self, masterPath, variants, version, details, location="global", fileName=None):
+        """
+        Derives the variants from the exported master image in a thread pool.
+        Each variant is saved as its own media identifier
+        "<identifier>_<variant>" with the version of the master.
+        """
+        jobs = []
+        for variant in variants:
+            task = "%s_%s" % (details["identifier"], variant["name"])
+            outputPath = self.generateExportPath(
+                task, variant["extension"], useVersion=version, location=location, fileName=fileName
+            )[0]
+            jobs.append((outputPath, variant))
+
+        results = createVariants(masterPath, jobs)
+        for result in results:
+            if "error" in result:
+                continue
+
+            addBytesWritten(result["path"])
+            variantDetails = details.copy()
+            variantDetails["identifier"] = "%s_%s" % (details["identifier"], result["variant"]["name"])
+            variantDetails["variantOf"] = masterPath
+            variantDetails["variant"] = result["variant"]
+            variantDetails["resolution"] = [result["width"], result["height"]]
+            self.core.saveVersionInfo(
+                filepath=os.path.dirname(result["path"]),
+                details=variantDetails,
+            )
+
+        return results
+
+    @err_catcher(name=__name__)
+    @traced()
+    def exportScalesToPath(self, outputPath, scales):
+        """
+        Renders the artboard once at the highest scale and downsamples it
+        to the other scales outside of Illustrator.
+        """
+        import tempfile
+
+        maxScale = scales[-1]
+        ext = os.path.splitext(outputPath)[1].lower()
+        if ext == ".png":
+            masterPath = getScaledPath(outputPath, maxScale)
+        else:
+            # downsample from a lossless render, not from a jpg
+            masterPath = tempfile.NamedTemporaryFile(suffix=".png").name.replace("\\", "/")
+
+        if not self.exportImageToPath(masterPath, scale=maxScale * 100) or not os.path.exists(masterPath):
+            return [{"path": masterPath, "variant": {"name": getScaleName(maxScale)}, "error": "Export failed"}]
+
+        jobs = []
+        for scale in scales:
+            path = getScaledPath(outputPath, scale)
+            if path == masterPath:
+                continue
+
+            variant = {"extension": ext, "scale": scale / maxScale, "depth": None, "name": getScaleName(scale)}
+            jobs.append((path, variant))
+
+        results = createVariants(masterPath, jobs)
+        for result in results:
+            if "error" not in result:
+                addBytesWritten(result["path"])
+
+        if masterPath != getScaledPath(outputPath, maxScale):
+            try:
+                os.remove(masterPath)
+            except Exception:
+                pass
+
+        return results
+
+    @err_catcher(name=__name__)
+    @traced()
+    def optimizeSvgExport(self, outputPath, externalizeImages=False):
+        decimals = int(os.getenv("PRISM_ILLUSTRATOR_SVG_DECIMALS", "2"))
+        try:
+            report = optimizeSvg(outputPath, decimals=decimals, externalizeImages=externalizeImages)
+        except Exception as e:
+            logger.warning("failed to optimize %s: %s" % (outputPath, e))
+            return
+
+        logger.info(
+            "optimized %s: %s -> %s bytes (-%.0f%%) in %.2fs"
+            % (outputPath, report["inputSize"], report["outputSize"], report["reduction"] * 100, report["duration"])
+        )
+        return report
+
+    @err_catcher(name=__name__)
+    @traced()
+    def exportTiledToPath(self, outputPath, dpi=300, tileSize=None):
+        """
+        Exports the active artboard as a tiled TIFF. The artboard bounds are
+        moved over the artwork tile by tile and each tile is exported as PNG,
+        while the previous tiles are stitched in a separate thread.
+        """
+        tileSize = tileSize or int(os.getenv("PRISM_ILLUSTRATOR_TILE_SIZE", "2048"))
+        scale = dpi / 72.0 * 100
+        if dpi <= 0 or scale > MAX_HOST_SCALE * 100:
+            return {
+                "path": outputPath,
+                "error": "The resolution has to be between 0 and %s dpi" % int(MAX_HOST_SCALE * 72),
+            }
+
+        activeDoc = self.ilApp.ActiveDocument
+        artboard = activeDoc.Artboards.Item(activeDoc.Artboards.GetActiveArtboardIndex() + 1)
+        rect = list(artboard.ArtboardRect)
+        left, top, right, bottom = rect
+        width = int(round((right - left) * dpi / 72.0))
+        height = int(round((top - bottom) * dpi / 72.0))
+        pointsPerPixel = 72.0 / dpi
+
+        def renderTile(x, y, tileWidth, tileHeight, path):
+            artboard.ArtboardRect = [
+                left + x * pointsPerPixel,
+                top - y * pointsPerPixel,
+                left + (x + tileWidth) * pointsPerPixel,
+                top - (y + tileHeight) * pointsPerPixel,
+            ]
+            if not self.exportImageToPath(path, scale=scale, showErrors=False):
+                raise RuntimeError("Failed to export the tile at %s, %s" % (x, y))
+
+        try:
+            report = exportTiled(renderTile, outputPath, width, height, dpi=dpi, tileSize=tileSize)
+        finally:
+            artboard.ArtboardRect = rect
+
+        if "error" not in report:
+            addBytesWritten(outputPath)
+
+        return report
+
+    @err_catcher(name=__name__)
+    @traced()
+    @hostOperation(fallback=False)
+    def exportImageToPath(self, outputPath, scale=100, pdfProfile=None, showErrors=True):
         ext = os.path.splitext(outputPath)[1].lower()
+        if ext == ".pdf":
+            return self.exportPdfToPath(outputPath, pdfProfile or DEFAULT_PROFILE)
+
+        if self.useHostScripts and ext in EXPORT_FORMATS:
+            return self.exportImageWithScript(outputPath, scale=scale, showErrors=showErrors)
+
         activeDoc = self.ilApp.ActiveDocument
         
         # self.core.popup(f"{activeDoc}")
@@ -856,36 +2149,38 @@ class Prism_Illustrator_Functions(object):
         try:
             # Check if the file extension is supported
             if ext in [".jpg", ".jpeg"]:
-                exportOptions = win32com.client.Dispatch("Illustrator.ExportOptionsJPEG")
+                exportOptions = self.createHostObject("Illustrator.ExportOptionsJPEG")
                 exportOptions.QualitySetting = 100  # Maximum quality
                 exportOptions.AntiAliasing = True
+                exportOptions.VerticalScale = scale
+                exportOptions.HorizontalScale = scale
                 exportType = win32com.client.constants.aiJPEG #1  # Illustrator constant for JPEG
 
             elif ext == ".png":
-                exportOptions = win32com.client.Dispatch("Illustrator.ExportOptionsPNG24")
+                exportOptions = self.createHostObject("Illustrator.ExportOptionsPNG24")
                 exportOptions.AntiAliasing = True
                 exportOptions.Transparency = True  # Maintain transparency
                 exportOptions.ArtBoardClipping = True
-                exportOptions.VerticalScale = 100
-                exportOptions.HorizontalScale = 100
+                exportOptions.VerticalScale = scale
+                exportOptions.HorizontalScale = scale
                 exportType = win32com.client.constants.aiPNG24 #5
 
             elif ext in [".tif", ".tiff"]:
-                exportOptions = win32com.client.Dispatch("Illustrator.ExportOptionsTIFF")
+                exportOptions = self.createHostObject("Illustrator.ExportOptionsTIFF")
                 exportOptions.Resolution = 300  # DPI
                 exportOptions.ByteOrder = 1  # Byte order (1 = IBM PC, 2 = Macintosh)
                 exportOptions.ImageColorSpace = 2  # RGB (2 = RGB, 1 = CMYK)
                 exportType = win32com.client.constants.aiTIFF #9  # Illustrator constant for TIFF
 
             elif ext == ".svg":
-                exportOptions = win32com.client.Dispatch("Illustrator.ExportOptionsSVG")
+                exportOptions = self.createHostObject("Illustrator.ExportOptionsSVG")
                 exportOptions.FontSubsetting = 1  # Subset fonts (1 = None, 2 = Subset)
                 exportOptions.CoordinatePrecision = 2  # Precision for SVG coordinates
                 exportOptions.EmbedRasterImages = True  # Embed raster images
                 exportType =  win32com.client.constants.aiSVG# 3 # Illustrator constant for SVG
 
             elif ext == ".psd":
-                exportOptions = win32com.client.Dispatch("Illustrator.ExportOptionsPhotoshop")
+                exportOptions = self.createHostObject("Illustrator.ExportOptionsPhotoshop")
                 exportOptions.MaximumEditability = True  # Keep layers editable
                 exportOptions.WriteLayers = True  # Export layers
                 exportOptions.Resolution = 300  # DPI
@@ -906,16 +2201,114 @@ class Prism_Illustrator_Functions(object):
 
             if ext == ".ai":
                 #Save the file
-                self.saveScene(None, outputPath)
+                self.saveScene(None, outputPath, isVersion=False)
             else:    
                 # Export the file
                 activeDoc.Export(outputPath, exportType, exportOptions)
+                addBytesWritten(outputPath)
                 return True
 
+        except (HostBusyError, HostTimeoutError):
+            raise
         except Exception as e:
-            self.core.popup(f"Failed to export the file: {str(e)}")
+            self.showExportError(f"Failed to export the file: {str(e)}", showErrors)
             return False
 
+    @err_catcher(name=__name__)
+    def showExportError(self, msg, showErrors=True):
+        # exports which are part of a larger export only log their errors,
+        # the caller reports the failure once
+        if showErrors:
+            self.core.popup(msg)
+        else:
+            logger.warning(msg)
+
+
+    @err_catcher(name=__name__)
+    def exportImageWithScript(self, outputPath, scale=100, showErrors=True):
+        """
+        Exports the active document with one host script instead of creating
+        and filling the export options with single COM calls. This also
+        works on macOS.
+        """
+        args = {
+            "path": outputPath.replace("\\", "/"),
+            "format": EXPORT_FORMATS[os.path.splitext(outputPath)[1].lower()],
+            "scale": scale,
+        }
+        try:
+            result = self.runHostScript(EXPORT_SCRIPT, args, name="exportImageToPath")
+        except HostScriptError as e:
+            self.showExportError("Failed to export the file: %s" % e, showErrors)
+            return False
+
+        if not result or not result.get("exists"):
+            self.showExportError("Failed to export the file, it wasn't written:\n\n%s" % outputPath, showErrors)
+            return False
+
+        addBytesWritten(outputPath)
+        return True
+
+    @err_catcher(name=__name__)
+    @traced()
+    def exportPdfToPath(self, outputPath, profileName=DEFAULT_PROFILE):
+        """
+        Saves a PDF copy of the active document with the options of a PDF
+        profile. Illustrator can only write PDFs with SaveAs, which switches
+        the document to the PDF, so a copy of the scenefile is opened and
+        saved instead. The open document and its undo history stay untouched.
+        """
+        import shutil
+        import tempfile
+
+        profiles = getPdfProfiles()
+        if profileName not in profiles:
+            self.core.popup("Unknown PDF profile: %s" % profileName)
+            return False
+
+        try:
+            scenePath = self.runHostScript(CURRENT_FILE_SCRIPT, name="getCurrentFileName")
+        except HostScriptError as e:
+            self.core.popup("Failed to export the PDF: %s" % e)
+            return False
+
+        if not scenePath or not os.path.exists(scenePath):
+            self.core.popup("Please save the scene before exporting a PDF.")
+            return False
+
+        if self.isActiveDocumentModified():
+            result = self.core.popupQuestion(
+                "The scene has unsaved changes. The PDF is exported from the last saved state of the scene.\n\nExport anyway?",
+                buttons=["Export", "Cancel"],
+            )
+            if result != "Export":
+                return False
+
+        tmpFolder = tempfile.mkdtemp(prefix="PrismIllustratorPdf_")
+        copyPath = os.path.join(tmpFolder, os.path.basename(scenePath))
+        args = {
+            "copy": copyPath.replace("\\", "/"),
+            "path": outputPath.replace("\\", "/"),
+            "options": getScriptOptions(profiles[profileName]),
+        }
+        try:
+            shutil.copy2(scenePath, copyPath)
+            result = self.runHostScript(PDF_SCRIPT, args, name="exportPdfToPath")
+        except HostScriptError as e:
+            self.core.popup("Failed to export the PDF: %s" % e)
+            return False
+        finally:
+            shutil.rmtree(tmpFolder, ignore_errors=True)
+
+        for warning in (result or {}).get("warnings", []):
+            logger.warning("PDF profile %s: %s" % (profileName, warning))
+
+        if not result or not result.get("exists"):
+            self.core.popup("Failed to export the PDF, it wasn't written:\n\n%s" % outputPath)
+            return False
+
+        addBytesWritten(outputPath)
+        return True
 
     @err_catcher(name=__name__)
     def isUsingMasterVersion(self):
@@ -930,6 +2323,7 @@ class Prism_Illustrator_Functions(object):
         return True
 
     @err_catcher(name=__name__)
+    @traced()
     def handleMasterVersion(self, outputName):
         if not self.isUsingMasterVersion():
             return
@@ -941,6 +2335,7 @@ class Prism_Illustrator_Functions(object):
             self.core.mediaProducts.addToMasterVersion(outputName, mediaType="2drenders")
 
     @err_catcher(name=__name__)
+    @traced()
     def captureViewportThumbnail(self):
         import tempfile
         path = tempfile.NamedTemporaryFile(suffix=".jpg").name
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Runs all calls to the Illustrator COM server in one dispatcher thread, which
+owns the COM connection. Each operation has a deadline and the calling thread
+waits for each call only until the deadline of the current operation, so a
+modal dialog in Illustrator can't freeze Prism. After a timeout the host is
+marked as busy, queued calls are cancelled and further calls fail immediately
+until the hung call returned.
+
+    dispatcher = HostDispatcher()
+    app = dispatcher.wrap(dispatcher.call(win32com.client.Dispatch, "Illustrator.Application"))
+    with dispatcher.operation("getCurrentFileName"):
+        name = app.ActiveDocument.FullName
+"""
+
+
+import os
+import json
+import time
+import math
+import queue
+import platform
+import functools
+import threading
+import contextlib
+import logging
+
+from Prism_Illustrator_Tracing import countHostCall
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TIMEOUTS = {
+    "getCurrentFileName": 5,
+    "openScene": 120,
+    "saveScene": 300,
+    "exportImageToPath": 900,
+    "placeImages": 300,
+    "startup": 30,
+}
+DEFAULT_TIMEOUT = 60
+
+
+class HostTimeoutError(Exception):
+    pass
+
+
+class HostBusyError(Exception):
+    pass
+
+
+class LatencyHistogram(object):
+    """
+    Histogram with logarithmic buckets from 0.1 ms to about 2.5 hours, so
+    percentiles can be estimated with constant memory.
+    """
+
+    bucketsPerDecade = 20
+    minValue = 0.0001
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        idx = max(0, int(math.log10(max(value, self.minValue) / self.minValue) * self.bucketsPerDecade))
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def getPercentile(self, percentile):
+        if not self.count:
+            return 0.0
+
+        threshold = self.count * percentile / 100.0
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= threshold:
+                # upper bound of the bucket
+                return min(self.minValue * 10 ** ((idx + 1) / float(self.bucketsPerDecade)), self.max)
+
+        return self.max
+
+    def getSummary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.getPercentile(50),
+            "p90": self.getPercentile(90),
+            "p99": self.getPercentile(99),
+            "max": self.max,
+        }
+
+
+class HostCall(object):
+    def __init__(self, func, args, kwargs, operation):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.operation = operation
+        self.done = threading.Event()
+        self.started = None
+        self.cancelled = False
+        self.result = None
+        self.error = None
+
+
+class HostDispatcher(object):
+    def __init__(self, timeouts=None, defaultTimeout=DEFAULT_TIMEOUT, useThread=True):
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update(timeouts or getTimeoutsFromEnvironment())
+        self.defaultTimeout = defaultTimeout
+        self.useThread = useThread
+        self.histograms = {}
+        self.busy = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.calls = queue.Queue()
+        self.thread = None
+        if useThread:
+            self.thread = threading.Thread(target=self.run, name="IllustratorHostDispatcher")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def run(self):
+        comInitialized = False
+        if platform.system() == "Windows":
+            import pythoncom
+
+            pythoncom.CoInitialize()
+            comInitialized = True
+
+        try:
+            while True:
+                call = self.calls.get()
+                if call is None:
+                    break
+
+                if call.cancelled:
+                    continue
+
+                call.started = time.time()
+                try:
+                    call.result = call.func(*call.args, **call.kwargs)
+                except Exception as e:
+                    call.error = e
+
+                call.done.set()
+                with self.lock:
+                    if self.busy and self.busy["call"] is call:
+                        logger.info(
+                            "Illustrator responded again after %.1fs (%s)"
+                            % (time.time() - call.started, call.operation)
+                        )
+                        self.busy = None
+        finally:
+            if comInitialized:
+                pythoncom.CoUninitialize()
+
+    def shutdown(self):
+        if self.thread:
+            self.calls.put(None)
+
+    def getOperationStack(self):
+        if not hasattr(self.local, "operations"):
+            self.local.operations = []
+
+        return self.local.operations
+
+    def getCurrentOperation(self):
+        stack = self.getOperationStack()
+        return stack[-1]["name"] if stack else None
+
+    def getTimeout(self, operation=None):
+        operation = operation or self.getCurrentOperation()
+        return self.timeouts.get(operation, self.defaultTimeout)
+
+    def getRemainingTime(self):
+        """
+        Returns the time a host call may take. Inside an operation this is
+        the time left until the deadline of the operation, so the timeout
+        applies to the whole operation and not to each of its calls.
+        """
+        stack = self.getOperationStack()
+        if not stack:
+            return self.defaultTimeout
+
+        return stack[-1]["deadline"] - time.time()
+
+    @contextlib.contextmanager
+    def operation(self, name):
+        """
+        Host calls inside the block share the timeout of the operation,
+        which starts when the block is entered. The duration of the whole
+        operation is added to its histogram and the duration of each host
+        call to the histogram "<operation>/call".
+        """
+        stack = self.getOperationStack()
+        startTime = time.time()
+        stack.append({"name": name, "deadline": startTime + self.getTimeout(name)})
+        try:
+            yield
+        finally:
+            stack.pop()
+            if name not in [x["name"] for x in stack]:
+                self.addLatency(name, time.time() - startTime)
+
+    def addLatency(self, name, duration):
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = LatencyHistogram()
+
+            self.histograms[name].add(duration)
+
+    def getLatencyStats(self):
+        with self.lock:
+            return dict((name, hist.getSummary()) for name, hist in self.histograms.items())
+
+    def isBusy(self):
+        return self.busy is not None
+
+    def getBusyState(self):
+        busy = self.busy
+        if not busy:
+            return
+
+        return {"operation": busy["operation"], "since": busy["since"], "duration": time.time() - busy["since"]}
+
+    def setBusy(self, operation, call=None):
+        with self.lock:
+            if self.busy:
+                return
+
+            logger.warning("Illustrator didn't respond during %s, marking it as busy" % operation)
+            self.busy = {"operation": operation, "since": time.time(), "call": call}
+
+        # the queued calls would only run after the hung call returned
+        cancelled = self.cancelPending()
+        if cancelled:
+            logger.debug("cancelled %s queued host calls" % cancelled)
+
+    def clearBusy(self):
+        with self.lock:
+            self.busy = None
+
+    def cancelPending(self):
+        """
+        Cancels all calls which didn't start yet. A running COM call can't be
+        interrupted, it has to return by itself.
+        """
+        cancelled = 0
+        while True:
+            try:
+                call = self.calls.get_nowait()
+            except queue.Empty:
+                break
+
+            if call is None:
+                self.calls.put(None)
+                break
+
+            call.cancelled = True
+            call.error = HostBusyError("The call was cancelled")
+            call.done.set()
+            cancelled += 1
+
+        return cancelled
+
+    def call(self, func, *args, **kwargs):
+        countHostCall()
+        operation = self.getCurrentOperation() or "hostCall"
+        if not self.thread or threading.current_thread() is self.thread:
+            return func(*args, **kwargs)
+
+        busy = self.busy
+        if busy:
+            raise HostBusyError(
+                "Illustrator is busy since %.0fs (%s). It might be showing a dialog."
+                % (time.time() - busy["since"], busy["operation"])
+            )
+
+        timeout = self.getRemainingTime()
+        if timeout <= 0:
+            raise HostTimeoutError(
+                "%s didn't finish within %ss." % (operation, self.getTimeout(operation))
+            )
+
+        startTime = time.time()
+        hostCall = HostCall(func, args, kwargs, operation)
+        self.calls.put(hostCall)
+        if not hostCall.done.wait(timeout):
+            hostCall.cancelled = True
+            if hostCall.started:
+                self.setBusy(operation, hostCall)
+
+            raise HostTimeoutError(
+                "Illustrator didn't respond within %ss (%s). It might be showing a dialog."
+                % (self.getTimeout(operation), operation)
+            )
+
+        self.addLatency("%s/call" % operation, time.time() - startTime)
+        if hostCall.error is not None:
+            raise hostCall.error
+
+        return hostCall.result
+
+    def wrap(self, obj):
+        if not hasattr(obj, "_oleobj_"):
+            return obj
+
+        return DispatchedObject(obj, self)
+
+
+class DispatchedObject(object):
+    """
+    Proxy of a COM object. Property reads and writes and method calls run in
+    the dispatcher thread.
+    """
+
+    def __init__(self, obj, dispatcher):
+        object.__setattr__(self, "_hostObject", obj)
+        object.__setattr__(self, "_dispatcher", dispatcher)
+
+    def __getattr__(self, name):
+        value = self._dispatcher.call(getattr, self._hostObject, name)
+        if callable(value) and not hasattr(value, "_oleobj_"):
+            return DispatchedMethod(value, self._dispatcher)
+
+        return self._dispatcher.wrap(value)
+
+    def __setattr__(self, name, value):
+        self._dispatcher.call(setattr, self._hostObject, name, unwrapDispatched(value))
+
+    def __call__(self, *args):
+        args = [unwrapDispatched(x) for x in args]
+        return self._dispatcher.wrap(self._dispatcher.call(self._hostObject, *args))
+
+    def __eq__(self, other):
+        return self._hostObject == unwrapDispatched(other)
+
+    def __hash__(self):
+        return hash(self._hostObject)
+
+    def __bool__(self):
+        return True
+
+
+class DispatchedMethod(object):
+    def __init__(self, method, dispatcher):
+        self.method = method
+        self.dispatcher = dispatcher
+
+    def __call__(self, *args, **kwargs):
+        args = [unwrapDispatched(x) for x in args]
+        kwargs = dict((k, unwrapDispatched(v)) for k, v in kwargs.items())
+        return self.dispatcher.wrap(self.dispatcher.call(self.method, *args, **kwargs))
+
+
+def unwrapDispatched(obj):
+    if isinstance(obj, DispatchedObject):
+        return object.__getattribute__(obj, "_hostObject")
+
+    return obj
+
+
+def getTimeoutsFromEnvironment():
+    """
+    Reads timeout overrides like {"exportImageToPath": 1200} from
+    PRISM_ILLUSTRATOR_HOST_TIMEOUTS.
+    """
+    value = os.getenv("PRISM_ILLUSTRATOR_HOST_TIMEOUTS")
+    if not value:
+        return {}
+
+    try:
+        return dict((key, float(timeout)) for key, timeout in json.loads(value).items())
+    except Exception as e:
+        logger.warning("invalid PRISM_ILLUSTRATOR_HOST_TIMEOUTS: %s" % e)
+        return {}
+
+
+def hostOperation(name=None, fallback=None):
+    """
+    Decorator for plugin methods which talk to Illustrator. The host calls
+    of the method use the timeout of the operation. If the host is busy or
+    doesn't respond, the plugin is notified and fallback is returned.
+    """
+
+    def decorator(func):
+        operationName = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            dispatcher = getattr(self, "hostDispatcher", None)
+            if not dispatcher:
+                return func(self, *args, **kwargs)
+
+            try:
+                with dispatcher.operation(operationName):
+                    return func(self, *args, **kwargs)
+            except (HostBusyError, HostTimeoutError) as e:
+                self.onHostBusy(operationName, e)
+                return fallback
+
+        return wrapper
+
+    return decorator
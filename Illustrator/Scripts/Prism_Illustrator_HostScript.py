@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+"""
+Runs ExtendScript programs in Illustrator with one host call and returns
+their results as JSON. A program is a function body, which gets the
+arguments as "args" and returns a value. Errors inside Illustrator are
+raised as HostScriptError.
+"""
+
+
+import json
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# ExtendScript is ECMAScript 3 and has no JSON object
+SCRIPT_TEMPLATE = r"""// prism:__NAME__
+var args = __ARGS__;
+(function (args) {
+    function stringify(value) {
+        if (value === null || value === undefined) {
+            return "null";
+        }
+        var type = typeof value;
+        if (type == "number") {
+            return isFinite(value) ? String(value) : "null";
+        }
+        if (type == "boolean") {
+            return String(value);
+        }
+        if (type == "string") {
+            return '"' + value.replace(/[\\"\u0000-\u001f]/g, function (c) {
+                if (c == "\\" || c == '"') {
+                    return "\\" + c;
+                }
+                return "\\u" + ("000" + c.charCodeAt(0).toString(16)).slice(-4);
+            }) + '"';
+        }
+        if (value instanceof Array) {
+            var items = [];
+            for (var idx = 0; idx < value.length; idx++) {
+                items.push(stringify(value[idx]));
+            }
+            return "[" + items.join(",") + "]";
+        }
+        if ((typeof File != "undefined" && value instanceof File)
+                || (typeof Folder != "undefined" && value instanceof Folder)) {
+            return stringify(value.fsName);
+        }
+        if (type == "object") {
+            var members = [];
+            for (var key in value) {
+                if (value.hasOwnProperty(key)) {
+                    members.push(stringify(key) + ":" + stringify(value[key]));
+                }
+            }
+            return "{" + members.join(",") + "}";
+        }
+        return stringify(String(value));
+    }
+    try {
+        return stringify({"result": (function (args) {
+__BODY__
+        })(args)});
+    } catch (e) {
+        return stringify({"error": String(e), "line": e.line});
+    }
+})(args);
+"""
+
+
+class HostScriptError(Exception):
+    pass
+
+
+def buildScript(body, args=None, name="script"):
+    """
+    Returns the program, which runs body with args and returns the JSON
+    encoded result as the value of its last statement.
+    """
+    # JSON is a valid JavaScript literal
+    return (
+        SCRIPT_TEMPLATE
+        .replace("__NAME__", name)
+        .replace("__ARGS__", json.dumps(args or {}))
+        .replace("__BODY__", body)
+    )
+
+
+def parseScriptResult(text, name="script"):
+    if not text:
+        raise HostScriptError("%s didn't return a result" % name)
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise HostScriptError("Invalid result of %s: %s" % (name, text[:200]))
+
+    if "error" in data:
+        line = " (line %s)" % data["line"] if data.get("line") else ""
+        raise HostScriptError("%s failed%s: %s" % (name, line, data["error"]))
+
+    return data.get("result")
+
+
+def getScriptName(script):
+    """
+    Returns the name of a program of buildScript.
+    """
+    firstLine = script.split("\n", 1)[0]
+    if firstLine.startswith("// prism:"):
+        return firstLine[len("// prism:"):]
+
+
+def getScriptArgs(script):
+    return json.loads(script.split("\n", 2)[1][len("var args = "):-1])
+
+
+CURRENT_FILE_SCRIPT = """
+            if (!app.documents.length) {
+                return "";
+            }
+            var doc = app.activeDocument;
+            // documents which were never saved have no path
+            return doc.path.fsName ? doc.fullName.fsName : "";
+"""
+
+FIND_DOCUMENT_SCRIPT = """
+            for (var idx = 0; idx < app.documents.length; idx++) {
+                var doc = app.documents[idx];
+                var path = "";
+                try {
+                    path = doc.fullName.fsName;
+                } catch (e) {
+                    continue;
+                }
+                for (var t = 0; t < args.paths.length; t++) {
+                    if (path.replace(/\\\\/g, "/").toLowerCase() == args.paths[t]) {
+                        if (args.activate) {
+                            doc.activate();
+                        }
+                        return path;
+                    }
+                }
+            }
+            return null;
+"""
+
+EXPORT_SCRIPT = """
+            var doc = app.activeDocument;
+            var options;
+            var type;
+            if (args.format == "jpg") {
+                options = new ExportOptionsJPEG();
+                options.qualitySetting = 100;
+                options.antiAliasing = true;
+                options.horizontalScale = args.scale;
+                options.verticalScale = args.scale;
+                type = ExportType.JPEG;
+            } else if (args.format == "png") {
+                options = new ExportOptionsPNG24();
+                options.antiAliasing = true;
+                options.transparency = true;
+                options.artBoardClipping = true;
+                options.horizontalScale = args.scale;
+                options.verticalScale = args.scale;
+                type = ExportType.PNG24;
+            } else if (args.format == "tif") {
+                options = new ExportOptionsTIFF();
+                options.resolution = 300;
+                options.byteOrder = TIFFByteOrder.IBMPC;
+                options.imageColorSpace = ImageColorSpace.RGB;
+                type = ExportType.TIFF;
+            } else if (args.format == "svg") {
+                options = new ExportOptionsSVG();
+                options.fontSubsetting = SVGFontSubsetting.None;
+                options.coordinatePrecision = 2;
+                options.embedRasterImages = true;
+                type = ExportType.SVG;
+            } else if (args.format == "psd") {
+                options = new ExportOptionsPhotoshop();
+                options.maximumEditability = true;
+                options.writeLayers = true;
+                options.resolution = 300;
+                options.imageColorSpace = ImageColorSpace.RGB;
+                type = ExportType.PHOTOSHOP;
+            } else {
+                throw new Error("Unsupported export format: " + args.format);
+            }
+            var file = new File(args.path);
+            doc.exportFile(file, type, options);
+            return {"path": file.fsName, "exists": file.exists};
+"""
+
+EXPORT_FORMATS = {
+    ".jpg": "jpg",
+    ".jpeg": "jpg",
+    ".png": "png",
+    ".tif": "tif",
+    ".tiff": "tif",
+    ".svg": "svg",
+    ".psd": "psd",
+}
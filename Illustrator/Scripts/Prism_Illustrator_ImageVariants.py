@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Derives image variants (formats, scales and color depths) from one lossless
+master render, so Illustrator only has to rasterize an artboard once.
+
+Variants are described with tokens like ".jpg", ".png@0.5", ".tif:16bit",
+".png:gray" or ".png@0.25:indexed". The variants are rendered in a thread
+pool with QImage.
+"""
+
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+LOSSLESS_FORMATS = [".png", ".tif", ".tiff"]
+VARIANT_FORMATS = [".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp"]
+COLOR_DEPTHS = ["8bit", "16bit", "gray", "indexed"]
+SCALE_PRESETS = ["1x", "1x 2x", "1x 2x 3x", "1x 2x 4x"]
+# the maximum of HorizontalScale/VerticalScale of Illustrator's PNG and JPEG export
+MAX_HOST_SCALE = 7.76
+
+
+def parseVariants(text):
+    """
+    Returns a list of variant dicts from a string of variant tokens
+    separated by spaces or commas. Raises ValueError for invalid tokens.
+    """
+    variants = []
+    for token in text.replace(",", " ").split():
+        ext, depth = token, None
+        scale = 1.0
+        if ":" in ext:
+            ext, depth = ext.split(":", 1)
+            if depth not in COLOR_DEPTHS:
+                raise ValueError("Invalid color depth \"%s\", use one of: %s" % (depth, ", ".join(COLOR_DEPTHS)))
+
+        if "@" in ext:
+            ext, scaleStr = ext.split("@", 1)
+            try:
+                scale = float(scaleStr.rstrip("x"))
+            except ValueError:
+                raise ValueError("Invalid scale \"%s\" in \"%s\"" % (scaleStr, token))
+
+        ext = ext.lower()
+        if not ext.startswith("."):
+            ext = "." + ext
+
+        if ext not in VARIANT_FORMATS:
+            raise ValueError("Unsupported variant format \"%s\"" % ext)
+
+        if scale <= 0:
+            raise ValueError("Invalid scale in \"%s\"" % token)
+
+        variant = {"extension": ext, "scale": scale, "depth": depth}
+        variant["name"] = getVariantName(variant)
+        variants.append(variant)
+
+    return variants
+
+
+def getVariantName(variant):
+    name = variant["extension"].strip(".")
+    if variant.get("scale", 1.0) != 1.0:
+        name += "_%s" % int(round(variant["scale"] * 100))
+
+    if variant.get("depth"):
+        name += "_%s" % variant["depth"]
+
+    return name
+
+
+def parseScales(text):
+    """
+    Returns the sorted list of scale factors of a string like "1x 2x 4x".
+    Raises ValueError for invalid scales.
+    """
+    scales = set()
+    for token in text.replace(",", " ").split():
+        try:
+            scale = float(token.lower().rstrip("x"))
+        except ValueError:
+            raise ValueError("Invalid scale \"%s\"" % token)
+
+        if scale <= 0 or scale > MAX_HOST_SCALE:
+            raise ValueError("Scales have to be between 0 and %sx: \"%s\"" % (MAX_HOST_SCALE, token))
+
+        scales.add(scale)
+
+    return sorted(scales)
+
+
+def getScaleName(scale):
+    return ("%g" % scale) + "x"
+
+
+def getScaledPath(path, scale):
+    """
+    Returns the path of a scale of an image. 1x uses path itself, other
+    scales get a "@2x" suffix like for web and UI assets.
+    """
+    if scale == 1.0:
+        return path
+
+    base, ext = os.path.splitext(path)
+    return "%s@%s%s" % (base, getScaleName(scale), ext)
+
+
+def renderVariant(masterPath, outputPath, variant):
+    """
+    Writes one variant of the master image. This runs in a worker thread.
+    """
+    from qtpy.QtCore import Qt
+    from qtpy.QtGui import QImage, QPainter
+
+    startTime = time.time()
+    image = QImage(masterPath)
+    if image.isNull():
+        raise Exception("Failed to read the master image: %s" % masterPath)
+
+    scale = variant.get("scale", 1.0)
+    if scale != 1.0:
+        width = max(1, int(round(image.width() * scale)))
+        height = max(1, int(round(image.height() * scale)))
+        image = image.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+    ext = variant["extension"]
+    depth = variant.get("depth")
+    if depth == "gray":
+        image = image.convertToFormat(QImage.Format_Grayscale8)
+    elif depth == "indexed":
+        image = image.convertToFormat(QImage.Format_Indexed8, Qt.ThresholdDither)
+    elif depth == "16bit":
+        image = image.convertToFormat(QImage.Format_RGBA64)
+    elif ext in [".jpg", ".jpeg"]:
+        # jpg has no alpha, composite onto white instead of black
+        flat = QImage(image.size(), QImage.Format_RGB32)
+        flat.fill(Qt.white)
+        painter = QPainter(flat)
+        painter.drawImage(0, 0, image)
+        painter.end()
+        image = flat
+
+    folder = os.path.dirname(outputPath)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    quality = variant.get("quality", 95 if ext in [".jpg", ".jpeg", ".webp"] else -1)
+    if not image.save(outputPath, None, quality):
+        raise Exception("Failed to write %s" % outputPath)
+
+    return {
+        "path": outputPath,
+        "variant": variant,
+        "width": image.width(),
+        "height": image.height(),
+        "size": os.path.getsize(outputPath),
+        "duration": time.time() - startTime,
+    }
+
+
+def createVariants(masterPath, jobs, threads=None):
+    """
+    Renders the variants in a thread pool. jobs is a list of
+    (outputPath, variant). Returns a list of result dicts in the order of the
+    jobs, failed variants have an "error" key.
+    """
+    # QImage releases the GIL while scaling and encoding, so threads render in
+    # parallel. Worker processes would be spawned on Windows and macOS, which
+    # re-imports the __main__ module of the menu tools in every worker.
+    if not jobs:
+        return []
+
+    threads = threads or min(len(jobs), max(1, (os.cpu_count() or 2) - 1))
+    results = []
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(renderVariant, masterPath, outputPath, variant)
+            for outputPath, variant in jobs
+        ]
+        for future, (outputPath, variant) in zip(futures, jobs):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"path": outputPath, "variant": variant, "error": str(e)})
+
+    return results
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+"""
+Inspection sidecars of scene versions. When a scene is saved, one host
+script collects its layers, artboards, linked files, swatches and fonts,
+which are written next to the scenefile as "<scene>inspection.json". Tools
+can filter scenes by this data without Illustrator or parsing .ai files.
+"""
+
+
+import os
+import sys
+import json
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA_VERSION = 1
+SIDECAR_SUFFIX = "inspection.json"
+FILTER_KEYS = {
+    "layer": "layers",
+    "artboard": "artboards",
+    "link": "links",
+    "swatch": "swatches",
+    "font": "fonts",
+}
+
+INSPECTION_SCRIPT = """
+            var doc = app.activeDocument;
+            function getKeys(obj) {
+                var keys = [];
+                for (var key in obj) {
+                    if (obj.hasOwnProperty(key)) {
+                        keys.push(key);
+                    }
+                }
+                return keys;
+            }
+            function collectLayers(layers, prefix, result) {
+                for (var idx = 0; idx < layers.length; idx++) {
+                    var layer = layers[idx];
+                    var name = prefix + layer.name;
+                    result.push({"name": name, "visible": layer.visible, "locked": layer.locked});
+                    collectLayers(layer.layers, name + "/", result);
+                }
+                return result;
+            }
+            var artboards = [];
+            for (var idx = 0; idx < doc.artboards.length; idx++) {
+                var rect = doc.artboards[idx].artboardRect;
+                artboards.push({"name": doc.artboards[idx].name, "width": rect[2] - rect[0], "height": rect[1] - rect[3]});
+            }
+            var links = {};
+            for (var idx = 0; idx < doc.placedItems.length; idx++) {
+                try {
+                    links[doc.placedItems[idx].file.fsName] = true;
+                } catch (e) {
+                    // missing links have no file
+                }
+            }
+            for (var idx = 0; idx < doc.rasterItems.length; idx++) {
+                try {
+                    if (!doc.rasterItems[idx].embedded) {
+                        links[doc.rasterItems[idx].file.fsName] = true;
+                    }
+                } catch (e) {
+                }
+            }
+            var swatches = [];
+            for (var idx = 0; idx < doc.swatches.length; idx++) {
+                var swatchName = doc.swatches[idx].name;
+                if (swatchName != "[None]" && swatchName != "[Registration]") {
+                    swatches.push(swatchName);
+                }
+            }
+            var fonts = {};
+            for (var idx = 0; idx < doc.textFrames.length; idx++) {
+                var paragraphs = doc.textFrames[idx].paragraphs;
+                for (var p = 0; p < paragraphs.length; p++) {
+                    try {
+                        fonts[paragraphs[p].characterAttributes.textFont.name] = true;
+                    } catch (e) {
+                        // empty paragraphs have no attributes
+                    }
+                }
+            }
+            return {
+                "document": {
+                    "width": doc.width,
+                    "height": doc.height,
+                    "colorSpace": String(doc.documentColorSpace).replace("DocumentColorSpace.", ""),
+                    "rulerUnits": String(doc.rulerUnits).replace("RulerUnits.", "")
+                },
+                "layers": collectLayers(doc.layers, "", []),
+                "artboards": artboards,
+                "links": getKeys(links),
+                "swatches": swatches,
+                "fonts": getKeys(fonts)
+            };
+"""
+
+
+def getSidecarPath(scenePath):
+    return os.path.splitext(scenePath)[0] + SIDECAR_SUFFIX
+
+
+def writeSidecar(scenePath, data):
+    """
+    Writes the inspection data of a scene atomically and returns the path of
+    the sidecar.
+    """
+    data = dict(data)
+    data["schema"] = SCHEMA_VERSION
+    data["scene"] = os.path.basename(scenePath)
+    data["inspected"] = time.time()
+    path = getSidecarPath(scenePath)
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+    os.replace(tmpPath, path)
+    return path
+
+
+def readSidecar(scenePath):
+    path = getSidecarPath(scenePath)
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return
+
+
+def parseFilters(text):
+    """
+    Returns a filter dict of a string like "layer:BG font:Helvetica".
+    Raises ValueError for unknown keys.
+    """
+    filters = {}
+    for token in text.split():
+        if ":" not in token:
+            raise ValueError("Invalid filter \"%s\", use <key>:<value>" % token)
+
+        key, value = token.split(":", 1)
+        if key not in FILTER_KEYS:
+            raise ValueError("Unknown filter \"%s\", use one of: %s" % (key, ", ".join(sorted(FILTER_KEYS))))
+
+        filters.setdefault(key, []).append(value.lower())
+
+    return filters
+
+
+def getNames(data, key):
+    names = []
+    for item in data.get(FILTER_KEYS[key]) or []:
+        name = item["name"] if isinstance(item, dict) else item
+        names.append(name.lower())
+        if key == "link":
+            names.append(os.path.basename(name.replace("\\", "/")).lower())
+
+    return names
+
+
+def matchesFilters(data, filters):
+    """
+    Returns True if every filter value is part of at least one name of its
+    key, like a layer name or a font name.
+    """
+    for key, values in filters.items():
+        names = getNames(data, key)
+        for value in values:
+            if not any(value in name for name in names):
+                return False
+
+    return True
+
+
+def findSidecars(root):
+    for folder, folders, files in os.walk(root):
+        for filename in files:
+            if filename.endswith(SIDECAR_SUFFIX):
+                yield os.path.join(folder, filename)
+
+
+def searchScenes(root, filters):
+    """
+    Returns (scenePath, data) of all scenes below root whose sidecars match
+    filters.
+    """
+    matches = []
+    for path in findSidecars(root):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug("Failed to read %s: %s" % (path, e))
+            continue
+
+        if matchesFilters(data, filters):
+            scenePath = os.path.join(os.path.dirname(path), data.get("scene", ""))
+            matches.append((scenePath, data))
+
+    return sorted(matches)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find Illustrator scenes by their inspection sidecars")
+    parser.add_argument("root")
+    parser.add_argument("filters", nargs="+", help="filters like layer:BG font:Helvetica link:logo.png")
+    args = parser.parse_args()
+    for scenePath, data in searchScenes(args.root, parseFilters(" ".join(args.filters))):
+        print(scenePath)
+
+    sys.exit(0)
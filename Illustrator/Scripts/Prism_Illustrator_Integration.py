@@ -33,7 +33,12 @@
 
 import os
 import sys
+import json
+import time
+import hashlib
 import platform
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from qtpy.QtCore import *
 from qtpy.QtGui import *
@@ -85,6 +90,159 @@ class Prism_Illustrator_Integration(object):
         except:
             return None
 
+    def getIntegrationManifest(self):
+        """
+        Returns the manifest which lists the integration files and where they
+        get installed. It drives installation as well as removal.
+        """
+        integrationBase = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), "Integration"
+        )
+        with open(os.path.join(integrationBase, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+
+        if platform.system() == "Windows":
+            osName = "Windows"
+        elif platform.system() == "Darwin":
+            osName = "Mac"
+
+        manifest["sourceFolder"] = os.path.join(integrationBase, osName)
+        return manifest
+
+    def getTemplatedIntegrationFiles(self):
+        """
+        Reads and templates the integration files once per process and
+        returns them as {name: (content, checksum)}.
+        """
+        if getattr(self, "templatedIntegrationFiles", None):
+            return self.templatedIntegrationFiles
+
+        manifest = self.getIntegrationManifest()
+        files = {}
+        for i in manifest["files"]:
+            origFile = os.path.join(manifest["sourceFolder"], i)
+            with open(origFile, "r") as init:
+                initStr = init.read()
+
+            initStr = initStr.replace("PLUGINROOT", "%s" % os.path.dirname(self.pluginPath).replace("\\", "/"))
+            initStr = initStr.replace("PRISMROOT", "%s" % self.core.prismRoot)
+            initStr = initStr.replace("PRISMLIBS", "%s" % self.core.prismLibs)
+            files[i] = (initStr, self.getIntegrationChecksum(initStr))
+
+        self.templatedIntegrationFiles = files
+        return files
+
+    def getIntegrationChecksum(self, content):
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def getInstalledIntegrationChecksum(self, path):
+        if not os.path.exists(path):
+            return
+
+        try:
+            with open(path, "r") as f:
+                return self.getIntegrationChecksum(f.read())
+        except Exception:
+            return
+
+    def getIntegrationRecord(self, scriptdir):
+        manifest = self.getIntegrationManifest()
+        recordPath = os.path.join(scriptdir, manifest["record"])
+        if not os.path.exists(recordPath):
+            return {}
+
+        try:
+            with open(recordPath, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def syncIntegrationFiles(self, installPath, direct=False):
+        """
+        Writes only the integration files whose templated checksum differs
+        from the installed file and returns a report of what was done.
+        With direct=True the files are written from the calling thread instead
+        of going through core.runFileCommands, which is used for concurrent
+        installs. Files which failed are reported and left to a later run.
+        """
+        startTime = time.time()
+        manifest = self.getIntegrationManifest()
+        scriptdir = os.path.join(installPath, *manifest["scriptFolder"])
+        files = self.getTemplatedIntegrationFiles()
+        record = self.getIntegrationRecord(scriptdir)
+        report = {"installPath": installPath, "scriptFolder": scriptdir, "files": []}
+
+        cmds = []
+        if not os.path.exists(scriptdir):
+            cmds.append({"type": "createFolder", "args": [scriptdir]})
+
+        for name, (content, checksum) in files.items():
+            targetFile = os.path.join(scriptdir, name)
+            if self.getInstalledIntegrationChecksum(targetFile) == checksum:
+                action = "unchanged"
+            else:
+                cmds.append({"type": "writeToFile", "args": [targetFile, content]})
+                action = "updated"
+
+            report["files"].append({"name": name, "checksum": checksum, "action": action})
+
+        for name in record.get("files", {}):
+            if name in files:
+                continue
+
+            targetFile = os.path.join(scriptdir, name)
+            if os.path.exists(targetFile):
+                cmds.append({"type": "removeFile", "args": [targetFile], "validate": False})
+                report["files"].append({"name": name, "checksum": None, "action": "removed"})
+
+        recordData = {
+            "version": self.version,
+            "files": dict((name, checksum) for name, (content, checksum) in files.items()),
+        }
+        if cmds or not record:
+            cmds.append({
+                "type": "writeToFile",
+                "args": [os.path.join(scriptdir, manifest["record"]), json.dumps(recordData, indent=4)],
+            })
+
+        if direct:
+            report["result"] = self.runIntegrationCommands(cmds, report)
+        elif cmds:
+            result = self.core.runFileCommands(cmds)
+            if result is not True:
+                raise Exception(result)
+
+            report["result"] = True
+        else:
+            report["result"] = True
+
+        report["duration"] = time.time() - startTime
+        return report
+
+    def runIntegrationCommands(self, cmds, report):
+        result = True
+        for cmd in cmds:
+            try:
+                if cmd["type"] == "createFolder":
+                    os.makedirs(cmd["args"][0])
+                elif cmd["type"] == "writeToFile":
+                    with open(cmd["args"][0], "w") as f:
+                        f.write(cmd["args"][1])
+                elif cmd["type"] == "removeFile":
+                    os.remove(cmd["args"][0])
+            except Exception as e:
+                name = os.path.basename(cmd["args"][0])
+                for fileReport in report["files"]:
+                    if fileReport["name"] == name:
+                        fileReport["action"] = "failed"
+                        fileReport["error"] = str(e)
+
+                result = False
+                if cmd["type"] == "createFolder":
+                    break
+
+        return result
+
     def addIntegration(self, installPath):
         try:
             if not os.path.exists(installPath):
@@ -97,60 +255,12 @@ class Prism_Illustrator_Integration(object):
                 )
                 return False
 
-            integrationBase = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "Integration"
-            )
+            report = self.syncIntegrationFiles(installPath)
+            if not hasattr(self, "integrationReports"):
+                self.integrationReports = {}
 
-            if platform.system() == "Windows":
-                osName = "Windows"
-            elif platform.system() == "Darwin":
-                osName = "Mac"
-
-            cmds = []
-            scriptdir = os.path.join(installPath, "Presets", "en_US", "Scripts")
-            if not os.path.exists(scriptdir):
-                cmd = {"type": "createFolder", "args": [scriptdir]}
-                cmds.append(cmd)
-
-            for i in [
-                "Prism - 1 Tools.jsx",
-                "Prism - 2 Save Version.jsx",
-                "Prism - 3 Save Extended.jsx",
-                "Prism - 4 Export.jsx",
-                "Prism - 5 Project Browser.jsx",
-                "Prism - 6 Settings.jsx",
-            ]:
-                origFile = os.path.join(integrationBase, osName, i)
-                targetFile = os.path.join(scriptdir, i)
-
-                if os.path.exists(targetFile):
-                    cmd = {
-                        "type": "removeFile",
-                        "args": [targetFile],
-                        "validate": False,
-                    }
-                    cmds.append(cmd)
-
-                cmd = {"type": "copyFile", "args": [origFile, targetFile]}
-                cmds.append(cmd)
-
-                with open(origFile, "r") as init:
-                    initStr = init.read()
-
-                initStr = initStr.replace("PLUGINROOT", "%s" % os.path.dirname(self.pluginPath).replace("\\", "/"))
-                initStr = initStr.replace("PRISMROOT", "%s" % self.core.prismRoot)
-                initStr = initStr.replace("PRISMLIBS", "%s" % self.core.prismLibs)
-
-                cmd = {"type": "writeToFile", "args": [targetFile, initStr]}
-                cmds.append(cmd)
-
-            result = self.core.runFileCommands(cmds)
-            if result is True:
-                return True
-            elif result is False:
-                return False
-            else:
-                raise Exception(result)
+            self.integrationReports[installPath] = report
+            return report["result"]
 
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -165,17 +275,18 @@ class Prism_Illustrator_Integration(object):
 
     def removeIntegration(self, installPath):
         try:
-            for i in [
-                "Prism - 1 Tools.jsx",
-                "Prism - 2 Save version.jsx",
-                "Prism - 3 Save comment.jsx",
-                "Prism - 4 Export",
-                "Prism - 5 ProjectBrowser.jsx",
-                "Prism - 6 Settings.jsx",
-            ]:
-                fPath = os.path.join(installPath, "Presets", "Scripts", i)
-                if os.path.exists(fPath):
-                    os.remove(fPath)
+            manifest = self.getIntegrationManifest()
+            recordName = manifest["record"]
+            scriptdirs = [manifest["scriptFolder"]] + manifest.get("legacyScriptFolders", [])
+            for folder in scriptdirs:
+                scriptdir = os.path.join(installPath, *folder)
+                record = self.getIntegrationRecord(scriptdir)
+                names = set(manifest["files"]) | set(record.get("files", {}))
+                names.add(recordName)
+                for i in names:
+                    fPath = os.path.join(scriptdir, i)
+                    if os.path.exists(fPath):
+                        os.remove(fPath)
 
             return True
         except Exception as e:
@@ -190,6 +301,19 @@ class Prism_Illustrator_Integration(object):
             self.core.popup(msgStr, title="Prism Integration")
             return False
 
+    def writeIntegrationReport(self, reports):
+        reportPath = os.getenv("PRISM_ILLUSTRATOR_INTEGRATION_REPORT") or os.path.join(
+            tempfile.gettempdir(), "Prism_Illustrator_IntegrationReport.json"
+        )
+        try:
+            with open(reportPath, "w") as f:
+                json.dump({"time": time.time(), "installs": reports}, f, indent=4)
+        except Exception as e:
+            print("Failed to write the integration report: %s" % e)
+            return
+
+        return reportPath
+
     def updateInstallerUI(self, userFolders, pItem):
         try:
             psItem = QTreeWidgetItem(["Illustrator"])
@@ -248,13 +372,34 @@ class Prism_Illustrator_Integration(object):
                 if item.checkState(0) == Qt.Checked and os.path.exists(item.text(1)):
                     ilPaths.append(item.text(1))
 
+            # write the files of all versions concurrently. Registering the
+            # integrations afterwards is serial, but only rewrites files which
+            # failed here, e.g. because they need elevated permissions.
+            reports = {}
+            if ilPaths:
+                with ThreadPoolExecutor(max_workers=min(8, len(ilPaths))) as executor:
+                    futures = dict(
+                        (executor.submit(self.syncIntegrationFiles, i, direct=True), i)
+                        for i in ilPaths
+                    )
+                    for future in as_completed(futures):
+                        try:
+                            reports[futures[future]] = future.result()
+                        except Exception as e:
+                            reports[futures[future]] = {"installPath": futures[future], "result": False, "error": str(e)}
+
             for i in ilPaths:
                 result["Illustrator integration"] = self.core.integration.addIntegration(
                     self.plugin.pluginName, path=i, quiet=True
                 )
+                if getattr(self, "integrationReports", {}).get(i):
+                    reports[i]["retry"] = self.integrationReports[i]
+
+                reports[i]["result"] = bool(result["Illustrator integration"])
                 if result["Illustrator integration"]:
                     installLocs.append(i)
 
+            self.writeIntegrationReport(list(reports.values()))
             return installLocs
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
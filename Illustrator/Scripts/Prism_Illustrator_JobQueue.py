@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Durable export job queue in a local SQLite database.
+
+Jobs are enqueued by the export dialog, the batch CLI and watch folders and
+are processed by worker processes, which each own one connection to an
+Illustrator host. A worker leases a job for a limited time. If the worker
+dies, the lease expires and the job is picked up by another worker. Failed
+jobs are retried with a backoff until maxAttempts is reached.
+"""
+
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scene TEXT NOT NULL,
+    target TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    maxAttempts INTEGER NOT NULL DEFAULT 3,
+    source TEXT,
+    owner TEXT,
+    leaseExpires REAL,
+    notBefore REAL NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT,
+    coalesceKey TEXT,
+    host TEXT,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, id);
+"""
+# columns which were added later and are missing in older queues
+ADDED_COLUMNS = [("coalesceKey", "TEXT"), ("host", "TEXT"), ("fingerprint", "TEXT")]
+
+
+def getDefaultQueuePath():
+    return os.getenv("PRISM_ILLUSTRATOR_JOB_QUEUE") or os.path.join(
+        tempfile.gettempdir(), "Prism", "IllustratorJobs.db"
+    )
+
+
+class JobQueue(object):
+    def __init__(self, dbPath=None, leaseTime=600, retryDelay=30):
+        self.dbPath = dbPath or getDefaultQueuePath()
+        self.leaseTime = leaseTime
+        self.retryDelay = retryDelay
+        folder = os.path.dirname(self.dbPath)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.dbPath, timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        columns = [row["name"] for row in self.connection.execute("PRAGMA table_info(jobs)")]
+        for name, definition in ADDED_COLUMNS:
+            if name not in columns:
+                self.connection.execute("ALTER TABLE jobs ADD COLUMN %s %s" % (name, definition))
+
+    def close(self):
+        self.connection.close()
+
+    def enqueue(
+        self, scene, target, priority=0, maxAttempts=3, source="", delay=0, coalesceKey=None, host=None, fingerprint=None
+    ):
+        """
+        Adds a job which is due after delay seconds and returns its id. A job
+        with a coalesceKey replaces the queued jobs with the same key, which
+        weren't leased yet. A job with a host, the major version of an
+        Illustrator instance, is only leased by workers of that version.
+        fingerprint is the content of the scene, see getFingerprint.
+        """
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            if coalesceKey:
+                self.connection.execute(
+                    "DELETE FROM jobs WHERE coalesceKey = ? AND status = 'queued'", (coalesceKey,)
+                )
+
+            cursor = self.connection.execute(
+                """
+                INSERT INTO jobs (
+                    scene, target, priority, maxAttempts, source, notBefore, coalesceKey, host, fingerprint, created
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    scene, json.dumps(target), priority, maxAttempts, source,
+                    time.time() + delay, coalesceKey, host, fingerprint, time.time(),
+                ),
+            )
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return cursor.lastrowid
+
+    def getFingerprint(self, coalesceKey):
+        """
+        Returns the fingerprint of the newest job with coalesceKey, unless
+        that job failed. The job is either done or still waiting, so scenes
+        with this fingerprint don't have to be exported again.
+        """
+        row = self.connection.execute(
+            "SELECT fingerprint, status FROM jobs WHERE coalesceKey = ? ORDER BY id DESC LIMIT 1",
+            (coalesceKey,),
+        ).fetchone()
+        if row and row["status"] != "failed":
+            return row["fingerprint"]
+
+    def hasQueuedJobs(self, host=None):
+        row = self.connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (? IS NULL OR host IS NULL OR host = ?)",
+            (host, host),
+        ).fetchone()
+        return row[0] > 0
+
+    def lease(self, owner, host=None):
+        """
+        Returns the next job as a dict and marks it as leased by owner, or
+        None if no job is due. Jobs with an expired lease are leased again,
+        unless they reached their maximum number of attempts. With host, only
+        jobs of that Illustrator version and jobs without a host are leased.
+        """
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute(
+                """
+                UPDATE jobs SET status = 'failed', finished = ?, error = 'The lease expired in the last attempt'
+                WHERE status = 'leased' AND leaseExpires < ? AND attempts >= maxAttempts
+                """,
+                (now, now),
+            )
+            row = self.connection.execute(
+                """
+                SELECT * FROM jobs
+                WHERE ((status = 'queued' AND notBefore <= ?) OR (status = 'leased' AND leaseExpires < ?))
+                AND (? IS NULL OR host IS NULL OR host = ?)
+                ORDER BY priority DESC, id LIMIT 1
+                """,
+                (now, now, host, host),
+            ).fetchone()
+            if not row:
+                self.connection.execute("COMMIT")
+                return
+
+            self.connection.execute(
+                """
+                UPDATE jobs SET status = 'leased', owner = ?, leaseExpires = ?, started = ?,
+                attempts = attempts + 1 WHERE id = ?
+                """,
+                (owner, now + self.leaseTime, now, row["id"]),
+            )
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        job = dict(row)
+        job["target"] = json.loads(job["target"])
+        job["attempts"] += 1
+        job["owner"] = owner
+        return job
+
+    def renew(self, jobId, owner):
+        cursor = self.connection.execute(
+            "UPDATE jobs SET leaseExpires = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+            (time.time() + self.leaseTime, jobId, owner),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, jobId, owner, result=None):
+        self.connection.execute(
+            "UPDATE jobs SET status = 'done', finished = ?, result = ?, error = NULL WHERE id = ? AND owner = ?",
+            (time.time(), json.dumps(result), jobId, owner),
+        )
+
+    def fail(self, jobId, owner, error):
+        """
+        Queues the job again after a backoff or marks it as failed when it
+        reached its maximum number of attempts.
+        """
+        row = self.connection.execute("SELECT attempts, maxAttempts FROM jobs WHERE id = ?", (jobId,)).fetchone()
+        if row and row["attempts"] < row["maxAttempts"]:
+            notBefore = time.time() + self.retryDelay * 2 ** (row["attempts"] - 1)
+            self.connection.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, notBefore = ?, error = ? WHERE id = ? AND owner = ?",
+                (notBefore, str(error), jobId, owner),
+            )
+        else:
+            self.connection.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = ? WHERE id = ? AND owner = ?",
+                (time.time(), str(error), jobId, owner),
+            )
+
+    def getJob(self, jobId):
+        row = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (jobId,)).fetchone()
+        if not row:
+            return
+
+        job = dict(row)
+        job["target"] = json.loads(job["target"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def getStats(self, window=300):
+        """
+        Returns the number of jobs per status, the queue depth and the
+        number of jobs finished per minute during the last window seconds.
+        """
+        stats = {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+        for row in self.connection.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status"):
+            stats[row["status"]] = row["count"]
+
+        since = time.time() - window
+        finished = self.connection.execute(
+            "SELECT COUNT(*), MIN(finished) FROM jobs WHERE status = 'done' AND finished >= ?", (since,)
+        ).fetchone()
+        stats["depth"] = stats["queued"] + stats["leased"]
+        duration = max(time.time() - max(since, finished[1] or since), 1)
+        stats["jobsPerMinute"] = finished[0] / (duration / 60.0) if finished[0] else 0.0
+        return stats
+
+    def purge(self, olderThan=7 * 24 * 3600):
+        self.connection.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+            (time.time() - olderThan,),
+        )
+
+
+def runWorker(
+    plugin, dbPath=None, workerId=None, pollInterval=1.0, maxJobs=None, idleTimeout=None, retryDelay=30, host=None
+):
+    """
+    Processes jobs with plugin, which owns the connection to one Illustrator
+    host, until maxJobs were processed or the queue was empty for
+    idleTimeout seconds. Jobs which are delayed or wait for a retry keep the
+    worker running. host is the major version of the Illustrator of plugin,
+    the worker only leases the jobs of that version and jobs without a host.
+    Returns the number of processed jobs.
+    """
+    queue = JobQueue(dbPath, retryDelay=retryDelay)
+    workerId = workerId or "%s-%s-%s" % (socket.gethostname(), os.getpid(), uuid.uuid4().hex[:6])
+    processed = 0
+    idleSince = time.time()
+    try:
+        while maxJobs is None or processed < maxJobs:
+            job = queue.lease(workerId, host=host)
+            if not job:
+                if idleTimeout is not None and time.time() - idleSince > idleTimeout:
+                    if not queue.hasQueuedJobs(host=host):
+                        break
+
+                time.sleep(pollInterval)
+                continue
+
+            logger.debug("%s: processing job %s (%s)" % (workerId, job["id"], job["scene"]))
+            try:
+                result = processJob(plugin, job, queue=queue)
+            except Exception as e:
+                result = {"error": str(e)}
+
+            if result and "error" not in result:
+                queue.complete(job["id"], workerId, result)
+            else:
+                queue.fail(job["id"], workerId, (result or {}).get("error", "Export failed"))
+
+            processed += 1
+            idleSince = time.time()
+    finally:
+        queue.close()
+
+    return processed
+
+
+class LeaseRenewer(threading.Thread):
+    """
+    Renews the lease of a job while it is processed, so jobs which take
+    longer than the lease time aren't leased by another worker. It uses its
+    own connection, because SQLite connections can't be shared between threads.
+    """
+
+    def __init__(self, queue, job, interval=None):
+        threading.Thread.__init__(self, name="JobLease-%s" % job["id"])
+        self.daemon = True
+        self.dbPath = queue.dbPath
+        self.leaseTime = queue.leaseTime
+        self.jobId = job["id"]
+        self.owner = job["owner"]
+        self.interval = interval or queue.leaseTime / 3.0
+        self.stopped = threading.Event()
+
+    def run(self):
+        queue = JobQueue(self.dbPath, leaseTime=self.leaseTime)
+        try:
+            while not self.stopped.wait(self.interval):
+                if not queue.renew(self.jobId, self.owner):
+                    logger.warning("lost the lease of job %s" % self.jobId)
+                    break
+        finally:
+            queue.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def processJob(plugin, job, queue=None):
+    renewer = LeaseRenewer(queue, job) if queue else None
+    if renewer:
+        renewer.start()
+
+    try:
+        # scenes the artist has open are exported from a copy in a separate document
+        opened, error = plugin.openSceneForExport(job["scene"])
+        if error:
+            return {"error": error}
+
+        try:
+            return plugin.exportTarget(job["target"], scenePath=job["scene"])
+        finally:
+            if opened:
+                plugin.closeSceneForExport(opened)
+    finally:
+        if renewer:
+            renewer.stop()
+
+
+def workerProcess(pluginFactory, dbPath, workerId, kwargs):
+    plugin = pluginFactory()
+    runWorker(plugin, dbPath=dbPath, workerId=workerId, **kwargs)
+
+
+def startWorkerProcesses(pluginFactory, count, dbPath=None, **kwargs):
+    """
+    Starts count worker processes. pluginFactory is a picklable function which
+    creates a plugin with its own host connection inside the worker process.
+    Returns the processes.
+    """
+    processes = []
+    for idx in range(count):
+        workerId = "%s-worker%s" % (socket.gethostname(), idx + 1)
+        process = multiprocessing.Process(
+            target=workerProcess,
+            args=(pluginFactory, dbPath, workerId, kwargs),
+            name=workerId,
+        )
+        process.daemon = True
+        process.start()
+        processes.append(process)
+
+    return processes
+
+
+def startWorker(prismRoot, pythonPath, progId=None, dbPath=None, idleTimeout=5):
+    """
+    Starts a Worker process of the menu tools with the interpreter of
+    pythonPath, which is core.getPythonPath(executable="Prism"). The worker
+    exits after the queue was empty for idleTimeout seconds. With progId, it
+    connects to that Illustrator instance through PRISM_ILLUSTRATOR_KEY.
+    """
+    menuTools = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Prism_Illustrator_MenuTools.py")
+    env = os.environ.copy()
+    if progId:
+        env["PRISM_ILLUSTRATOR_KEY"] = progId
+        env["PRISM_ILLUSTRATOR_CONNECTION_POOL"] = "0"
+
+    args = [pythonPath, menuTools, prismRoot, "Worker", "--idle-exit", str(idleTimeout)]
+    if dbPath:
+        args += ["--db", dbPath]
+
+    logger.debug("starting a worker for %s" % (progId or "Illustrator"))
+    return subprocess.Popen(args, env=env)
+
+
+def startInstanceWorkers(prismRoot, pythonPath, progIds, dbPath=None, idleTimeout=5):
+    """
+    Starts one Worker process of the menu tools per Illustrator instance,
+    so the jobs of a queue are exported by several Illustrator versions
+    running side by side. Each worker is pinned to its instance through
+    PRISM_ILLUSTRATOR_KEY. Returns the processes.
+    """
+    return [startWorker(prismRoot, pythonPath, progId, dbPath=dbPath, idleTimeout=idleTimeout) for progId in progIds]
@@ -34,6 +34,7 @@
 
 import os
 import sys
+import json
 import platform
 
 prismRoot = sys.argv[1]
@@ -50,12 +51,130 @@ if qapp is None:
     qapp = QApplication(sys.argv)
 
 # pcore = PrismCore.create(app="Illustrator", prismArgs=["splash", "noProjectBrowser"])
-pcore = PrismCore.create(app="Illustrator", prismArgs=["noSplash", "noProjectBrowser"])
+prismArgs = ["noSplash", "noProjectBrowser"]
+if sys.argv[2] in ["Batch", "Worker", "QueueStats"]:
+    prismArgs.append("noUI")
 
+pcore = PrismCore.create(app="Illustrator", prismArgs=prismArgs)
+
+
+if sys.argv[2] == "Package":
+    # Prism_Illustrator_MenuTools.py <prismRoot> Package <scene> <outputFolder> [--zip] [--no-fonts]
+    # doesn't need a connection to Illustrator
+    outputFolder = sys.argv[4]
+    report = pcore.appPlugin.collectForDelivery(
+        sys.argv[3],
+        outputFolder,
+        zipPath=outputFolder.rstrip("/\\") + ".zip" if "--zip" in sys.argv else None,
+        includeFonts="--no-fonts" not in sys.argv,
+    )
+    print(json.dumps(report, indent=4))
+    sys.exit(0 if report and report["result"] else 1)
+
+if sys.argv[2] == "QueueStats":
+    # Prism_Illustrator_MenuTools.py <prismRoot> QueueStats [<queue.db>]
+    from Prism_Illustrator_JobQueue import JobQueue
+
+    queue = JobQueue(sys.argv[3] if len(sys.argv) > 3 else None)
+    print(json.dumps(queue.getStats(), indent=4))
+    sys.exit(0)
 
 if hasattr(pcore.appPlugin, "ilApp") or platform.system() == "Darwin":
     curPrj = pcore.getConfig("globals", "current project")
 
+    if sys.argv[2] == "Batch":
+        # Prism_Illustrator_MenuTools.py <prismRoot> Batch <manifest.json | scene/glob ...>
+        #     [--target <identifier>:<extension>[:product] ...] [--log <results.json>] [--restart]
+        #     [--queue [--priority N]] [--fan-out]
+        import argparse
+        from Prism_Illustrator_BatchExport import BatchExport, findScenes, loadManifest, parseTarget
+
+        parser = argparse.ArgumentParser(prog="Prism_Illustrator_MenuTools.py <prismRoot> Batch")
+        parser.add_argument("inputs", nargs="+")
+        parser.add_argument("--target", action="append", default=[])
+        parser.add_argument("--log", default="")
+        parser.add_argument("--restart", action="store_true")
+        parser.add_argument("--queue", action="store_true", help="add the exports to the job queue")
+        parser.add_argument("--priority", type=int, default=0)
+        parser.add_argument(
+            "--fan-out", action="store_true", help="export with all running Illustrator versions in parallel"
+        )
+        args = parser.parse_args(sys.argv[3:])
+
+        patterns = []
+        targets = [parseTarget(t) for t in args.target]
+        for item in args.inputs:
+            if item.lower().endswith(".json"):
+                manifestPatterns, manifestTargets = loadManifest(item)
+                patterns += manifestPatterns
+                targets += manifestTargets
+            else:
+                patterns.append(item)
+
+        scenes = findScenes(patterns, pcore.appPlugin.sceneFormats)
+        if not scenes or not targets:
+            print("no scenes or no targets to export")
+            sys.exit(1)
+
+        if args.queue:
+            for scene in scenes:
+                for target in targets:
+                    pcore.appPlugin.enqueueExport(target, scene=scene, priority=args.priority, source="batch")
+
+            print("queued %s jobs" % (len(scenes) * len(targets)))
+            sys.exit(0)
+
+        progIds = pcore.appPlugin.getRunningDispatchNames() if args.fan_out else []
+        if len(progIds) > 1:
+            from Prism_Illustrator_JobQueue import JobQueue, startInstanceWorkers
+
+            dbPath = os.path.splitext(args.log or os.path.join(os.getcwd(), "illustrator_batch"))[0] + ".db"
+            queue = JobQueue(dbPath)
+            for scene in scenes:
+                # each scene is exported by the version which has it open or can open it without converting it
+                host = pcore.appPlugin.getSceneHost(scene)
+                for target in targets:
+                    queue.enqueue(scene, target, priority=args.priority, source="batch", host=host)
+
+            processes = startInstanceWorkers(
+                prismRoot, pcore.getPythonPath(executable="Prism"), progIds, dbPath=dbPath
+            )
+            for process in processes:
+                process.wait()
+
+            stats = queue.getStats()
+            queue.close()
+            print(json.dumps(stats, indent=4))
+            print("jobs: %s" % dbPath)
+            sys.exit(0 if not stats["failed"] and not stats["depth"] else 1)
+
+        logPath = args.log or os.path.join(os.getcwd(), "illustrator_batch_results.json")
+        log = BatchExport(pcore.appPlugin, logPath).run(scenes, targets, restart=args.restart)
+        print(json.dumps(log["summary"], indent=4))
+        print("results: %s" % logPath)
+        sys.exit(0 if not log["summary"]["failed"] else 1)
+
+    if sys.argv[2] == "Worker":
+        # Prism_Illustrator_MenuTools.py <prismRoot> Worker [--db <queue.db>] [--max-jobs N] [--idle-exit S]
+        # processes export jobs with the Illustrator host of this process
+        import argparse
+        from Prism_Illustrator_JobQueue import runWorker
+
+        parser = argparse.ArgumentParser(prog="Prism_Illustrator_MenuTools.py <prismRoot> Worker")
+        parser.add_argument("--db", default=None)
+        parser.add_argument("--max-jobs", type=int, default=None)
+        parser.add_argument("--idle-exit", type=float, default=None)
+        args = parser.parse_args(sys.argv[3:])
+        count = runWorker(
+            pcore.appPlugin,
+            dbPath=args.db,
+            maxJobs=args.max_jobs,
+            idleTimeout=args.idle_exit,
+            host=pcore.appPlugin.getHostVersion(),
+        )
+        print("processed %s jobs" % count)
+        sys.exit(0)
+
     result = False
     if sys.argv[2] == "Tools":
         result = pcore.appPlugin.openIllustratorTools()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Profiles for PDF exports. A profile maps properties of Illustrator's
+PDFSaveOptions to values. Values starting with "ai" are names of Illustrator
+constants. Additional profiles can be defined in a JSON file. The PDF is
+saved with PDF_SCRIPT, which works on Windows and macOS.
+"""
+
+
+import os
+import json
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PROFILE = "Review"
+
+PDF_PROFILES = {
+    "Review": {
+        "Compatibility": "aiAcrobat7",
+        "PreserveEditability": False,
+        "GenerateThumbnails": False,
+        "Optimization": True,
+        "CompressArt": True,
+        "FontSubsetThreshold": 100.0,
+        "ColorDownsampling": 150.0,
+        "ColorDownsamplingImageThreshold": 225.0,
+        "ColorDownsamplingMethod": "aiBicubicDownsample",
+        "ColorCompression": "aiJPEGMedium",
+        "GrayscaleDownsampling": 150.0,
+        "GrayscaleDownsamplingImageThreshold": 225.0,
+        "GrayscaleDownsamplingMethod": "aiBicubicDownsample",
+        "GrayscaleCompression": "aiJPEGMedium",
+        "MonochromeDownsampling": 300.0,
+        "MonochromeDownsamplingImageThreshold": 450.0,
+        "MonochromeDownsamplingMethod": "aiBicubicDownsample",
+        "MonochromeCompression": "aiCCIT4",
+    },
+    "Print": {
+        "Compatibility": "aiAcrobat7",
+        "PreserveEditability": False,
+        "GenerateThumbnails": False,
+        "CompressArt": True,
+        "FontSubsetThreshold": 100.0,
+        "ColorDownsampling": 300.0,
+        "ColorDownsamplingImageThreshold": 450.0,
+        "ColorDownsamplingMethod": "aiBicubicDownsample",
+        "ColorCompression": "aiJPEGMaximum",
+        "GrayscaleDownsampling": 300.0,
+        "GrayscaleDownsamplingImageThreshold": 450.0,
+        "GrayscaleDownsamplingMethod": "aiBicubicDownsample",
+        "GrayscaleCompression": "aiJPEGMaximum",
+        "MonochromeDownsampling": 1200.0,
+        "MonochromeDownsamplingImageThreshold": 1800.0,
+        "MonochromeDownsamplingMethod": "aiBicubicDownsample",
+        "MonochromeCompression": "aiCCIT4",
+    },
+    "Editable": {
+        "Compatibility": "aiAcrobat7",
+        "PreserveEditability": True,
+        "CompressArt": True,
+        "FontSubsetThreshold": 100.0,
+        "ColorDownsamplingMethod": "aiNoDownsample",
+        "ColorCompression": "aiZip8bit",
+        "GrayscaleDownsamplingMethod": "aiNoDownsample",
+        "GrayscaleCompression": "aiZip8bit",
+        "MonochromeDownsamplingMethod": "aiNoDownsample",
+        "MonochromeCompression": "aiCCIT4",
+    },
+}
+
+
+def getPdfProfiles(configPath=None):
+    """
+    Returns the default profiles merged with the profiles in configPath or in
+    the file of PRISM_ILLUSTRATOR_PDF_PROFILES. A custom profile can extend
+    another profile with the "base" key.
+    """
+    profiles = {name: dict(profile) for name, profile in PDF_PROFILES.items()}
+    configPath = configPath or os.getenv("PRISM_ILLUSTRATOR_PDF_PROFILES")
+    if not configPath or not os.path.exists(configPath):
+        return profiles
+
+    try:
+        with open(configPath, "r") as f:
+            customProfiles = json.load(f)
+    except Exception as e:
+        logger.warning("failed to read the PDF profiles %s: %s" % (configPath, e))
+        return profiles
+
+    for name, profile in customProfiles.items():
+        base = dict(profiles.get(profile.get("base", ""), {}))
+        base.update({key: value for key, value in profile.items() if key != "base"})
+        profiles[name] = base
+
+    return profiles
+
+
+def getScriptOptions(profile):
+    """
+    Converts a profile to the arguments of PDF_SCRIPT. The properties are
+    renamed to their ExtendScript names and constants like "aiAcrobat7" are
+    passed as {"constant": "ACROBAT7"}, which the script resolves in the
+    enumeration of the property.
+    """
+    options = {}
+    for key, value in profile.items():
+        if isinstance(value, str) and value.startswith("ai"):
+            value = {"constant": value[2:].upper()}
+
+        options[key[:1].lower() + key[1:]] = value
+
+    return options
+
+
+PDF_SCRIPT = """
+            var activeDoc = app.documents.length ? app.activeDocument : null;
+            var enums = {
+                "compatibility": PDFCompatibility,
+                "colorDownsamplingMethod": DownsampleMethod,
+                "grayscaleDownsamplingMethod": DownsampleMethod,
+                "monochromeDownsamplingMethod": DownsampleMethod,
+                "colorCompression": CompressionQuality,
+                "grayscaleCompression": CompressionQuality,
+                "monochromeCompression": MonochromeCompression
+            };
+            var warnings = [];
+            var options = new PDFSaveOptions();
+            for (var key in args.options) {
+                var value = args.options[key];
+                if (value !== null && typeof value == "object") {
+                    if (!enums[key] || enums[key][value.constant] === undefined) {
+                        warnings.push("unknown constant of " + key + ": " + value.constant);
+                        continue;
+                    }
+                    value = enums[key][value.constant];
+                }
+                try {
+                    options[key] = value;
+                } catch (e) {
+                    warnings.push("failed to set " + key + ": " + e);
+                }
+            }
+            // SaveAs switches the document to the PDF, so a copy of the scenefile is saved
+            var doc = app.open(new File(args.copy));
+            try {
+                doc.saveAs(new File(args.path), options);
+            } finally {
+                doc.close(SaveOptions.DONOTSAVECHANGES);
+                if (activeDoc) {
+                    activeDoc.activate();
+                }
+            }
+            var file = new File(args.path);
+            return {"path": file.fsName, "exists": file.exists, "warnings": warnings};
+"""
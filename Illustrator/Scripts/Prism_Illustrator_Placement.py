@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+
+"""
+Places many images in the active document. The placement runs as one
+ExtendScript program through Prism_Illustrator_HostScript, so N images
+cost one host round trip instead of several property calls per image.
+"""
+
+
+import os
+import re
+import math
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+LAYOUTS = ["grid", "layers"]
+
+PLACEMENT_SCRIPT = """
+            var doc = app.activeDocument;
+            var rect = doc.artboards[doc.artboards.getActiveArtboardIndex()].artboardRect;
+            var abWidth = rect[2] - rect[0];
+            var abHeight = rect[1] - rect[3];
+            var count = args.files.length;
+            var columns = args.columns || Math.ceil(Math.sqrt(count));
+            var rows = Math.ceil(count / columns);
+            var cellWidth = (abWidth - args.spacing * (columns - 1)) / columns;
+            var cellHeight = (abHeight - args.spacing * (rows - 1)) / rows;
+            var results = [];
+            for (var idx = 0; idx < count; idx++) {
+                var path = args.files[idx];
+                var item = null;
+                try {
+                    var container = doc.activeLayer;
+                    var left = rect[0];
+                    var top = rect[1];
+                    var width = abWidth;
+                    var height = abHeight;
+                    if (args.layout == "layers") {
+                        container = doc.layers.add();
+                        container.name = decodeURI(new File(path).name);
+                    } else {
+                        left += (idx % columns) * (cellWidth + args.spacing);
+                        top -= Math.floor(idx / columns) * (cellHeight + args.spacing);
+                        width = cellWidth;
+                        height = cellHeight;
+                    }
+                    item = container.placedItems.add();
+                    item.file = new File(path);
+                    var scale = Math.min(width / item.width, height / item.height, 1);
+                    if (scale < 1) {
+                        item.resize(scale * 100, scale * 100);
+                    }
+                    item.left = left;
+                    item.top = top;
+                    results.push({"path": path, "left": item.left, "top": item.top, "width": item.width, "height": item.height});
+                } catch (e) {
+                    if (item) {
+                        item.remove();
+                    }
+                    results.push({"path": path, "error": String(e)});
+                }
+            }
+            return results;
+"""
+
+
+def expandSequence(path, start, end):
+    """
+    Returns the frame paths of a sequence like "render.####.png".
+    """
+    match = re.search("#+", path)
+    if not match or start is None or end is None:
+        return [path]
+
+    padding = len(match.group(0))
+    return [
+        path[:match.start()] + str(frame).zfill(padding) + path[match.end():]
+        for frame in range(int(start), int(end) + 1)
+    ]
+
+
+def getSourceFiles(sources):
+    """
+    Returns the existing image files of sources, which are paths or
+    [path, startFrame, endFrame] lists like the import sources of the media
+    browser.
+    """
+    files = []
+    for source in sources:
+        if isinstance(source, (list, tuple)):
+            files += expandSequence(*(list(source) + [None, None])[:3])
+        else:
+            files.append(source)
+
+    return [os.path.normpath(f) for f in files if os.path.isfile(f)]
+
+
+def getGridCells(count, rect, columns=0, spacing=10):
+    """
+    Returns (left, top, width, height) of count grid cells in an artboard
+    rect [left, top, right, bottom]. Same layout as PLACEMENT_SCRIPT.
+    """
+    columns = columns or int(math.ceil(math.sqrt(count)))
+    rows = int(math.ceil(count / float(columns)))
+    width = (rect[2] - rect[0] - spacing * (columns - 1)) / float(columns)
+    height = (rect[1] - rect[3] - spacing * (rows - 1)) / float(rows)
+    return [
+        (
+            rect[0] + (idx % columns) * (width + spacing),
+            rect[1] - (idx // columns) * (height + spacing),
+            width,
+            height,
+        )
+        for idx in range(count)
+    ]
+
+
+def getPlacementArgs(files, layout="grid", columns=0, spacing=10):
+    """
+    Returns the arguments of PLACEMENT_SCRIPT, which runs through the host
+    script channel.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError("Invalid layout \"%s\", use one of: %s" % (layout, ", ".join(LAYOUTS)))
+
+    return {
+        "files": [f.replace("\\", "/") for f in files],
+        "layout": layout,
+        "columns": columns,
+        "spacing": spacing,
+    }
+
+
+def placeImagesPerItem(doc, files, layout="grid", columns=0, spacing=10):
+    """
+    Places the images with single COM calls. Only used to compare the
+    timing with the placement script.
+    """
+    artboard = doc.Artboards.Item(doc.Artboards.GetActiveArtboardIndex() + 1)
+    rect = list(artboard.ArtboardRect)
+    cells = getGridCells(len(files), rect, columns, spacing)
+    results = []
+    for path, cell in zip(files, cells):
+        if layout == "layers":
+            container = doc.Layers.Add()
+            container.Name = os.path.basename(path)
+            cell = (rect[0], rect[1], rect[2] - rect[0], rect[1] - rect[3])
+        else:
+            container = doc.ActiveLayer
+
+        item = container.PlacedItems.Add()
+        item.File = path
+        scale = min(cell[2] / item.Width, cell[3] / item.Height, 1)
+        if scale < 1:
+            item.Resize(scale * 100, scale * 100)
+
+        item.Left = cell[0]
+        item.Top = cell[1]
+        results.append({
+            "path": path,
+            "left": item.Left,
+            "top": item.Top,
+            "width": item.Width,
+            "height": item.Height,
+        })
+
+    return results
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModifiedCacheError(Exception):
+    """
+    Raised when the local copy of a scene was saved in the host, so it
+    contains work which isn't in the project yet.
+    """
+
+    def __init__(self, source, localPath):
+        super(ModifiedCacheError, self).__init__(
+            "The local copy of %s was modified: %s" % (source, localPath)
+        )
+        self.source = source
+        self.localPath = localPath
+
+
+class SceneCache(object):
+    """
+    Read-through local cache for scene files that live on network storage.
+    Entries are keyed by source path, size and mtime and evicted in LRU order
+    once the cache grows beyond maxSize bytes. The index is shared by all
+    processes which use the cache folder. It records which processes have a
+    local copy open, so no process evicts a copy which is open elsewhere.
+    Local copies which were saved in the host are never evicted.
+    """
+
+    indexName = "index.json"
+    # processes which crashed don't release their copies
+    maxUseAge = 24 * 60 * 60
+
+    def __init__(self, cacheDir=None, maxSize=2 * 1024 ** 3):
+        self.cacheDir = cacheDir or os.path.join(
+            tempfile.gettempdir(), "Prism", "IllustratorSceneCache"
+        )
+        self.maxSize = maxSize
+        self.lock = threading.Lock()
+        self.owner = str(os.getpid())
+        self.entries = self.readIndex()
+
+    def readIndex(self):
+        indexPath = os.path.join(self.cacheDir, self.indexName)
+        if not os.path.exists(indexPath):
+            return {}
+
+        try:
+            with open(indexPath, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning("Failed to read scene cache index: %s" % e)
+            return {}
+
+    def writeIndex(self):
+        if not os.path.exists(self.cacheDir):
+            os.makedirs(self.cacheDir)
+
+        indexPath = os.path.join(self.cacheDir, self.indexName)
+        tmpPath = indexPath + ".tmp"
+        with open(tmpPath, "w") as f:
+            json.dump(self.entries, f, indent=4)
+
+        os.replace(tmpPath, indexPath)
+
+    def normPath(self, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def getKey(self, path, stat):
+        keyStr = "%s|%s|%s" % (self.normPath(path), stat.st_size, int(stat.st_mtime))
+        return hashlib.sha1(keyStr.encode("utf-8")).hexdigest()
+
+    def isCachedPath(self, path):
+        return self.normPath(path).startswith(self.normPath(self.cacheDir) + os.sep)
+
+    def getLocalPath(self, filepath):
+        """
+        Returns a local copy of filepath, copying it into the cache if there
+        is no valid entry yet. Falls back to filepath if caching fails.
+        """
+        if self.isCachedPath(filepath):
+            return filepath
+
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return filepath
+
+        if stat.st_size > self.maxSize:
+            return filepath
+
+        key = self.getKey(filepath, stat)
+        with self.lock:
+            # other processes might have added, used or evicted entries
+            self.entries = self.readIndex()
+            modified = self.getModifiedEntry(filepath)
+            if modified:
+                raise ModifiedCacheError(filepath, modified["local"])
+
+            entry = self.entries.get(key)
+            if entry and self.isEntryValid(entry):
+                entry["lastAccess"] = time.time()
+                entry.setdefault("users", {})[self.owner] = time.time()
+                self.evict()
+                self.writeIndex()
+                logger.debug("scene cache hit: %s" % filepath)
+                return entry["local"]
+
+            if entry:
+                self.removeEntry(key)
+
+            localPath = os.path.join(self.cacheDir, key, os.path.basename(filepath))
+            try:
+                if not os.path.exists(os.path.dirname(localPath)):
+                    os.makedirs(os.path.dirname(localPath))
+
+                shutil.copy2(filepath, localPath)
+            except Exception as e:
+                logger.warning("Failed to cache scene %s: %s" % (filepath, e))
+                return filepath
+
+            localStat = os.stat(localPath)
+            self.entries[key] = {
+                "source": filepath,
+                "local": localPath,
+                "size": stat.st_size,
+                "localMtime": localStat.st_mtime,
+                "lastAccess": time.time(),
+                "users": {self.owner: time.time()},
+            }
+            self.evict()
+            self.writeIndex()
+            logger.debug("scene cache miss: %s" % filepath)
+            return localPath
+
+    def isEntryValid(self, entry):
+        # the local copy is only valid as long as nobody saved over it in the host
+        try:
+            stat = os.stat(entry["local"])
+        except OSError:
+            return False
+
+        return stat.st_size == entry["size"] and stat.st_mtime == entry["localMtime"]
+
+    def isEntryModified(self, entry):
+        """
+        Returns True if the local copy exists and was saved since it was
+        copied. Such copies hold the work of the artist and are kept.
+        """
+        return os.path.exists(entry["local"]) and not self.isEntryValid(entry)
+
+    def getModifiedEntry(self, filepath):
+        normSource = self.normPath(filepath)
+        for entry in self.entries.values():
+            if self.normPath(entry["source"]) == normSource and self.isEntryModified(entry):
+                return entry
+
+    def isEntryInUse(self, entry):
+        minTime = time.time() - self.maxUseAge
+        return any(useTime > minTime for useTime in entry.get("users", {}).values())
+
+    def getSourcePath(self, localPath):
+        if not localPath or not self.isCachedPath(localPath):
+            return None
+
+        normLocal = self.normPath(localPath)
+        for entry in self.entries.values():
+            if self.normPath(entry["local"]) == normLocal:
+                return entry["source"]
+
+    def release(self, localPath):
+        with self.lock:
+            self.entries = self.readIndex()
+            normLocal = self.normPath(localPath)
+            for entry in self.entries.values():
+                if self.normPath(entry["local"]) == normLocal:
+                    entry.get("users", {}).pop(self.owner, None)
+                    self.writeIndex()
+                    break
+
+    def getSize(self):
+        return sum(entry["size"] for entry in self.entries.values())
+
+    def evict(self):
+        size = self.getSize()
+        if size <= self.maxSize:
+            return
+
+        lru = sorted(self.entries.items(), key=lambda x: x[1]["lastAccess"])
+        for key, entry in lru:
+            if size <= self.maxSize:
+                break
+
+            if self.isEntryInUse(entry) or self.isEntryModified(entry):
+                continue
+
+            if self.removeEntry(key):
+                size -= entry["size"]
+
+    def removeEntry(self, key):
+        entry = self.entries[key]
+        try:
+            shutil.rmtree(os.path.dirname(entry["local"]))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # the file is probably still open in the host
+            logger.debug("Failed to evict %s: %s" % (entry["local"], e))
+            return False
+
+        del self.entries[key]
+        return True
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Small key-value cache in a local SQLite database, which is shared by the
+Prism process and the short-lived menu tool processes. Values are stored
+as JSON and expire after a TTL or when the modification time of the file
+they depend on (like the project config) changed.
+"""
+
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL,
+    dependency TEXT,
+    dependencyMtime REAL
+);
+"""
+
+
+def getDefaultCachePath():
+    return os.getenv("PRISM_ILLUSTRATOR_SHARED_CACHE") or os.path.join(
+        tempfile.gettempdir(), "Prism", "IllustratorCache.db"
+    )
+
+
+def getMtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return
+
+
+class SharedCache(object):
+    """
+    Failures of the database are logged and treated as cache misses, so a
+    locked or broken cache never stops the plugin.
+    """
+
+    def __init__(self, dbPath=None, defaultTtl=600):
+        self.dbPath = dbPath or getDefaultCachePath()
+        self.defaultTtl = defaultTtl
+        folder = os.path.dirname(self.dbPath)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.dbPath, timeout=5, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, key, default=None):
+        try:
+            row = self.connection.execute(
+                "SELECT value, expires, dependency, dependencyMtime FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug("failed to read %s from the shared cache: %s" % (key, e))
+            return default
+
+        if not row:
+            return default
+
+        value, expires, dependency, dependencyMtime = row
+        if expires < time.time():
+            return default
+
+        if dependency and getMtime(dependency) != dependencyMtime:
+            return default
+
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None, dependsOn=None):
+        """
+        Stores a JSON serializable value. With dependsOn the value is only
+        valid as long as that file isn't modified.
+        """
+        try:
+            data = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.debug("can't cache %s: %s" % (key, e))
+            return False
+
+        expires = time.time() + (self.defaultTtl if ttl is None else ttl)
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires, dependency, dependencyMtime) VALUES (?, ?, ?, ?, ?)",
+                (key, data, expires, dependsOn, getMtime(dependsOn) if dependsOn else None),
+            )
+        except sqlite3.Error as e:
+            logger.debug("failed to write %s to the shared cache: %s" % (key, e))
+            return False
+
+        return True
+
+    def getOrCompute(self, key, compute, ttl=None, dependsOn=None):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value, ttl=ttl, dependsOn=dependsOn)
+
+        return value
+
+    def invalidate(self, prefix=""):
+        try:
+            self.connection.execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        except sqlite3.Error as e:
+            logger.debug("failed to invalidate the shared cache: %s" % e)
+
+    def purge(self):
+        try:
+            self.connection.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.debug("failed to purge the shared cache: %s" % e)
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Streaming optimizer for SVG files exported from Illustrator.
+
+The file is read twice with a SAX parser, so the memory usage doesn't depend on
+the file size. The first pass collects the referenced IDs, the second pass
+writes the optimized file:
+
+- numbers in geometry attributes are rounded to a number of decimals
+- IDs which aren't referenced by attributes or by selectors in <style> are removed
+- groups without attributes are unwrapped
+- Illustrator's private data and metadata are dropped
+- embedded raster images can be written to files next to the SVG
+"""
+
+
+import os
+import re
+import sys
+import time
+import base64
+import logging
+import xml.sax
+from xml.sax.handler import feature_external_ges, feature_external_pes
+from xml.sax.saxutils import XMLGenerator
+
+
+logger = logging.getLogger(__name__)
+
+
+NUMBER_ATTRIBUTES = [
+    "d", "points", "transform", "viewBox", "x", "y", "width", "height",
+    "cx", "cy", "r", "rx", "ry", "x1", "y1", "x2", "y2", "fx", "fy",
+    "stroke-width", "font-size", "stroke-miterlimit",
+]
+DROPPED_ELEMENTS = ["metadata", "i:pgf", "sfw", "switch:i:pgf"]
+ILLUSTRATOR_NAMESPACE = "ns.adobe.com/AdobeIllustrator/"
+TEXT_ELEMENTS = ["text", "tspan", "style", "textPath", "title", "desc", "script"]
+IMAGE_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/jpg": ".jpg", "image/gif": ".gif"}
+
+numberRegex = re.compile(r"-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+referenceRegex = re.compile(r"url\(\s*['\"]?#([^)'\"]+)['\"]?\s*\)")
+# also matches hex colors, which only keeps a few IDs more than necessary
+selectorRegex = re.compile(r"#(-?[_a-zA-Z][\w-]*)")
+
+
+def roundNumbers(value, decimals):
+    def roundMatch(match):
+        text = match.group(0)
+        if "." not in text and "e" not in text.lower():
+            return text
+
+        number = round(float(text), decimals)
+        text = ("%%.%sf" % decimals) % number
+        text = text.rstrip("0").rstrip(".") if "." in text else text
+        if text.startswith("0."):
+            text = text[1:]
+        elif text.startswith("-0."):
+            text = "-" + text[2:]
+
+        return "0" if text in ["", "-", "-0"] else text
+
+    value = numberRegex.sub(roundMatch, value)
+    return " ".join(value.split())
+
+
+def getReferences(value):
+    refs = referenceRegex.findall(value)
+    if value.startswith("#"):
+        refs.append(value[1:])
+
+    return refs
+
+
+def isDroppedElement(name, attrs):
+    if name in DROPPED_ELEMENTS:
+        return True
+
+    # Illustrator's private data is wrapped in a foreignObject which requires its namespace
+    return name == "foreignObject" and ILLUSTRATOR_NAMESPACE in attrs.get("requiredExtensions", "")
+
+
+class ReferenceCollector(xml.sax.handler.ContentHandler):
+    def __init__(self):
+        xml.sax.handler.ContentHandler.__init__(self)
+        self.references = set()
+        self.styleText = None
+
+    def startElement(self, name, attrs):
+        if name == "style":
+            self.styleText = []
+
+        for value in attrs.values():
+            self.references.update(getReferences(value))
+
+    def endElement(self, name):
+        if name == "style" and self.styleText is not None:
+            # the text of an element can be split into several characters calls
+            styleText = "".join(self.styleText)
+            self.references.update(getReferences(styleText))
+            self.references.update(selectorRegex.findall(styleText))
+            self.styleText = None
+
+    def characters(self, content):
+        if self.styleText is not None:
+            self.styleText.append(content)
+
+
+class SvgWriter(xml.sax.handler.ContentHandler):
+    def __init__(self, output, references, decimals=2, keepIds=False, imageFolder=None):
+        xml.sax.handler.ContentHandler.__init__(self)
+        self.generator = XMLGenerator(output, encoding="utf-8", short_empty_elements=True)
+        self.references = references
+        self.decimals = decimals
+        self.keepIds = keepIds
+        self.imageFolder = imageFolder
+        self.stack = []
+        self.dropDepth = 0
+        self.textDepth = 0
+        self.stats = {"removedIds": 0, "collapsedGroups": 0, "droppedElements": 0, "externalizedImages": 0}
+
+    def startDocument(self):
+        self.generator.startDocument()
+
+    def endDocument(self):
+        self.generator.endDocument()
+
+    def startElement(self, name, attrs):
+        if self.dropDepth or isDroppedElement(name, attrs):
+            if not self.dropDepth:
+                self.stats["droppedElements"] += 1
+
+            self.dropDepth += 1
+            return
+
+        newAttrs = {}
+        for key, value in attrs.items():
+            if key == "id" and not self.keepIds and value not in self.references:
+                self.stats["removedIds"] += 1
+                continue
+
+            if key.startswith("i:") or key == "xmlns:i":
+                continue
+
+            if key in NUMBER_ATTRIBUTES and self.decimals is not None:
+                value = roundNumbers(value, self.decimals)
+            elif key in ["xlink:href", "href"] and name == "image" and self.imageFolder:
+                value = self.externalizeImage(value)
+
+            newAttrs[key] = value
+
+        if name == "g" and not newAttrs:
+            self.stats["collapsedGroups"] += 1
+            self.stack.append(False)
+            return
+
+        if name in TEXT_ELEMENTS:
+            self.textDepth += 1
+
+        self.stack.append(True)
+        self.generator.startElement(name, newAttrs)
+
+    def endElement(self, name):
+        if self.dropDepth:
+            self.dropDepth -= 1
+            return
+
+        if not self.stack.pop():
+            return
+
+        if name in TEXT_ELEMENTS:
+            self.textDepth -= 1
+
+        self.generator.endElement(name)
+
+    def characters(self, content):
+        if self.dropDepth:
+            return
+
+        if not self.textDepth and not content.strip():
+            return
+
+        self.generator.characters(content)
+
+    def processingInstruction(self, target, data):
+        pass
+
+    def externalizeImage(self, value):
+        if not value.startswith("data:") or ";base64," not in value:
+            return value
+
+        header, data = value.split(",", 1)
+        mimeType = header[5:].split(";")[0]
+        ext = IMAGE_EXTENSIONS.get(mimeType)
+        if not ext:
+            return value
+
+        if not os.path.exists(self.imageFolder):
+            os.makedirs(self.imageFolder)
+
+        self.stats["externalizedImages"] += 1
+        filename = "image_%04d%s" % (self.stats["externalizedImages"], ext)
+        with open(os.path.join(self.imageFolder, filename), "wb") as f:
+            f.write(base64.b64decode(data))
+
+        return "%s/%s" % (os.path.basename(self.imageFolder), filename)
+
+
+def createParser(handler):
+    parser = xml.sax.make_parser()
+    parser.setFeature(feature_external_ges, False)
+    parser.setFeature(feature_external_pes, False)
+    parser.setContentHandler(handler)
+    return parser
+
+
+def optimizeSvg(inputPath, outputPath=None, decimals=2, keepIds=False, externalizeImages=False):
+    """
+    Optimizes an SVG file. Overwrites inputPath if no outputPath is given.
+    With externalizeImages, embedded raster images are written to the folder
+    "<name>_images" next to the output. Returns a report dict.
+    """
+    startTime = time.time()
+    outputPath = outputPath or inputPath
+    inputSize = os.path.getsize(inputPath)
+
+    collector = ReferenceCollector()
+    createParser(collector).parse(inputPath)
+
+    imageFolder = None
+    if externalizeImages:
+        imageFolder = os.path.splitext(outputPath)[0] + "_images"
+
+    tmpPath = outputPath + ".tmp"
+    try:
+        with open(tmpPath, "wb") as output:
+            writer = SvgWriter(
+                output,
+                collector.references,
+                decimals=decimals,
+                keepIds=keepIds,
+                imageFolder=imageFolder,
+            )
+            createParser(writer).parse(inputPath)
+    except Exception:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+        raise
+
+    os.replace(tmpPath, outputPath)
+    outputSize = os.path.getsize(outputPath)
+    report = {
+        "input": inputPath,
+        "output": outputPath,
+        "inputSize": inputSize,
+        "outputSize": outputSize,
+        "reduction": 1 - outputSize / float(inputSize) if inputSize else 0,
+        "duration": time.time() - startTime,
+    }
+    report.update(writer.stats)
+    logger.debug(
+        "optimized %s: %.1f KB -> %.1f KB (%.0f%%) in %.2fs"
+        % (inputPath, inputSize / 1024.0, outputSize / 1024.0, report["reduction"] * 100, report["duration"])
+    )
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Optimize SVG files exported from Illustrator")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--decimals", type=int, default=2)
+    parser.add_argument("--keep-ids", action="store_true")
+    parser.add_argument("--externalize-images", action="store_true")
+    args = parser.parse_args()
+    for path in args.files:
+        result = optimizeSvg(
+            path,
+            decimals=args.decimals,
+            keepIds=args.keep_ids,
+            externalizeImages=args.externalize_images,
+        )
+        print("%s: %s -> %s bytes (%.0f%%) in %.2fs" % (
+            path, result["inputSize"], result["outputSize"], result["reduction"] * 100, result["duration"]
+        ))
+
+    sys.exit(0)
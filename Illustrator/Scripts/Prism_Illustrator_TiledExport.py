@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Tiled export of artboards which are too large to be rasterized by Illustrator
+in one piece. The artboard is rendered as a grid of tiles and the tiles are
+streamed into a tiled TIFF, so only a few tiles are kept in memory at any time.
+"""
+
+
+import os
+import math
+import time
+import zlib
+import queue
+import struct
+import shutil
+import logging
+import tempfile
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+# tiff field types
+SHORT = 3
+LONG = 4
+RATIONAL = 5
+LONG8 = 16
+
+TYPE_FORMATS = {SHORT: "H", LONG: "I", RATIONAL: "II", LONG8: "Q"}
+
+
+class TiledTiffWriter(object):
+    """
+    Writes an RGBA image as a tiled TIFF. Tiles can be written in any order
+    and are written to disk immediately, the directory is written on close.
+    BigTIFF is used when the uncompressed image would exceed 4 GB.
+    """
+
+    def __init__(self, path, width, height, tileSize=1024, dpi=300, compress=True):
+        if tileSize % 16:
+            raise ValueError("The tile size has to be a multiple of 16")
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.tileSize = tileSize
+        self.dpi = dpi
+        self.compress = compress
+        self.columns = int(math.ceil(width / float(tileSize)))
+        self.rows = int(math.ceil(height / float(tileSize)))
+        self.offsets = [0] * (self.columns * self.rows)
+        self.byteCounts = [0] * (self.columns * self.rows)
+        self.bigTiff = width * height * 4 > 0xFFFFFFFF - 1024 ** 2
+        self.tmpPath = path + ".tmp"
+        self.file = open(self.tmpPath, "wb")
+        if self.bigTiff:
+            self.file.write(b"II+\x00" + struct.pack("<HHQ", 8, 0, 0))
+        else:
+            self.file.write(b"II*\x00" + struct.pack("<I", 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writeTile(self, column, row, data, bytesPerLine=None):
+        """
+        Writes the RGBA8888 pixels of one tile. Tiles at the right and bottom
+        border can be smaller than the tile size, they are padded.
+        """
+        bytesPerLine = bytesPerLine or self.tileSize * 4
+        tileLine = self.tileSize * 4
+        if bytesPerLine != tileLine or len(data) != tileLine * self.tileSize:
+            lines = []
+            lineCount = min(len(data) // bytesPerLine, self.tileSize)
+            for idx in range(lineCount):
+                line = data[idx * bytesPerLine:idx * bytesPerLine + min(bytesPerLine, tileLine)]
+                lines.append(line + b"\x00" * (tileLine - len(line)))
+
+            lines.append(b"\x00" * (tileLine * (self.tileSize - lineCount)))
+            data = b"".join(lines)
+
+        if self.compress:
+            data = zlib.compress(data, 1)
+
+        idx = row * self.columns + column
+        self.offsets[idx] = self.file.tell()
+        self.byteCounts[idx] = len(data)
+        self.file.write(data)
+
+    def close(self):
+        if self.file.closed:
+            return
+
+        if not all(self.offsets):
+            self.abort()
+            raise Exception("Not all tiles were written to %s" % self.path)
+
+        offsetType = LONG8 if self.bigTiff else LONG
+        entries = [
+            (256, LONG, [self.width]),
+            (257, LONG, [self.height]),
+            (258, SHORT, [8, 8, 8, 8]),
+            (259, SHORT, [8 if self.compress else 1]),
+            (262, SHORT, [2]),
+            (277, SHORT, [4]),
+            (282, RATIONAL, [(int(self.dpi), 1)]),
+            (283, RATIONAL, [(int(self.dpi), 1)]),
+            (284, SHORT, [1]),
+            (296, SHORT, [2]),
+            (322, LONG, [self.tileSize]),
+            (323, LONG, [self.tileSize]),
+            (324, offsetType, self.offsets),
+            (325, offsetType, self.byteCounts),
+            (338, SHORT, [2]),
+        ]
+        inlineSize = 8 if self.bigTiff else 4
+
+        # values which don't fit into an entry are written before the directory
+        packed = []
+        for tag, fieldType, values in entries:
+            fmt = "<" + TYPE_FORMATS[fieldType] * len(values)
+            flat = [v for value in values for v in (value if isinstance(value, tuple) else [value])]
+            data = struct.pack(fmt, *flat)
+            if len(data) > inlineSize:
+                self.alignFile()
+                offset = self.file.tell()
+                self.file.write(data)
+                data = struct.pack("<Q" if self.bigTiff else "<I", offset)
+
+            packed.append((tag, fieldType, len(values), data.ljust(inlineSize, b"\x00")))
+
+        self.alignFile()
+        ifdOffset = self.file.tell()
+        if self.bigTiff:
+            self.file.write(struct.pack("<Q", len(packed)))
+            for tag, fieldType, count, data in packed:
+                self.file.write(struct.pack("<HHQ", tag, fieldType, count) + data)
+
+            self.file.write(struct.pack("<Q", 0))
+            self.file.seek(8)
+            self.file.write(struct.pack("<Q", ifdOffset))
+        else:
+            self.file.write(struct.pack("<H", len(packed)))
+            for tag, fieldType, count, data in packed:
+                self.file.write(struct.pack("<HHI", tag, fieldType, count) + data)
+
+            self.file.write(struct.pack("<I", 0))
+            self.file.seek(4)
+            self.file.write(struct.pack("<I", ifdOffset))
+
+        self.file.close()
+        os.replace(self.tmpPath, self.path)
+
+    def abort(self):
+        if not self.file.closed:
+            self.file.close()
+
+        try:
+            os.remove(self.tmpPath)
+        except OSError:
+            pass
+
+    def alignFile(self):
+        if self.file.tell() % 2:
+            self.file.write(b"\x00")
+
+
+def getTileGrid(width, height, tileSize):
+    """
+    Returns the tiles of an image as a list of
+    (column, row, x, y, width, height) in pixels, row by row.
+    """
+    tiles = []
+    for row in range(int(math.ceil(height / float(tileSize)))):
+        for column in range(int(math.ceil(width / float(tileSize)))):
+            x = column * tileSize
+            y = row * tileSize
+            tiles.append((column, row, x, y, min(tileSize, width - x), min(tileSize, height - y)))
+
+    return tiles
+
+
+def readTile(path, width, height):
+    """
+    Returns the RGBA8888 pixels of a rendered tile image, cropped or padded
+    to width x height, and the bytes per line.
+    """
+    from qtpy.QtGui import QImage
+
+    image = QImage(path)
+    if image.isNull():
+        raise Exception("Failed to read the tile %s" % path)
+
+    if image.width() != width or image.height() != height:
+        # Illustrator can round the tile bounds by one pixel
+        image = image.copy(0, 0, width, height)
+
+    image = image.convertToFormat(QImage.Format_RGBA8888)
+    bits = image.constBits()
+    size = image.sizeInBytes() if hasattr(image, "sizeInBytes") else image.byteCount()
+    if hasattr(bits, "setsize"):
+        bits.setsize(size)
+
+    return bytes(bits)[:size], image.bytesPerLine()
+
+
+def exportTiled(renderTile, outputPath, width, height, dpi=300, tileSize=1024, queueSize=2):
+    """
+    Renders the tiles with renderTile(x, y, width, height, path) in the calling
+    thread, which has to be the thread that talks to the host, while the
+    tiles are stitched into outputPath in a second thread. At most queueSize
+    rendered tiles are waiting to be stitched. Returns a report dict.
+    """
+    startTime = time.time()
+    tiles = getTileGrid(width, height, tileSize)
+    tileDir = tempfile.mkdtemp(prefix="prism_il_tiles_")
+    tileQueue = queue.Queue(maxsize=queueSize)
+    errors = []
+    report = {"path": outputPath, "width": width, "height": height, "tiles": len(tiles)}
+    writer = TiledTiffWriter(outputPath, width, height, tileSize=tileSize, dpi=dpi)
+
+    def stitch():
+        while True:
+            item = tileQueue.get()
+            if item is None:
+                return
+
+            column, row, path, tileWidth, tileHeight = item
+            try:
+                if not errors:
+                    data, bytesPerLine = readTile(path, tileWidth, tileHeight)
+                    writer.writeTile(column, row, data, bytesPerLine)
+            except Exception as e:
+                errors.append(str(e))
+            finally:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    stitcher = threading.Thread(target=stitch, name="TileStitcher")
+    stitcher.daemon = True
+    stitcher.start()
+    renderTime = 0
+    try:
+        for column, row, x, y, tileWidth, tileHeight in tiles:
+            if errors:
+                break
+
+            path = os.path.join(tileDir, "tile_%s_%s.png" % (column, row))
+            renderStart = time.time()
+            renderTile(x, y, tileWidth, tileHeight, path)
+            renderTime += time.time() - renderStart
+            if not os.path.exists(path):
+                errors.append("Failed to render the tile at %s, %s" % (x, y))
+                break
+
+            tileQueue.put((column, row, path, tileWidth, tileHeight))
+    except Exception as e:
+        errors.append(str(e))
+    finally:
+        tileQueue.put(None)
+        stitcher.join()
+        shutil.rmtree(tileDir, ignore_errors=True)
+
+    if errors:
+        writer.abort()
+        report["error"] = errors[0]
+    else:
+        writer.close()
+        report["size"] = os.path.getsize(outputPath)
+
+    report["renderDuration"] = renderTime
+    report["duration"] = time.time() - startTime
+    logger.debug(
+        "tiled export of %s tiles (%sx%s) in %.1fs, %.1fs rendering"
+        % (len(tiles), width, height, report["duration"], renderTime)
+    )
+    return report
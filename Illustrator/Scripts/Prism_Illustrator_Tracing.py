@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Opt-in tracing of the plugin entry points.
+
+Set PRISM_ILLUSTRATOR_TRACE to a folder (or a .json file path) to enable it.
+Every process writes its spans as a Chrome trace (chrome://tracing, Perfetto)
+when it exits. Traces of several workstations can be combined with:
+
+    python Prism_Illustrator_Tracing.py merge <output.json> <trace.json>...
+
+When tracing is disabled, traced() returns the undecorated function and
+wrapHostObject() returns the object itself, so there is no overhead.
+"""
+
+
+import os
+import sys
+import json
+import time
+import socket
+import atexit
+import threading
+import functools
+import contextlib
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class Span(object):
+    def __init__(self, name, args=None):
+        self.name = name
+        self.args = args or {}
+        self.hostCalls = 0
+        self.bytesWritten = 0
+        self.start = None
+
+
+class Tracer(object):
+    def __init__(self, outputPath=None):
+        self.outputPath = outputPath
+        self.enabled = bool(outputPath)
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pid = os.getpid()
+        self.hostname = socket.gethostname()
+        if self.enabled:
+            atexit.register(self.write)
+
+    @classmethod
+    def fromEnv(cls):
+        return cls(os.getenv("PRISM_ILLUSTRATOR_TRACE"))
+
+    def getStack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+
+        return self.local.stack
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        if not self.enabled:
+            yield None
+            return
+
+        span = Span(name, args)
+        stack = self.getStack()
+        stack.append(span)
+        span.start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.args["error"] = str(e)
+            raise
+        finally:
+            duration = time.perf_counter() - span.start
+            stack.pop()
+            if stack:
+                stack[-1].hostCalls += span.hostCalls
+                stack[-1].bytesWritten += span.bytesWritten
+
+            span.args["hostCalls"] = span.hostCalls
+            span.args["bytesWritten"] = span.bytesWritten
+            self.addEvent(span, duration)
+
+    def addEvent(self, span, duration):
+        event = {
+            "name": span.name,
+            "cat": "illustrator",
+            "ph": "X",
+            "ts": int((time.time() - duration) * 1000000),
+            "dur": int(duration * 1000000),
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": span.args,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def countHostCall(self, count=1):
+        if not self.enabled:
+            return
+
+        stack = self.getStack()
+        if stack:
+            stack[-1].hostCalls += count
+
+    def addBytesWritten(self, path):
+        if not self.enabled or not path or not os.path.isfile(path):
+            return
+
+        stack = self.getStack()
+        if stack:
+            stack[-1].bytesWritten += os.path.getsize(path)
+
+    def getTracePath(self):
+        if self.outputPath.lower().endswith(".json"):
+            base, ext = os.path.splitext(self.outputPath)
+            return "%s_%s_%s%s" % (base, self.hostname, self.pid, ext)
+
+        filename = "illustrator_trace_%s_%s_%s.json" % (
+            self.hostname,
+            time.strftime("%Y%m%d-%H%M%S"),
+            self.pid,
+        )
+        return os.path.join(self.outputPath, filename)
+
+    def write(self):
+        if not self.events:
+            return
+
+        path = self.getTracePath()
+        metadata = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self.pid,
+                "args": {"name": "%s (%s)" % (os.path.basename(sys.argv[0] or "Prism"), self.hostname)},
+            }
+        ]
+        try:
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+
+            with self.lock:
+                data = {
+                    "traceEvents": metadata + self.events,
+                    "otherData": {"hostname": self.hostname, "argv": sys.argv},
+                }
+                with open(path, "w") as f:
+                    json.dump(data, f)
+        except Exception as e:
+            logger.warning("Failed to write trace %s: %s" % (path, e))
+            return
+
+        return path
+
+
+tracer = Tracer.fromEnv()
+
+
+def traced(name=None):
+    """
+    Decorator which records a span for each call of the function.
+    """
+    def decorator(func):
+        if not tracer.enabled:
+            return func
+
+        spanName = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(spanName):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def span(name, **args):
+    return tracer.span(name, **args)
+
+
+def countHostCall(count=1):
+    tracer.countHostCall(count)
+
+
+def addBytesWritten(path):
+    tracer.addBytesWritten(path)
+
+
+class HostObjectProxy(object):
+    """
+    Wraps a COM object and counts every property access, property write and
+    method call as a host round trip.
+    """
+
+    def __init__(self, obj):
+        object.__setattr__(self, "_hostObject", obj)
+
+    def __getattr__(self, name):
+        tracer.countHostCall()
+        value = getattr(self._hostObject, name)
+        if callable(value) and not hasattr(value, "_oleobj_"):
+            return HostMethodProxy(value)
+
+        return wrapHostObject(value)
+
+    def __setattr__(self, name, value):
+        tracer.countHostCall()
+        setattr(self._hostObject, name, unwrapHostObject(value))
+
+    def __call__(self, *args):
+        tracer.countHostCall()
+        return wrapHostObject(self._hostObject(*[unwrapHostObject(x) for x in args]))
+
+    def __iter__(self):
+        tracer.countHostCall()
+        for item in self._hostObject:
+            yield wrapHostObject(item)
+
+    def __len__(self):
+        tracer.countHostCall()
+        return len(self._hostObject)
+
+    def __getitem__(self, key):
+        tracer.countHostCall()
+        return wrapHostObject(self._hostObject[unwrapHostObject(key)])
+
+    def __eq__(self, other):
+        return self._hostObject == unwrapHostObject(other)
+
+    def __hash__(self):
+        return hash(self._hostObject)
+
+    def __bool__(self):
+        return bool(self._hostObject)
+
+
+class HostMethodProxy(object):
+    def __init__(self, method):
+        self.method = method
+
+    def __call__(self, *args, **kwargs):
+        tracer.countHostCall()
+        args = [unwrapHostObject(x) for x in args]
+        kwargs = dict((k, unwrapHostObject(v)) for k, v in kwargs.items())
+        return wrapHostObject(self.method(*args, **kwargs))
+
+
+def wrapHostObject(obj):
+    if not tracer.enabled or not hasattr(obj, "_oleobj_"):
+        return obj
+
+    return HostObjectProxy(obj)
+
+
+def unwrapHostObject(obj):
+    if isinstance(obj, HostObjectProxy):
+        return object.__getattribute__(obj, "_hostObject")
+
+    return obj
+
+
+def mergeTraces(outputPath, tracePaths):
+    # pids are only unique per workstation, so every (hostname, pid) gets its own process
+    events = []
+    processIds = {}
+    for path in tracePaths:
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        hostname = data.get("otherData", {}).get("hostname", path)
+        for event in data.get("traceEvents", []):
+            key = (hostname, event.get("pid"))
+            if key not in processIds:
+                processIds[key] = len(processIds) + 1
+
+            event = dict(event)
+            event["pid"] = processIds[key]
+            events.append(event)
+
+    with open(outputPath, "w") as f:
+        json.dump({"traceEvents": events}, f)
+
+    return outputPath
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != "merge":
+        print(__doc__)
+        sys.exit(1)
+
+    mergeTraces(sys.argv[2], sys.argv[3:])
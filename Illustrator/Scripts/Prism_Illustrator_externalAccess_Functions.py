@@ -34,6 +34,7 @@
 
 import os
 import subprocess
+import logging
 
 from qtpy.QtCore import *
 from qtpy.QtGui import *
@@ -41,6 +42,14 @@ from qtpy.QtWidgets import *
 
 from PrismUtils.Decorators import err_catcher_plugin as err_catcher
 
+from Prism_Illustrator_AiFile import AiFile
+from Prism_Illustrator_DependencyIndex import DependencyIndex, readSceneLinks
+from Prism_Illustrator_Inspection import readSidecar, searchScenes, parseFilters
+from Prism_Illustrator_SharedCache import SharedCache
+
+
+logger = logging.getLogger(__name__)
+
 
 class Prism_Illustrator_externalAccess_Functions(object):
     def __init__(self, core, plugin):
@@ -85,6 +94,15 @@ class Prism_Illustrator_externalAccess_Functions(object):
             illustratorAction.triggered.connect(lambda: self.connectToIllustrator(origin))
             
             illustratorMenu.addAction(illustratorAction)
+
+            previewAction = QAction("Generate scene previews", origin)
+            previewAction.triggered.connect(lambda: self.createScenePreviews())
+            illustratorMenu.addAction(previewAction)
+
+            findAction = QAction("Find scenes by content...", origin)
+            findAction.triggered.connect(lambda: self.findScenesByContentDialog(origin))
+            illustratorMenu.addAction(findAction)
+
             origin.menuTools.addSeparator()
             origin.menuTools.addMenu(illustratorMenu)
 
@@ -101,11 +119,253 @@ class Prism_Illustrator_externalAccess_Functions(object):
         plugin = self.core.getPlugin("Illustrator")
         menuPath = os.path.join(plugin.pluginPath, "Prism_Illustrator_MenuTools.py")
         
+        # the tool process reads these from the shared cache instead of computing them again
+        self.warmSharedCache()
+
         # Launch the Python script to connect to Illustrator
         subprocess.Popen([pythonPath, menuPath, self.core.prismRoot, "Tools", filepath])
 
     @err_catcher(name=__name__)
     def getPresetScenes(self, presetScenes):
         presetDir = os.path.join(self.pluginDirectory, "Presets")
-        scenes = self.core.entities.getPresetScenesFromFolder(presetDir)
+        scenes = self.getCachedValue(
+            "presetScenes", lambda: self.core.entities.getPresetScenesFromFolder(presetDir), dependsOn=presetDir
+        )
         presetScenes += scenes
+
+    def getSharedCache(self):
+        """
+        Returns the cache which is shared with the other Prism and menu tool
+        processes. PRISM_ILLUSTRATOR_SHARED_CACHE sets the path of the
+        database, "0" disables the cache.
+        """
+        if os.getenv("PRISM_ILLUSTRATOR_SHARED_CACHE") == "0":
+            return
+
+        if not getattr(self, "sharedCache", None):
+            try:
+                self.sharedCache = SharedCache()
+            except Exception as e:
+                logger.debug("the shared cache isn't available: %s" % e)
+                return
+
+        return self.sharedCache
+
+    def getCachedValue(self, name, compute, ttl=None, dependsOn=None):
+        """
+        Returns a value of the current project from the shared cache or
+        computes and stores it. Values depend on the project config unless
+        dependsOn is set. Errors are raised to the caller instead of showing
+        a dialog, the export prefetch only logs them.
+        """
+        cache = self.getSharedCache()
+        if not cache:
+            return compute()
+
+        if dependsOn is None:
+            dependsOn = getattr(self.core, "prismIni", None) or None
+
+        key = "%s|%s" % (getattr(self.core, "projectPath", None) or "", name)
+        return cache.getOrCompute(key, compute, ttl=ttl, dependsOn=dependsOn)
+
+    def invalidateCachedValue(self, name):
+        cache = self.getSharedCache()
+        if cache:
+            cache.invalidate("%s|%s" % (getattr(self.core, "projectPath", None) or "", name))
+
+    def getCachedTaskNames(self):
+        """
+        Returns the 2d task names of the current project. Tasks are created
+        outside of the plugin too, so they're only cached for
+        PRISM_ILLUSTRATOR_TASK_NAMES_TTL seconds.
+        """
+        ttl = float(os.getenv("PRISM_ILLUSTRATOR_TASK_NAMES_TTL", "30"))
+        return self.getCachedValue("taskNames/2d", lambda: self.core.getTaskNames("2d"), ttl=ttl)
+
+    @err_catcher(name=__name__)
+    def warmSharedCache(self):
+        """
+        Stores the project data, which the export dialog of the menu tools
+        needs, in the shared cache.
+        """
+        if not getattr(self.core, "projectPath", None):
+            return
+
+        self.getCachedTaskNames()
+        self.getCachedValue("renderProductBasePaths", self.core.paths.getRenderProductBasePaths)
+        self.getCachedValue("useMaster", self.core.mediaProducts.getUseMaster)
+
+    @err_catcher(name=__name__)
+    def getAiFileInfo(self, filepath):
+        """
+        Returns artboards, page count, creator version and other metadata of
+        an .ai file without opening it in Illustrator.
+        """
+        try:
+            with AiFile(filepath) as aiFile:
+                return aiFile.getInfo()
+        except (OSError, ValueError) as e:
+            logger.debug("Failed to read %s: %s" % (filepath, e))
+            return {}
+
+    @err_catcher(name=__name__)
+    def getAiFilePreview(self, filepath):
+        """
+        Returns the thumbnail which Illustrator embedded into the .ai file as
+        a QPixmap or None.
+        """
+        try:
+            with AiFile(filepath) as aiFile:
+                data = aiFile.getThumbnail()
+        except (OSError, ValueError) as e:
+            logger.debug("Failed to read %s: %s" % (filepath, e))
+            return
+
+        if not data:
+            return
+
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data, "JPG"):
+            return
+
+        return pixmap
+
+    @err_catcher(name=__name__)
+    def createScenePreviews(self, paths=None, overwrite=False):
+        """
+        Writes the preview images, which the Project Browser shows for
+        scenefiles, from the thumbnails embedded in the .ai files. Scenes
+        which already have a preview are skipped unless overwrite is True.
+        """
+        if paths is None:
+            if not getattr(self.core, "projectPath", None):
+                return 0
+
+            paths = []
+            for root, folders, files in os.walk(self.core.projectPath):
+                paths += [
+                    os.path.join(root, f) for f in files
+                    if os.path.splitext(f)[1] in self.sceneFormats
+                ]
+
+        created = 0
+        for path in paths:
+            previewPath = self.core.entities.getScenePreviewPath(path)
+            if not overwrite and os.path.exists(previewPath):
+                continue
+
+            try:
+                with AiFile(path) as aiFile:
+                    data = aiFile.getThumbnail()
+            except (OSError, ValueError) as e:
+                logger.debug("Failed to read %s: %s" % (path, e))
+                continue
+
+            if not data:
+                continue
+
+            with open(previewPath, "wb") as f:
+                f.write(data)
+
+            created += 1
+
+        logger.debug("created %s scene previews" % created)
+        return created
+
+    @err_catcher(name=__name__)
+    def getDependencyIndex(self):
+        """
+        Returns the index of linked files of all scenes in the current project.
+        It is stored in the pipeline folder of the project.
+        """
+        if not getattr(self.core, "projectPath", None):
+            return
+
+        indexPath = os.path.join(
+            self.core.projects.getPipelineFolder(), "Illustrator", "dependencies.json"
+        )
+        if getattr(self, "dependencyIndex", None) and self.dependencyIndex.indexPath == indexPath:
+            return self.dependencyIndex
+
+        self.dependencyIndex = DependencyIndex(indexPath, sceneFormats=self.sceneFormats)
+        return self.dependencyIndex
+
+    @err_catcher(name=__name__)
+    def updateDependencyIndex(self):
+        index = self.getDependencyIndex()
+        if not index:
+            return 0
+
+        return index.update(root=self.core.projectPath)
+
+    @err_catcher(name=__name__)
+    def getScenesUsingFile(self, filepath, update=False, matchName=False):
+        """
+        Returns all scenefiles of the current project which link filepath.
+        The index is kept current when scenes are saved. With update, the
+        whole project is scanned for changed scenes first.
+        """
+        index = self.getDependencyIndex()
+        if not index:
+            return []
+
+        if update or not os.path.exists(index.indexPath):
+            index.update(root=self.core.projectPath)
+
+        return index.getScenesUsingFile(filepath, matchName=matchName)
+
+    @err_catcher(name=__name__)
+    def getSceneDependencies(self, scenePath):
+        index = self.getDependencyIndex()
+        if index:
+            index.update(paths=[scenePath])
+            return index.getSceneDependencies(scenePath)
+
+        return readSceneLinks(scenePath)
+
+    @err_catcher(name=__name__)
+    def getSceneInspection(self, scenePath):
+        """
+        Returns the layers, artboards, links, swatches and fonts of a scene
+        version, which were written when the version was saved.
+        """
+        return readSidecar(scenePath) or {}
+
+    @err_catcher(name=__name__)
+    def findScenesByContent(self, filters, root=None):
+        """
+        Returns the scenefiles below root (the current project by default)
+        matching filters like {"layer": ["bg"], "font": ["helvetica"]}.
+        """
+        root = root or getattr(self.core, "projectPath", None)
+        if not root:
+            return []
+
+        return [scenePath for scenePath, data in searchScenes(root, filters)]
+
+    @err_catcher(name=__name__)
+    def findScenesByContentDialog(self, origin=None):
+        text, accepted = QInputDialog.getText(
+            origin,
+            "Find scenes by content",
+            "Filters (layer, artboard, link, swatch, font), e.g. \"layer:BG font:Helvetica\":",
+        )
+        if not accepted or not text.strip():
+            return
+
+        try:
+            filters = parseFilters(text)
+        except ValueError as e:
+            self.core.popup(str(e))
+            return
+
+        scenes = self.findScenesByContent(filters)
+        if not scenes:
+            self.core.popup("No scenes found.", title="Find scenes by content", severity="info")
+            return
+
+        msg = "%s scenes found:\n\n%s" % (len(scenes), "\n".join(scenes[:50]))
+        if len(scenes) > 50:
+            msg += "\n..."
+
+        self.core.popup(msg, title="Find scenes by content", severity="info")
@@ -1,4 +1,29 @@
 import os
+import tempfile
+
+from qtpy.QtCore import QFile, QResource
+
+from . import compiler
+
+
+registeredResources = []
+
+
+def getCacheFolder():
+    return os.getenv("PRISM_ILLUSTRATOR_STYLESHEET_CACHE") or os.path.join(
+        tempfile.gettempdir(), "Prism", "IllustratorStyleSheet"
+    )
+
+
+def registerResource(rccPath):
+    if rccPath in registeredResources:
+        return True
+
+    if not QResource.registerResource(rccPath):
+        return False
+
+    registeredResources.append(rccPath)
+    return QFile.exists(":/%s/images/transparent.png" % compiler.RESOURCE_ROOT)
 
 
 def load_stylesheet():
@@ -6,8 +31,21 @@ def load_stylesheet():
     if not os.path.exists(sFile):
         return ""
 
+    # the compiled stylesheet and its image resource are cached by content hash.
+    # Files prebuilt with compiler.py next to this file are used if up to date.
+    try:
+        compiled = compiler.compileStyleSheet(
+            os.path.join(os.path.dirname(__file__), "compiled"), build=False
+        ) or compiler.compileStyleSheet(getCacheFolder())
+        qssPath, rccPath = compiled
+        if registerResource(rccPath):
+            with open(qssPath, "r") as f:
+                return f.read()
+    except Exception as e:
+        print("Failed to load the compiled Illustrator stylesheet: %s" % e)
+
     with open(sFile, "r") as f:
-        stylesheet = f.read()
+        stylesheet = compiler.minifyQss(f.read())
 
     stylesheet = stylesheet.replace("qss:", os.path.dirname(__file__).replace("\\", "/") + "/")
     return stylesheet
@@ -0,0 +1,181 @@
+"""
+Build step for the Illustrator stylesheet.
+
+The stylesheet is minified and all images it references are packed into a
+single Qt binary resource (.rcc), so applying the theme doesn't have to
+resolve every image from disk. Run this file to build the resources into a
+folder or use compileStyleSheet() to build them on demand.
+
+    python compiler.py [outputFolder]
+"""
+
+import os
+import re
+import sys
+import struct
+import hashlib
+
+
+RESOURCE_ROOT = "IllustratorStyleSheet"
+QSS_NAME = "Illustrator.qss"
+IMAGE_FOLDERS = ["images", "images_illustrator"]
+
+
+def minifyQss(qss):
+    qss = re.sub(r"/\*.*?\*/", "", qss, flags=re.S)
+    qss = re.sub(r"\s+", " ", qss)
+    qss = re.sub(r"\s*([{};,])\s*", r"\1", qss)
+    qss = re.sub(r":\s+", ":", qss)
+    qss = qss.replace(";}", "}")
+    return qss.strip()
+
+
+def qtHash(name):
+    encoded = name.encode("utf-16-be")
+    h = 0
+    for unit in struct.unpack(">%sH" % (len(encoded) // 2), encoded):
+        h = ((h << 4) + unit) & 0xFFFFFFFF
+        h ^= (h & 0xF0000000) >> 23
+        h &= 0x0FFFFFFF
+
+    return h
+
+
+def writeRcc(files, rootName=RESOURCE_ROOT):
+    """
+    Returns the content of a Qt binary resource file (format version 1) with
+    the given files, which is a dict of {relative path: bytes}. All files are
+    placed below rootName.
+    """
+    root = {}
+    for relPath, data in files.items():
+        node = root.setdefault(rootName, {})
+        parts = relPath.replace("\\", "/").split("/")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+
+        node[parts[-1]] = data
+
+    # nodes are laid out breadth first, children of a folder are contiguous
+    # and sorted by their name hash so Qt can binary search them
+    nodes = [{"name": None, "children": root}]
+    idx = 0
+    while idx < len(nodes):
+        node = nodes[idx]
+        if isinstance(node["children"], dict):
+            names = sorted(node["children"], key=qtHash)
+            node["firstChild"] = len(nodes)
+            node["childCount"] = len(names)
+            for name in names:
+                nodes.append({"name": name, "children": node["children"][name]})
+
+        idx += 1
+
+    names = b""
+    nameOffsets = {}
+    data = b""
+    for node in nodes[1:]:
+        if node["name"] not in nameOffsets:
+            nameOffsets[node["name"]] = len(names)
+            encoded = node["name"].encode("utf-16-be")
+            names += struct.pack(">HI", len(encoded) // 2, qtHash(node["name"])) + encoded
+
+        if not isinstance(node["children"], dict):
+            node["dataOffset"] = len(data)
+            data += struct.pack(">I", len(node["children"])) + node["children"]
+
+    tree = b""
+    for node in nodes:
+        nameOffset = nameOffsets.get(node["name"], 0)
+        if isinstance(node["children"], dict):
+            tree += struct.pack(">IHII", nameOffset, 2, node["childCount"], node["firstChild"])
+        else:
+            # country AnyCountry, language C
+            tree += struct.pack(">IHHHI", nameOffset, 0, 0, 1, node["dataOffset"])
+
+    headerSize = 20
+    treeOffset = headerSize
+    dataOffset = treeOffset + len(tree)
+    namesOffset = dataOffset + len(data)
+    header = b"qres" + struct.pack(">IIII", 1, treeOffset, dataOffset, namesOffset)
+    return header + tree + data + names
+
+
+def getQss(folder=None):
+    folder = folder or os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(folder, QSS_NAME), "r") as f:
+        return f.read()
+
+
+def getImagePaths(folder=None):
+    folder = folder or os.path.dirname(os.path.abspath(__file__))
+    paths = {}
+    for imageFolder in IMAGE_FOLDERS:
+        imagePath = os.path.join(folder, imageFolder)
+        if not os.path.exists(imagePath):
+            continue
+
+        for entry in sorted(os.scandir(imagePath), key=lambda x: x.name):
+            if entry.is_file():
+                paths[imageFolder + "/" + entry.name] = entry.path
+
+    return paths
+
+
+def getImages(folder=None):
+    files = {}
+    for name, path in getImagePaths(folder).items():
+        with open(path, "rb") as f:
+            files[name] = f.read()
+
+    return files
+
+
+def getContentHash(qss, imagePaths):
+    # images are identified by name, size and mtime so a cache hit doesn't
+    # need to read them
+    contentHash = hashlib.sha1(qss.encode("utf-8"))
+    for name in sorted(imagePaths):
+        stat = os.stat(imagePaths[name])
+        contentHash.update(("%s|%s|%s" % (name, stat.st_size, int(stat.st_mtime))).encode("utf-8"))
+
+    return contentHash.hexdigest()
+
+
+def compileStyleSheet(outputFolder, folder=None, build=True):
+    """
+    Writes the minified stylesheet and the image resource into outputFolder.
+    Image urls in the stylesheet are rewritten to the resource paths.
+    Returns the paths of the stylesheet and of the resource file. If build is
+    False, only already compiled files are returned and None otherwise.
+    """
+    qss = getQss(folder)
+    contentHash = getContentHash(qss, getImagePaths(folder))[:16]
+    qssPath = os.path.join(outputFolder, "Illustrator_%s.qss" % contentHash)
+    rccPath = os.path.join(outputFolder, "Illustrator_%s.rcc" % contentHash)
+    if os.path.exists(qssPath) and os.path.exists(rccPath):
+        return qssPath, rccPath
+
+    if not build:
+        return
+
+    if not os.path.exists(outputFolder):
+        os.makedirs(outputFolder)
+
+    compiled = minifyQss(qss).replace("qss:", ":/%s/" % RESOURCE_ROOT)
+    for path, content in [(rccPath, writeRcc(getImages(folder))), (qssPath, compiled.encode("utf-8"))]:
+        tmpPath = path + ".%s.tmp" % os.getpid()
+        with open(tmpPath, "wb") as f:
+            f.write(content)
+
+        os.replace(tmpPath, path)
+
+    return qssPath, rccPath
+
+
+if __name__ == "__main__":
+    outputFolder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "compiled"
+    )
+    for path in compileStyleSheet(outputFolder):
+        print("written: %s (%s bytes)" % (path, os.path.getsize(path)))
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+#
+# Simulated Illustrator host and Prism core for running the plugin outside
+# of Windows/macOS. The fake application mimics the parts of the Illustrator
+# COM API which the plugin uses and renders exports with QImage, so export
+# and thumbnail timings include real image encoding.
+
+
+import os
+import json
+import time
+import types
+
+
+class FakeExportOptions(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakePlacedItem(object):
+    """
+    Every property read and write is a host round trip, like with COM.
+    """
+
+    def __init__(self, app):
+        self.__dict__["app"] = app
+        self.__dict__["props"] = {"File": "", "Width": 400.0, "Height": 300.0, "Left": 0.0, "Top": 0.0, "Name": ""}
+
+    def __getattr__(self, name):
+        if name not in self.props:
+            raise AttributeError(name)
+
+        self.app.roundTrip()
+        return self.props[name]
+
+    def __setattr__(self, name, value):
+        self.app.roundTrip()
+        self.props[name] = value
+
+    def Resize(self, scaleX, scaleY):
+        self.app.roundTrip()
+        self.props["Width"] *= scaleX / 100.0
+        self.props["Height"] *= scaleY / 100.0
+
+
+class FakeCollection(object):
+    def __init__(self, app, factory):
+        self.app = app
+        self.factory = factory
+        self.items = []
+
+    def Add(self):
+        self.app.roundTrip()
+        item = self.factory(self.app)
+        self.items.append(item)
+        return item
+
+
+class FakeLayer(FakePlacedItem):
+    def __init__(self, app):
+        super(FakeLayer, self).__init__(app)
+        self.__dict__["PlacedItems"] = FakeCollection(app, FakePlacedItem)
+
+
+class FakeArtboards(object):
+    def __init__(self, doc):
+        self.doc = doc
+
+    def GetActiveArtboardIndex(self):
+        self.doc.app.roundTrip()
+        return 0
+
+    def Item(self, idx):
+        self.doc.app.roundTrip()
+        return types.SimpleNamespace(ArtboardRect=[0.0, float(self.doc.height), float(self.doc.width), 0.0])
+
+
+class FakeDocument(object):
+    def __init__(self, app, fullName="", width=1920, height=1080):
+        self.app = app
+        self.FullName = fullName
+        self.Name = os.path.basename(fullName)
+        self.width = width
+        self.height = height
+        self.Saved = True
+        self.Artboards = FakeArtboards(self)
+        self.Layers = FakeCollection(app, FakeLayer)
+        self.ActiveLayer = FakeLayer(app)
+
+    def SaveAs(self, path, options=None):
+        self.app.roundTrip()
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.6\n%AI fake document\n" + b"0" * 1024 * 64)
+
+        self.FullName = path
+        self.Name = os.path.basename(path)
+
+    def Export(self, path, exportType, options=None):
+        from qtpy.QtGui import QImage, QColor
+
+        self.app.roundTrip()
+        scale = getattr(options, "HorizontalScale", 100) / 100.0
+        ext = os.path.splitext(path)[1].lower()
+        if ext in [".svg", ".psd", ".pdf"]:
+            with open(path, "wb") as f:
+                f.write(b"0" * 1024 * 256)
+
+            return
+
+        image = QImage(int(self.width * scale), int(self.height * scale), QImage.Format_ARGB32)
+        image.fill(QColor(255, 154, 0))
+        image.save(path)
+
+    def Activate(self):
+        self.app.roundTrip()
+        self.app.ActiveDocument = self
+
+    def Close(self, saveOptions=None):
+        self.app.roundTrip()
+        self.app.docs.remove(self)
+        if self.app.ActiveDocument is self:
+            self.app.ActiveDocument = self.app.docs[-1] if self.app.docs else FakeDocument(self.app, "")
+
+
+class FakeDocuments(object):
+    def __init__(self, app):
+        self.app = app
+
+    @property
+    def Count(self):
+        self.app.roundTrip()
+        return len(self.app.docs)
+
+    def Item(self, idx):
+        self.app.roundTrip()
+        return self.app.docs[idx - 1]
+
+
+class FakeIllustratorApp(object):
+    """
+    Stand-in for win32com.client.Dispatch("Illustrator.Application").
+    latency is added to every host call to simulate the cross-process round
+    trip of COM.
+    """
+
+    def __init__(self, latency=0.001):
+        self.latency = latency
+        self.roundTrips = 0
+        self.Version = "28.0.0"
+        self.docs = [FakeDocument(self, "")]
+        self.ActiveDocument = self.docs[0]
+        self.Documents = FakeDocuments(self)
+
+    @property
+    def Application(self):
+        return self
+
+    def roundTrip(self):
+        self.roundTrips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def Open(self, path):
+        self.roundTrip()
+        doc = FakeDocument(self, path)
+        self.docs.append(doc)
+        self.ActiveDocument = doc
+        return doc
+
+    def DoJavaScript(self, script, args=None, mode=None):
+        """
+        Does the work of the host scripts of the plugin within the single
+        round trip of DoJavaScript.
+        """
+        from Prism_Illustrator_HostScript import getScriptName, getScriptArgs
+
+        self.roundTrip()
+        handler = getattr(self, "script_%s" % getScriptName(script), None)
+        if not handler:
+            return ""
+
+        try:
+            return json.dumps({"result": handler(getScriptArgs(script))})
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    def script_getCurrentFileName(self, args):
+        return self.ActiveDocument.FullName
+
+    def script_findDocument(self, args):
+        for doc in self.docs:
+            if doc.FullName and doc.FullName.replace("\\", "/").lower() in args["paths"]:
+                if args.get("activate"):
+                    self.ActiveDocument = doc
+
+                return doc.FullName
+
+    def script_exportImageToPath(self, args):
+        options = types.SimpleNamespace(HorizontalScale=args["scale"])
+        self.ActiveDocument.Export(args["path"], args["format"], options)
+        return {"path": args["path"], "exists": os.path.exists(args["path"])}
+
+    def script_inspectDocument(self, args):
+        doc = self.ActiveDocument
+        return {
+            "document": {"width": doc.width, "height": doc.height, "colorSpace": "RGB", "rulerUnits": "Pixels"},
+            "layers": [{"name": "Layer 1", "visible": True, "locked": False}],
+            "artboards": [{"name": "Artboard 1", "width": doc.width, "height": doc.height}],
+            "links": [],
+            "swatches": [],
+            "fonts": [],
+        }
+
+    def script_placeImages(self, args):
+        from Prism_Illustrator_Placement import getGridCells
+
+        doc = self.ActiveDocument
+        cells = getGridCells(len(args["files"]), [0.0, doc.height, doc.width, 0.0], args["columns"], args["spacing"])
+        results = []
+        for path, cell in zip(args["files"], cells):
+            item = FakePlacedItem(self)
+            scale = min(cell[2] / item.props["Width"], cell[3] / item.props["Height"], 1)
+            item.props.update({
+                "File": path,
+                "Left": cell[0],
+                "Top": cell[1],
+                "Width": item.props["Width"] * scale,
+                "Height": item.props["Height"] * scale,
+            })
+            doc.ActiveLayer.PlacedItems.items.append(item)
+            results.append(dict((key.lower(), item.props[key]) for key in ["Left", "Top", "Width", "Height"]))
+            results[-1]["path"] = path
+
+        return results
+
+
+def getFakeWin32com():
+    constants = types.SimpleNamespace(
+        aiJPEG=1, aiPhotoshop=2, aiSVG=3, aiPNG8=4, aiPNG24=5, aiGIF=6, aiTIFF=9,
+        aiSaveChanges=1, aiDoNotSaveChanges=2,
+    )
+    client = types.SimpleNamespace(
+        Dispatch=lambda name: FakeExportOptions(name),
+        constants=constants,
+    )
+    return types.SimpleNamespace(client=client)
+
+
+class FakeMediaProducts(object):
+    def __init__(self, core):
+        self.core = core
+
+    def getUseMaster(self):
+        return True
+
+    def generateMediaProductPath(self, entity, task, extension, version=None, location=None, **kwargs):
+        return self.core.generatePath("2drenders", entity, task, extension, version)
+
+    def updateMasterVersion(self, path, mediaType=None):
+        pass
+
+    def addToMasterVersion(self, path, mediaType=None):
+        pass
+
+
+class FakeProducts(object):
+    def __init__(self, core):
+        self.core = core
+
+    def generateProductPath(self, entity, task, extension, version=None, location=None, **kwargs):
+        return self.core.generatePath("products", entity, task, extension, version)
+
+
+class FakeCore(object):
+    """
+    Minimal Prism core with a synthetic project at projectPath.
+    """
+
+    def __init__(self, projectPath, prismRoot=""):
+        self.projectPath = projectPath
+        self.prismRoot = prismRoot
+        self.prismLibs = prismRoot
+        self.appPlugin = None
+        self.messageParent = None
+        self.callbacks = {}
+        self.sceneData = {
+            "type": "asset",
+            "asset_path": "Characters/Hero",
+            "task": "design",
+            "department": "2d",
+            "version": "v0001",
+        }
+        self.mediaProducts = FakeMediaProducts(self)
+        self.products = FakeProducts(self)
+        self.paths = types.SimpleNamespace(
+            getRenderProductBasePaths=lambda: {"global": self.projectPath}
+        )
+        self.projects = types.SimpleNamespace(
+            ensureProject=lambda: True,
+            getResolvedProjectStructurePath=lambda key: self.projectPath,
+        )
+        self.users = types.SimpleNamespace(ensureUser=lambda: True)
+        self.media = types.SimpleNamespace(getPixmapFromPath=self.getPixmapFromPath)
+        self.integration = types.SimpleNamespace()
+
+    def generatePath(self, mediaType, entity, task, extension, version):
+        version = version or "v0001"
+        folder = os.path.join(self.projectPath, mediaType, task, version)
+        return {"path": os.path.join(folder, "%s_%s%s" % (task, version, extension)), "version": version}
+
+    def registerCallback(self, name, func, plugin=None):
+        self.callbacks.setdefault(name, []).append(func)
+
+    def callback(self, name, args=None, **kwargs):
+        return [func(*(args or [])) for func in self.callbacks.get(name, [])]
+
+    def registerStyleSheet(self, path):
+        pass
+
+    def getCurrentFileName(self, path=True):
+        return self.appPlugin.getCurrentFileName(self, path=path)
+
+    def getScenefileData(self, fileName):
+        data = dict(self.sceneData)
+        data["filename"] = fileName
+        return data
+
+    def getTaskNames(self, taskType):
+        return ["design", "layout", "paint", "_ShotCam"]
+
+    def getConfig(self, *args, **kwargs):
+        return kwargs.get("dft")
+
+    def fileInPipeline(self):
+        return True
+
+    def parentWindow(self, widget):
+        pass
+
+    def saveVersionInfo(self, filepath, details):
+        pass
+
+    def popup(self, text, *args, **kwargs):
+        print(text)
+
+    def getPixmapFromPath(self, path):
+        from qtpy.QtGui import QPixmap
+
+        return QPixmap(path)
+
+
+def createProjectTree(projectPath, versionCount=10000, task="design"):
+    """
+    Creates a synthetic project with versionCount version folders of a media
+    identifier, which is the directory listed by exportGetVersions.
+    """
+    versionBase = os.path.join(projectPath, "2drenders", task)
+    if not os.path.exists(versionBase):
+        os.makedirs(versionBase)
+
+    existing = set(os.listdir(versionBase))
+    for idx in range(1, versionCount + 1):
+        name = "v%04d" % idx if idx < 10000 else "v%s" % idx
+        if name not in existing:
+            os.mkdir(os.path.join(versionBase, name))
+
+    sceneFolder = os.path.join(projectPath, "Assets", "Characters", "Hero", "Scenefiles", "2d", task)
+    if not os.path.exists(sceneFolder):
+        os.makedirs(sceneFolder)
+
+    scenePath = os.path.join(sceneFolder, "Hero_%s_v0001.ai" % task)
+    with open(scenePath, "wb") as f:
+        f.write(b"%PDF-1.6\n%AI fake document\n")
+
+    return scenePath
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the hot paths of the Illustrator plugin.
+
+The plugin runs against FakeIllustrator, a simulated host and Prism core, on a
+synthetic project tree, so the suite runs on Linux without Illustrator.
+Prism's Scripts folder has to be importable (for PrismUtils) and qtpy with a
+Qt binding has to be installed.
+
+    python run_benchmarks.py --prism-root <PrismRoot> [--update-baselines]
+
+The results are written as JSON and compared against baselines.json. The run
+fails if the median of a benchmark regressed by more than --threshold or if a
+benchmark has no baseline. Baselines are only written with --update-baselines,
+on the machine the suite is compared on.
+"""
+
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import importlib
+
+
+benchDir = os.path.dirname(os.path.abspath(__file__))
+scriptDir = os.path.join(os.path.dirname(benchDir), "Illustrator", "Scripts")
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Illustrator plugin benchmarks")
+    parser.add_argument("--prism-root", default=os.getenv("PRISM_ROOT", ""))
+    parser.add_argument("--baselines", default=os.path.join(benchDir, "baselines.json"))
+    parser.add_argument("--output", default="", help="path of the JSON results")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression, 0.25 = 25%%")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--versions", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=20, help="queued exports per export_throughput run")
+    parser.add_argument("--latency", type=float, default=0.001, help="simulated host round trip in seconds")
+    parser.add_argument("--project", default="", help="reuse this synthetic project folder")
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--only", nargs="*", default=None)
+    return parser.parse_args()
+
+
+def setupEnvironment(args):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    if args.prism_root:
+        sys.path.insert(0, os.path.join(args.prism_root, "Scripts"))
+
+    sys.path.insert(0, scriptDir)
+    sys.path.insert(0, benchDir)
+
+    from qtpy.QtWidgets import QApplication
+
+    qapp = QApplication.instance() or QApplication(sys.argv)
+    return qapp
+
+
+def loadPlugin(core, latency):
+    import FakeIllustrator
+    import Prism_Illustrator_Functions
+    import Prism_Illustrator_init
+    from Prism_Illustrator_Connection import ConnectionManager, ConnectionPool, ManagedApplication
+
+    Prism_Illustrator_Functions.win32com = FakeIllustrator.getFakeWin32com()
+    plugin = Prism_Illustrator_init.Prism_Plugin_Illustrator(core)
+    plugin.pluginPath = scriptDir
+    plugin.win = True
+    app = FakeIllustrator.FakeIllustratorApp(latency=latency)
+    connection = ConnectionManager(lambda: app)
+    connection.start()
+    plugin.connectionPool = ConnectionPool(None)
+    plugin.connectionPool.add("Illustrator.Application", connection)
+    plugin.ilApp = ManagedApplication(plugin.connectionPool)
+    core.appPlugin = plugin
+    return plugin
+
+
+class Benchmarks(object):
+    def __init__(self, args, projectPath):
+        import FakeIllustrator
+
+        self.args = args
+        self.projectPath = projectPath
+        self.scenePath = FakeIllustrator.createProjectTree(projectPath, versionCount=args.versions)
+        self.core = FakeIllustrator.FakeCore(projectPath, prismRoot=args.prism_root)
+        self.plugin = loadPlugin(self.core, args.latency)
+        self.plugin.ilApp.ActiveDocument.FullName = self.scenePath
+        self.outputDir = os.path.join(projectPath, "bench_exports")
+        os.makedirs(self.outputDir, exist_ok=True)
+        self.queueCount = 0
+        # benchmarks which process a number of jobs, their jobs per second are reported
+        self.jobCounts = {"export_throughput": args.jobs}
+
+    def getBenchmarks(self):
+        return [
+            ("plugin_load", self.benchPluginLoad),
+            ("export_dialog", self.benchExportDialog),
+            ("export_dialog_cold", self.benchExportDialogCold),
+            ("version_listing_%sk" % (self.args.versions // 1000), self.benchVersionListing),
+            ("output_path", self.benchOutputPath),
+            ("export_throughput", self.benchExportThroughput),
+            ("thumbnail_capture", self.benchThumbnail),
+            ("place_images_script", self.benchPlaceImages),
+            ("place_images_per_item", self.benchPlaceImagesPerItem),
+        ]
+
+    def benchPluginLoad(self):
+        import Prism_Illustrator_Functions
+        import Prism_Illustrator_init
+
+        importlib.reload(Prism_Illustrator_Functions)
+        importlib.reload(Prism_Illustrator_init)
+        loadPlugin(self.core, self.args.latency)
+        self.core.appPlugin = self.plugin
+
+    def benchExportDialog(self):
+        self.plugin.exportImage()
+        self.plugin.dlg_export.close()
+
+    def benchExportDialogCold(self):
+        self.plugin.dlg_export = None
+        self.plugin.exportDialogData = None
+        self.plugin.exportImage()
+        self.plugin.dlg_export.close()
+
+    def ensureDialog(self):
+        if not getattr(self.plugin, "dlg_export", None):
+            self.plugin.exportImage()
+
+        self.plugin.le_task.setText("design")
+
+    def benchVersionListing(self):
+        self.ensureDialog()
+        self.plugin.exportGetVersions()
+
+    def benchOutputPath(self):
+        self.ensureDialog()
+        self.plugin.exportGetOutputName()
+
+    def benchExportThroughput(self):
+        from Prism_Illustrator_JobQueue import JobQueue, runWorker
+
+        self.queueCount += 1
+        dbPath = os.path.join(self.outputDir, "queue_%04d.db" % self.queueCount)
+        queue = JobQueue(dbPath)
+        try:
+            for idx in range(self.args.jobs):
+                queue.enqueue(self.scenePath, {"identifier": "design", "extension": ".png"}, source="benchmark")
+        finally:
+            queue.close()
+
+        processed = runWorker(self.plugin, dbPath=dbPath, pollInterval=0.01, maxJobs=self.args.jobs)
+        queue = JobQueue(dbPath)
+        try:
+            stats = queue.getStats()
+        finally:
+            queue.close()
+
+        if processed != self.args.jobs or stats["done"] != self.args.jobs:
+            raise RuntimeError("the worker didn't export all jobs: %s" % stats)
+
+    def benchThumbnail(self):
+        self.plugin.captureViewportThumbnail()
+
+    def getPlacementFiles(self, count=50):
+        return [os.path.join(self.outputDir, "place_%04d.png" % idx) for idx in range(count)]
+
+    def benchPlaceImages(self):
+        self.plugin.placeImages(self.getPlacementFiles())
+
+    def benchPlaceImagesPerItem(self):
+        from Prism_Illustrator_Placement import placeImagesPerItem
+
+        placeImagesPerItem(self.plugin.ilApp.ActiveDocument, self.getPlacementFiles())
+
+
+def measure(func, repeat):
+    func()
+    timings = []
+    for idx in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "mean": statistics.mean(timings),
+        "max": max(timings),
+        "repeat": repeat,
+    }
+
+
+def compare(results, baselines, threshold):
+    regressions = []
+    missing = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            missing.append(name)
+            continue
+
+        ratio = result["median"] / baseline["median"] if baseline["median"] else 1
+        result["baselineMedian"] = baseline["median"]
+        result["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(name)
+
+    return regressions, missing
+
+
+def main():
+    args = parseArgs()
+    if not args.update_baselines and not os.path.exists(args.baselines):
+        print("no baselines found at %s, run with --update-baselines first" % args.baselines)
+        return 2
+
+    qapp = setupEnvironment(args)
+
+    projectPath = args.project or tempfile.mkdtemp(prefix="prism_il_bench_")
+    try:
+        benchmarks = Benchmarks(args, projectPath)
+        results = {}
+        for name, func in benchmarks.getBenchmarks():
+            if args.only and name not in args.only:
+                continue
+
+            results[name] = measure(func, args.repeat)
+            msg = "%-22s median %8.2f ms   min %8.2f ms" % (
+                name, results[name]["median"] * 1000, results[name]["min"] * 1000
+            )
+            jobCount = benchmarks.jobCounts.get(name)
+            if jobCount:
+                # the median duration of the fixed number of jobs is compared against the baseline
+                results[name]["jobs"] = jobCount
+                results[name]["jobsPerSecond"] = jobCount / results[name]["median"]
+                msg += "   %8.1f jobs/s" % results[name]["jobsPerSecond"]
+
+            print(msg)
+
+        baselines = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines, "r") as f:
+                baselines = json.load(f).get("results", {})
+
+        regressions, missing = compare(results, baselines, args.threshold)
+        report = {
+            "time": time.time(),
+            "platform": platform.platform(),
+            "python": sys.version,
+            "latency": args.latency,
+            "results": results,
+            "regressions": regressions,
+            "missingBaselines": missing,
+        }
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=4)
+
+        if args.update_baselines:
+            # benchmarks left out with --only keep their previous baseline
+            baselines.update(results)
+            with open(args.baselines, "w") as f:
+                json.dump(dict(report, results=baselines), f, indent=4)
+
+            print("baselines written: %s" % args.baselines)
+            return 0
+
+        if missing:
+            print("no baselines for: %s, run with --update-baselines" % ", ".join(missing))
+            return 2
+
+        if regressions:
+            print("regressions above %s%%: %s" % (int(args.threshold * 100), ", ".join(regressions)))
+            return 1
+
+        return 0
+    finally:
+        if not args.project:
+            shutil.rmtree(projectPath, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end run of the export job queue against the simulated Illustrator host.
+
+Jobs are enqueued into a temporary SQLite queue and processed by worker
+processes, which each load the plugin with their own FakeIllustrator host.
+The queue depth and throughput are printed while the workers run.
+
+    python run_job_queue.py --prism-root <PrismRoot> --workers 4 --jobs 40
+"""
+
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import functools
+
+
+benchDir = os.path.dirname(os.path.abspath(__file__))
+scriptDir = os.path.join(os.path.dirname(benchDir), "Illustrator", "Scripts")
+sys.path.insert(0, scriptDir)
+sys.path.insert(0, benchDir)
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Illustrator export job queue test")
+    parser.add_argument("--prism-root", default=os.getenv("PRISM_ROOT", ""))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated host round trip in seconds")
+    return parser.parse_args()
+
+
+def createFakePlugin(projectPath, prismRoot, latency):
+    import argparse
+    import FakeIllustrator
+    import run_benchmarks
+
+    run_benchmarks.setupEnvironment(argparse.Namespace(prism_root=prismRoot))
+    core = FakeIllustrator.FakeCore(projectPath, prismRoot=prismRoot)
+    return run_benchmarks.loadPlugin(core, latency)
+
+
+def main():
+    args = parseArgs()
+    from Prism_Illustrator_JobQueue import JobQueue, startWorkerProcesses
+    import FakeIllustrator
+
+    projectPath = tempfile.mkdtemp(prefix="prism_il_queue_")
+    try:
+        scenePath = FakeIllustrator.createProjectTree(projectPath, versionCount=1)
+        dbPath = os.path.join(projectPath, "jobs.db")
+        queue = JobQueue(dbPath, retryDelay=0)
+        for idx in range(args.jobs):
+            target = {"identifier": "design_%04d" % idx, "extension": ".png"}
+            queue.enqueue(scenePath, target, priority=idx % 3, source="test")
+
+        startTime = time.time()
+        factory = functools.partial(createFakePlugin, projectPath, args.prism_root, args.latency)
+        processes = startWorkerProcesses(
+            factory, args.workers, dbPath=dbPath, pollInterval=0.1, idleTimeout=2, retryDelay=0
+        )
+        while any(p.is_alive() for p in processes):
+            stats = queue.getStats()
+            print("depth %4s   done %4s   failed %4s   %7.1f jobs/min" % (
+                stats["depth"], stats["done"], stats["failed"], stats["jobsPerMinute"]
+            ))
+            if not stats["depth"]:
+                break
+
+            time.sleep(1)
+
+        for process in processes:
+            process.join()
+
+        duration = time.time() - startTime
+        stats = queue.getStats()
+        print("%s jobs with %s workers in %.1fs: %s done, %s failed, %.1f jobs/min" % (
+            args.jobs, args.workers, duration, stats["done"], stats["failed"], stats["done"] / duration * 60
+        ))
+        queue.close()
+        return 0 if stats["done"] == args.jobs else 1
+    finally:
+        shutil.rmtree(projectPath, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())